@@ -0,0 +1,252 @@
+import heapq
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from category.models import Category
+from users.models import UserCard
+from .catalog import get_catalog_version
+from .models import Card, CardBenefit, CategoryCardRanking
+
+# 카드 × 카테고리 혜택 행렬 엔진
+# [설명] 활성 CardBenefit 전체를 프로세스 메모리에 (카드 수 × 카테고리 수) 행렬로 올려두고,
+# [설명] 사용자 지출 벡터 하나로 여러 카드의 혜택/ROI를 한 번에 계산합니다.
+# [설명] 카탈로그 버전(cards.catalog)이 바뀌면 다음 요청에서 자동으로 다시 로드됩니다.
+
+BASIS_POINTS = 10000  # [설명] 혜택율 단위 (1.50% = 150bp)
+
+
+class BenefitMatrix:
+    def __init__(self, version, categories, cards, benefits, rankings=()):
+        self.version = version
+
+        # [설명] 카테고리 축
+        self.category_ids = np.array([c['category_id'] for c in categories], dtype=np.int64)
+        self.category_index = {cid: i for i, cid in enumerate(self.category_ids.tolist())}
+        self.category_names = {c['category_id']: c['category_name'] for c in categories}
+        self.category_ids_by_name = {c['category_name']: c['category_id'] for c in categories}
+
+        # [설명] 카드 축 (소프트 삭제된 카드도 보유 카드 분석을 위해 포함, active 마스크로 구분)
+        self.card_ids = np.array([c['card_id'] for c in cards], dtype=np.int64)
+        self.card_index = {cid: i for i, cid in enumerate(self.card_ids.tolist())}
+        self.cards = cards
+        self.annual_fee = np.array([c['annual_fee_domestic'] or 0 for c in cards], dtype=np.int64)
+        self.active = np.array([c['deleted_at'] is None for c in cards], dtype=bool)
+        self.active_rows = np.flatnonzero(self.active)
+        # [설명] 행 번호 → 패밀리 키 (패밀리가 없는 카드는 자기 자신만의 키)
+        self.family_keys = [c['family_id'] or f"card-{c['card_id']}" for c in cards]
+
+        # [설명] 혜택율(bp)과 한도 행렬 (한도가 없거나 0이면 무제한 = inf)
+        shape = (len(self.card_ids), len(self.category_ids))
+        self.rate_bp = np.zeros(shape, dtype=np.int32)
+        self.limit = np.full(shape, np.inf, dtype=np.float64)
+        for b in benefits:
+            row = self.card_index.get(b['card_id'])
+            col = self.category_index.get(b['category_id'])
+            if row is None or col is None or b['benefit_rate'] is None:
+                continue
+            rate_bp = int(round(b['benefit_rate'] * 100))
+            # [설명] 같은 (카드, 카테고리)가 중복되면 혜택율이 높은 행을 사용
+            if rate_bp > self.rate_bp[row, col]:
+                self.rate_bp[row, col] = rate_bp
+                self.limit[row, col] = b['benefit_limit'] if b['benefit_limit'] else np.inf
+
+        # [설명] 카테고리별 추천 순위 (category_card_rankings 테이블, 패밀리 멤버 모두 포함 — 중복 제거는 조회 시)
+        self.category_top_cards = {}
+        for category_id, card_id, benefit_rate in rankings:
+            row = self.card_index.get(card_id)
+            if row is not None:
+                self.category_top_cards.setdefault(category_id, []).append((row, float(benefit_rate)))
+
+    @classmethod
+    def load(cls, version):
+        # [설명] 4번의 쿼리로 전체 카탈로그를 적재 (요청 경로가 아니라 버전 변경 시 1회)
+        categories = list(Category.objects.filter(deleted_at__isnull=True)
+                          .order_by('category_id').values('category_id', 'category_name'))
+        cards = list(Card.objects.order_by('card_id').values(
+            'card_id', 'card_name', 'company', 'card_image_url', 'annual_fee_domestic',
+            'annual_fee_overseas', 'benefit_cap_summary', 'family_id', 'deleted_at'))
+        benefits = list(CardBenefit.objects.filter(deleted_at__isnull=True).values(
+            'card_id', 'category_id', 'benefit_rate', 'benefit_limit'))
+        rankings = list(CategoryCardRanking.objects.order_by('category_id', 'rank').values_list(
+            'category_id', 'card_id', 'benefit_rate'))
+        return cls(version, categories, cards, benefits, rankings)
+
+    def rows_for(self, card_ids):
+        # [설명] card_id 목록 → 행렬 행 번호 (카탈로그에 없는 카드는 제외)
+        return np.array([self.card_index[cid] for cid in card_ids if cid in self.card_index], dtype=np.int64)
+
+    def spending_vector(self, spending):
+        # [설명] {category_id: 금액} → 카테고리 축 지출 벡터 (모르는 카테고리는 무시)
+        vector = np.zeros(len(self.category_ids), dtype=np.float64)
+        for category_id, amount in spending.items():
+            col = self.category_index.get(category_id)
+            if col is not None and amount:
+                vector[col] += float(amount)
+        return vector
+
+    def capped_benefits(self, rows, spend):
+        # [설명] 지정한 카드 행들의 혜택 합계 = Σ min(지출 × 혜택율, 한도)
+        raw = spend[np.newaxis, :] * self.rate_bp[rows] / BASIS_POINTS
+        return np.minimum(raw, self.limit[rows]).sum(axis=1)
+
+    def card_roi(self, card_ids, spending, months=3):
+        # [설명] 기간 지출에 한도를 적용한 혜택 합 / 개월 수 = 월 평균 혜택 (시뮬레이션용 — 가상 지출)
+        rows = self.rows_for(card_ids)
+        if len(rows) == 0:
+            return []
+        monthly = self.capped_benefits(rows, self.spending_vector(spending)) / months
+        return self._roi_results(rows, monthly)
+
+    def ledger_roi(self, card_ids, benefit_totals, months=3):
+        # [설명] 혜택 원장(월별 한도 적용 완료)의 기간 혜택 합계 {card_id: 혜택} / 개월 수 = 월 평균 혜택
+        rows = self.rows_for(card_ids)
+        if len(rows) == 0:
+            return []
+        monthly = np.array([benefit_totals.get(int(self.card_ids[row]), 0) for row in rows.tolist()],
+                           dtype=np.float64) / months
+        return self._roi_results(rows, monthly)
+
+    def _roi_results(self, rows, monthly):
+        # [설명] 연 환산 혜택 / max(연회비, 1000) × 100
+        fees = np.maximum(self.annual_fee[rows], 1000)
+        roi = (monthly * 12) / fees * 100
+        return [{
+            'card_id': int(self.card_ids[row]),
+            'card_name': self.cards[row]['card_name'],
+            'roi_ratio': float(roi[i]),
+            'monthly_benefit_avg': float(monthly[i]),
+        } for i, row in enumerate(rows.tolist())]
+
+    def capped_benefit(self, card_id, category_id, spent):
+        # [설명] 한 카드·카테고리의 월 누적 결제액에 대한 혜택 = min(결제액 × 혜택율, 월 한도) (원 단위 내림)
+        row = self.card_index.get(card_id)
+        col = self.category_index.get(category_id)
+        if row is None or col is None or spent <= 0:
+            return 0
+        return int(min(spent * int(self.rate_bp[row, col]) // BASIS_POINTS, self.limit[row, col]))
+
+    def monthly_benefit_cap(self, card_ids):
+        # [설명] 보유 카드들의 월 혜택 한도 합계 (한도가 없는 혜택은 제외)
+        limits = self.limit[self.rows_for(card_ids)]
+        return float(limits[np.isfinite(limits)].sum())
+
+    def top_catalog_cards(self, monthly_spending, k=5):
+        # [설명] 카탈로그 전체 카드를 월 지출 벡터로 한 번에 채점하고 힙에서 상위 카드를 꺼내 k개 선택
+        # [설명] 점수 = 연간 혜택(월 한도 적용 × 12) - 국내 연회비, 같은 패밀리는 점수가 가장 높은 한 장만
+        rows = self.active_rows
+        if len(rows) == 0:
+            return []
+        annual = self.capped_benefits(rows, self.spending_vector(monthly_spending)) * 12
+        net = annual - self.annual_fee[rows]
+        heap = list(zip((-net).tolist(), range(len(rows))))
+        heapq.heapify(heap)
+
+        result = []
+        seen_families = set()
+        while heap and len(result) < k:
+            _, i = heapq.heappop(heap)
+            family = self.family_keys[rows[i]]
+            if family in seen_families:
+                continue
+            seen_families.add(family)
+            result.append((int(rows[i]), float(annual[i]), float(net[i])))
+        return result
+
+    def card_payload(self, row):
+        # [설명] RecommendedCardSerializer와 같은 형태의 카드 정보 (DB 조회 없이 메모리에서 생성)
+        card = self.cards[row]
+        return {
+            'card_id': card['card_id'],
+            'card_name': card['card_name'],
+            'annual_fee': card['annual_fee_domestic'],
+            'annual_fee_international': card['annual_fee_overseas'],
+            'company': card['company'],
+            'image': card['card_image_url'],
+            'benefit_summary': card['benefit_cap_summary'],
+        }
+
+    def payment_benefits(self, owned_cards, monthly_usage, category_id, amount):
+        # [설명] 이번 결제(카테고리, 금액)에 보유 카드별로 받을 수 있는 혜택 (이번 달 이미 사용한 한도 반영)
+        # [설명] owned_cards: [(user_card_id, card_id)], monthly_usage: {(user_card_id, category_id): 이번 달 누적 결제액}
+        col = self.category_index.get(category_id)
+        results = []
+        for user_card_id, card_id in owned_cards:
+            row = self.card_index.get(card_id)
+            if row is None:
+                continue
+            rate = self.rate_bp[row, col] / BASIS_POINTS if col is not None else 0.0
+            limit = self.limit[row, col] if col is not None else np.inf
+            spent = monthly_usage.get((user_card_id, category_id), 0)
+            remaining = max(limit - min(spent * rate, limit), 0.0)
+            results.append({
+                'user_card_id': user_card_id,
+                'card_id': card_id,
+                'card_name': self.cards[row]['card_name'],
+                'benefit_rate': rate * 100,
+                'expected_benefit': min(amount * rate, remaining),
+                'remaining_limit': None if np.isinf(remaining) else remaining,
+            })
+        results.sort(key=lambda x: x['expected_benefit'], reverse=True)
+        return results
+
+    def top_cards_for_category(self, category_id, exclude_card_ids=(), k=5):
+        # [설명] 카테고리 추천 순위에서 제외 카드(보유 카드 등)를 건너뛴 뒤 패밀리마다 가장 높은 한 장만, 상위 k개 (행, 혜택율) 반환
+        result = []
+        seen_families = set()
+        for row, benefit_rate in self.category_top_cards.get(category_id, []):
+            if self.cards[row]['card_id'] in exclude_card_ids or self.family_keys[row] in seen_families:
+                continue
+            seen_families.add(self.family_keys[row])
+            result.append((row, benefit_rate))
+            if len(result) >= k:
+                break
+        return result
+
+
+_matrix = None
+_lock = threading.Lock()
+
+
+def get_benefit_matrix():
+    # [설명] 현재 카탈로그 버전에 맞는 행렬 반환 (버전이 바뀌었으면 다시 로드)
+    global _matrix
+    version = get_catalog_version()
+    matrix = _matrix
+    if matrix is not None and matrix.version == version:
+        return matrix
+    with _lock:
+        if _matrix is None or _matrix.version != version:
+            _matrix = BenefitMatrix.load(version)
+        return _matrix
+
+
+# 사용자별 보유 카드 캐시
+# [설명] 시뮬레이션처럼 DB 조회 없이 응답해야 하는 경로에서 사용 (UserCard 저장/삭제 시 signals에서 무효화)
+OWNED_CARDS_CACHE_TIMEOUT = 60 * 60 if settings.SHARED_CACHE else 5  # [설명] 로컬 캐시면 다른 워커의 무효화가 안 보이므로 짧게
+
+
+def owned_cards_cache_key(user_id):
+    return f'cards:owned:{user_id}'
+
+
+def get_owned_cards(user_id):
+    # [설명] 사용자의 활성 보유 카드 [(user_card_id, card_id)] (캐시 미스일 때만 1회 조회)
+    key = owned_cards_cache_key(user_id)
+    owned = cache.get(key)
+    if owned is None:
+        owned = list(UserCard.objects.filter(user_id=user_id, deleted_at__isnull=True)
+                     .order_by('user_card_id').values_list('user_card_id', 'card_id'))
+        cache.set(key, owned, OWNED_CARDS_CACHE_TIMEOUT)
+    return owned
+
+
+def get_owned_card_ids(user_id):
+    # [설명] 사용자의 보유 card_id 목록
+    return [card_id for _, card_id in get_owned_cards(user_id)]
+
+
+def invalidate_owned_card_ids(user_id):
+    cache.delete(owned_cards_cache_key(user_id))
@@ -0,0 +1,54 @@
+import re
+
+from category.keywords import CATEGORY_KEYWORDS
+from category.matcher import KeywordMatcher
+
+# 카드 혜택 텍스트 → (카테고리, 혜택율, 한도) 추출
+# [설명] 카테고리 키워드 전체를 하나의 오토마톤으로 컴파일해 카드당 텍스트를 한 번만 훑습니다.
+# [설명] 규칙은 기존 link_categories와 같습니다:
+# [설명]   - 카테고리 키워드가 하나라도 있으면 해당 카테고리 혜택으로 연결
+# [설명]   - 카테고리명/키워드가 처음 나온 위치 뒤의 첫 번째 "숫자%"를 혜택율로 사용 (없으면 5%)
+
+DEFAULT_RATE = 5.0  # [설명] 혜택율을 찾지 못했을 때 기본값
+DEFAULT_LIMIT = 10000  # [설명] 혜택 한도 기본값
+PERCENT_PATTERN = re.compile(r'\d+%')
+
+
+def build_benefit_matcher(category_map=CATEGORY_KEYWORDS):
+    # [설명] 카테고리명과 키워드를 (카테고리명, 키워드 여부) 값으로 등록
+    patterns = []
+    for category_name, keywords in category_map.items():
+        patterns.append((category_name, (category_name, False)))
+        patterns.extend((keyword, (category_name, True)) for keyword in keywords)
+    return KeywordMatcher(patterns)
+
+
+def extract_benefits(text, matcher, category_map=CATEGORY_KEYWORDS):
+    # [설명] [(카테고리명, 혜택율, 한도)] — category_map 순서대로 반환
+    if not text:
+        return []
+
+    detected = set()
+    anchors = {}  # [설명] 카테고리별 가장 앞선 카테고리명/키워드 위치 (시작, 끝)
+    for start, end, (category_name, is_keyword) in matcher.finditer(text):
+        if is_keyword:
+            detected.add(category_name)
+        if category_name not in anchors or (start, end) < anchors[category_name]:
+            anchors[category_name] = (start, end)
+    if not detected:
+        return []
+
+    percents = [(m.start(), m.end()) for m in PERCENT_PATTERN.finditer(text)]
+    results = []
+    for category_name in category_map:
+        if category_name not in detected:
+            continue
+        _, anchor_end = anchors[category_name]
+        rate = DEFAULT_RATE
+        for start, end in percents:
+            # [설명] 위치 뒤에 숫자가 최소 한 자리 이상 남는 첫 번째 "숫자%"
+            if anchor_end < end - 1:
+                rate = float(text[max(start, anchor_end):end - 1])
+                break
+        results.append((category_name, rate, DEFAULT_LIMIT))
+    return results
@@ -0,0 +1,28 @@
+import os
+import time
+
+from django.conf import settings
+
+# 카드 카탈로그 버전 관리
+# [설명] load_cards / link_categories 등 카드·혜택 테이블을 다시 쓰는 작업이 끝나면 버전을 올립니다.
+# [설명] 백엔드와 크롤러 컨테이너가 같은 볼륨(/app)을 공유하므로 DB 조회 없이 파일로 버전을 공유합니다.
+CATALOG_VERSION_FILE = getattr(settings, 'CARD_CATALOG_VERSION_FILE', settings.BASE_DIR / '.catalog_version')
+
+
+def get_catalog_version():
+    # [설명] 현재 카탈로그 버전 문자열 반환 (파일이 없으면 '0')
+    try:
+        with open(CATALOG_VERSION_FILE, 'r', encoding='utf-8') as f:
+            return f.read().strip() or '0'
+    except FileNotFoundError:
+        return '0'
+
+
+def bump_catalog_version():
+    # [설명] 새 버전을 기록 (임시 파일에 쓰고 교체하여 읽는 쪽이 깨진 값을 보지 않도록 함)
+    version = str(time.time_ns())
+    tmp_path = f'{CATALOG_VERSION_FILE}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, CATALOG_VERSION_FILE)
+    return version
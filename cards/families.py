@@ -0,0 +1,95 @@
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from django.db import transaction
+
+from .models import Card, CardFamily
+
+# 카드 패밀리(시리즈) 계산
+# [설명] 요청마다 카드 이름 앞 7글자로 시리즈를 묶던 방식을 대신해, 카탈로그 적재 시(load_cards / update_cards)
+# [설명] 같은 카드사 안에서 정규화한 이름의 포함 관계·유사도로 카드를 묶어 card_families에 저장합니다.
+
+SIMILARITY_THRESHOLD = 0.8  # [설명] 정규화 이름 유사도가 이 이상이면 같은 패밀리
+MIN_CONTAINED_LENGTH = 4  # [설명] 포함 관계로 묶으려면 짧은 쪽 이름이 최소 이 길이 이상
+
+# [설명] 이름 비교 시 의미 없는 수식어 (괄호 내용은 별도로 제거)
+NAME_NOISE = ['체크카드', '신용카드', '카드', '체크', 'CARD', 'CHECK']
+
+
+def normalize_card_name(card_name, company=''):
+    # [설명] 비교용 이름: 괄호 내용·카드사명·수식어·공백/기호 제거, 영문 대문자화
+    name = re.sub(r'[\(\[].*?[\)\]]', '', card_name or '').upper()
+    company = (company or '').upper()
+    stem = company.replace('카드', '')
+    for token in sorted({company, stem, stem.replace('KB', '')}, key=len, reverse=True):
+        if len(token) >= 2:
+            name = name.replace(token, '')
+    for token in NAME_NOISE:
+        name = name.replace(token, '')
+    return re.sub(r'[^0-9A-Z가-힣]', '', name)
+
+
+def same_family(a, b):
+    # [설명] 정규화 이름 두 개가 같은 시리즈인지 판별
+    if not a or not b:
+        return a == b
+    short, long = sorted((a, b), key=len)
+    if len(short) >= MIN_CONTAINED_LENGTH and short in long:
+        return True
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return matcher.real_quick_ratio() >= SIMILARITY_THRESHOLD and matcher.ratio() >= SIMILARITY_THRESHOLD
+
+
+def cluster_cards(cards):
+    # [설명] cards: [(card_id, card_name, company)] → [[card_id, ...], ...] 패밀리 목록 (같은 카드사끼리만 비교)
+    by_company = defaultdict(list)
+    for card_id, card_name, company in cards:
+        by_company[company].append((card_id, card_name, normalize_card_name(card_name, company)))
+
+    families = []
+    for company, members in by_company.items():
+        # [설명] union-find 로 유사한 쌍을 같은 묶음으로 합침
+        parent = list(range(len(members)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                if find(i) != find(j) and same_family(members[i][2], members[j][2]):
+                    parent[find(j)] = find(i)
+
+        groups = defaultdict(list)
+        for i, member in enumerate(members):
+            groups[find(i)].append(member)
+        for group in groups.values():
+            families.append((company, sorted(card_id for card_id, _, _ in group),
+                             min((name for _, name, _ in group), key=len)))
+    # [설명] 가장 작은 card_id 순으로 정렬해 재계산해도 패밀리 번호가 최대한 유지되도록 함
+    families.sort(key=lambda family: family[1][0])
+    return families
+
+
+def rebuild_card_families():
+    # [설명] 활성 카드 전체로 패밀리 테이블을 다시 만들고 cards.family_id를 갱신 (하나의 트랜잭션)
+    cards = list(Card.objects.filter(deleted_at__isnull=True).values_list('card_id', 'card_name', 'company'))
+    families = cluster_cards(cards)
+
+    with transaction.atomic():
+        Card.objects.filter(family__isnull=False).update(family=None)
+        CardFamily.objects.all().delete()
+        # [설명] MySQL bulk_create는 생성된 PK를 돌려주지 않으므로 family_id를 직접 지정
+        CardFamily.objects.bulk_create([
+            CardFamily(family_id=family_id, company=company, family_name=name)
+            for family_id, (company, _, name) in enumerate(families, start=1)
+        ], batch_size=1000)
+
+        updates = []
+        for family_id, (_, card_ids, _) in enumerate(families, start=1):
+            updates.extend(Card(card_id=card_id, family_id=family_id) for card_id in card_ids)
+        Card.objects.bulk_update(updates, ['family'], batch_size=1000)
+    return len(families)
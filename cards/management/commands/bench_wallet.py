@@ -0,0 +1,85 @@
+import itertools
+import math
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from cards.wallet import WalletSolver, fill_benefits
+
+
+class Command(BaseCommand):
+    help = '카드 조합 최적화(WalletSolver) 성능을 가상 카탈로그로 측정하고, 작은 카탈로그에서 전수 탐색 결과와 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=1500, help='가상 카탈로그 카드 수')
+        parser.add_argument('--categories', type=int, default=14, help='카테고리 수')
+        parser.add_argument('--k', type=int, default=3, help='조합 카드 수')
+        parser.add_argument('--users', type=int, default=20, help='측정할 가상 사용자 수')
+        parser.add_argument('--verify-cards', type=int, default=60, help='전수 탐색과 비교할 카탈로그 크기 (0이면 생략)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n, c, k = options['cards'], options['categories'], options['k']
+        rate_bp, limit, fee = self.fake_catalog(rng, n, c)
+
+        # 1. 전수 탐색과 결과 비교 (작은 카탈로그)
+        if options['verify_cards']:
+            m = options['verify_cards']
+            for _ in range(5):
+                spend = self.fake_spending(rng, c)
+                solver = WalletSolver(rate_bp[:m], limit[:m], fee[:m], spend)
+                _, net = solver.solve(k)
+                expected = self.brute_force(solver, m, k)
+                if abs(net - expected) > 1e-6:
+                    self.stdout.write(self.style.ERROR(f'결과 불일치: solver={net:.0f}, brute_force={expected:.0f}'))
+                    return
+            self.stdout.write(self.style.SUCCESS(f'검증 완료: 카드 {m}장 × 5명, 전수 탐색과 결과 일치'))
+
+        # 2. 전체 카탈로그 성능 측정
+        timings = []
+        nodes = []
+        for _ in range(options['users']):
+            solver = WalletSolver(rate_bp, limit, fee, self.fake_spending(rng, c))
+            started = time.perf_counter()
+            solver.solve(k)
+            timings.append((time.perf_counter() - started) * 1000)
+            nodes.append(solver.nodes)
+
+        combinations = math.comb(n, k)
+        self.stdout.write(
+            f'카드 {n}장, 카테고리 {c}개, k={k}, 사용자 {options["users"]}명\n'
+            f'  평균 {np.mean(timings):.1f} ms / p95 {np.percentile(timings, 95):.1f} ms / 최대 {max(timings):.1f} ms\n'
+            f'  평가한 조합 수 평균 {np.mean(nodes):,.0f} (전수 탐색 C(n, k) = {combinations:,})'
+        )
+
+    def fake_catalog(self, rng, n, c):
+        # [설명] 카드마다 2~5개 카테고리에 1~50% 혜택, 한도 5천~3만원(일부 무제한), 연회비 0~5만원
+        # [설명] 약 10%는 앞선 카드와 혜택 구조가 같은 카드 (VISA/Master 버전처럼 연회비만 다를 수 있음)
+        rate_bp = np.zeros((n, c), dtype=np.int32)
+        limit = np.full((n, c), np.inf)
+        for row in range(n):
+            if row and rng.random() < 0.1:
+                source = rng.integers(row)
+                rate_bp[row], limit[row] = rate_bp[source], limit[source]
+                continue
+            cols = rng.choice(c, size=rng.integers(2, 6), replace=False)
+            rate_bp[row, cols] = rng.integers(1, 51, size=len(cols)) * 100
+            limit[row, cols] = np.where(rng.random(len(cols)) < 0.2, np.inf,
+                                        rng.integers(1, 7, size=len(cols)) * 5000)
+        fee = rng.integers(0, 11, size=n) * 5000
+        return rate_bp, limit, fee
+
+    def fake_spending(self, rng, c):
+        # [설명] 카테고리별 월 지출 0~40만원
+        return rng.integers(0, 41, size=c) * 10000.0
+
+    def brute_force(self, solver, m, k):
+        best = 0.0
+        for size in range(1, k + 1):
+            combos = np.array(list(itertools.combinations(range(m), size)))
+            monthly = fill_benefits(solver.rates[combos], solver.caps[combos], solver.spend)
+            net = monthly * 12 - solver.annual_fee[combos].sum(axis=1)
+            best = max(best, float(net.max()))
+        return best
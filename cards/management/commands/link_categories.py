@@ -1,60 +1,69 @@
-import csv
-import re
+import hashlib
+import json
 from cards.models import Card, CardBenefit
+from cards.catalog import bump_catalog_version
+from cards.rankings import rebuild_category_rankings
+from cards.benefit_extractor import build_benefit_matcher, extract_benefits
 from category.models import Category
+from category.keywords import CATEGORY_KEYWORDS
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
 class Command(BaseCommand):
-    help = '카드 주요혜택 텍스트를 분석하여 카테고리별 혜택 데이터를 생성합니다.'
+    help = '카드 주요혜택 텍스트를 분석하여 카테고리별 혜택 데이터를 생성합니다. (혜택 텍스트가 바뀐 카드만 다시 연결)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='변경 여부와 관계없이 전체 카드 혜택을 다시 연결')
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create / bulk_update 배치 크기')
 
     def handle(self, *args, **options):
-        category_map = {
-            '식비': ['식음료', '식당', '푸드', '베이커리', '외식', '음식점'],
-            '카페/디저트': ['카페', '커피', '스타벅스', '디저트', '제과'],
-            '대중교통': ['대중교통', '버스', '지하철', '택시', '철도'],
-            '편의점': ['편의점', 'GS25', 'CU', '세븐일레븐', '생활 편의'], # '생활 편의' 추가
-            '온라인쇼핑': ['온라인 쇼핑', '온라인쇼핑', '쿠팡', '11번가', 'G마켓', '쇼핑'],
-            '대형마트': ['마트', '이마트', '홈플러스', '롯데마트'],
-            '주유/차량': ['주유', '충전', '주차', '정비', 'LPG'],
-            '통신/공과금': ['통신', '공과금', '핸드폰', '전기', '수도'],
-            '디지털구독': ['디지털콘텐츠', '멤버십', '넷플릭스', '유튜브', '구독', 'OTT'], # '디지털콘텐츠' 추가
-            '문화/여가': ['영화', '테마파크', '놀이공원', '공연', '스포츠'],
-            '의료/건강': ['병원', '약국', '건강검진'],
-            '교육': ['학원', '교육', '도서', '서점'],
-            '뷰티/잡화': ['뷰티', '화장품', '올리브영'],
-            '여행/숙박': ['여행', '항공', '숙박', '호텔', '면세점'],
-        }
-
-        # 기존 혜택 연결 데이터 삭제 후 재설정
-        CardBenefit.objects.all().delete()
-        cards = Card.objects.all()
-        benefit_count = 0
-
-        for card in cards:
-            text = card.benefit_cap_summary
-            if not text: continue
-
-            for cat_name, keywords in category_map.items():
-                # 키워드가 텍스트에 포함되어 있는지 확인
-                if any(kw in text for kw in keywords):
-                    try:
-                        category = Category.objects.get(category_name=cat_name)
-                        
-                        # 텍스트에서 해당 카테고리 근처의 숫자(%) 추출 시도
-                        # 예: "디지털콘텐츠: 50%할인" 에서 50 추출
-                        rate = 5.0 # 기본값
-                        pattern = rf"({cat_name}|{'|'.join(keywords)}).*?(\d+)%"
-                        match = re.search(pattern, text)
-                        if match:
-                            rate = float(match.group(2))
-                        
-                        CardBenefit.objects.get_or_create(
-                            card=card,
-                            category=category,
-                            defaults={'benefit_rate': rate, 'benefit_limit': 10000}
-                        )
-                        benefit_count += 1
-                    except Category.DoesNotExist:
-                        continue
-
-        self.stdout.write(self.style.SUCCESS(f'✅ 총 {benefit_count}건의 카테고리 혜택 연동 완료!'))
\ No newline at end of file
+        category_map = CATEGORY_KEYWORDS  # 카테고리별 키워드 (category/keywords.py 공용 사전)
+        full = options['full']
+        batch_size = options['batch_size']
+
+        # 키워드 전체를 하나의 매처로 컴파일 + 카테고리 ID는 한 번만 조회해서 캐시
+        matcher = build_benefit_matcher(category_map)
+        category_ids = dict(Category.objects.filter(category_name__in=list(category_map))
+                            .values_list('category_name', 'category_id'))
+
+        # 키워드 사전이나 카테고리 구성이 바뀌면 모든 카드를 다시 연결하도록 규칙 지문을 해시에 포함
+        rules = json.dumps([category_map, sorted(category_ids.items())], ensure_ascii=False, sort_keys=True)
+
+        relinked = {}  # card_id → 새 혜택 텍스트 해시
+        benefits = []
+        cards = Card.objects.filter(deleted_at__isnull=True).values_list('card_id', 'benefit_cap_summary', 'benefit_link_hash')
+        for card_id, text, old_hash in cards.iterator(chunk_size=2000):
+            new_hash = hashlib.sha256(f"{rules}\x1f{text or ''}".encode('utf-8')).hexdigest()
+            if not full and new_hash == old_hash:
+                continue  # 혜택 텍스트가 그대로인 카드는 건너뜀
+            relinked[card_id] = new_hash
+
+            # 텍스트를 한 번만 훑어 (카테고리, 혜택율, 한도) 추출
+            for cat_name, rate, limit in extract_benefits(text, matcher, category_map):
+                category_id = category_ids.get(cat_name)
+                if category_id is None:
+                    continue
+                benefits.append(CardBenefit(card_id=card_id, category_id=category_id,
+                                            benefit_rate=rate, benefit_limit=limit))
+
+        if not relinked:
+            self.stdout.write(self.style.SUCCESS('✅ 혜택 텍스트가 바뀐 카드가 없어 연동을 건너뜁니다.'))
+            return
+
+        # 다시 연결하는 카드의 기존 혜택만 지우고 일괄 저장
+        # (전체 재연결이어도 대상은 활성 카드뿐 — 소프트 삭제된 카드의 혜택은 보유 카드 분석에 쓰이므로 남김)
+        card_ids = list(relinked)
+        with transaction.atomic():
+            for i in range(0, len(card_ids), batch_size):
+                CardBenefit.objects.filter(card_id__in=card_ids[i:i + batch_size]).delete()
+            CardBenefit.objects.bulk_create(benefits, batch_size=batch_size)
+            Card.objects.bulk_update([Card(card_id=card_id, benefit_link_hash=link_hash)
+                                      for card_id, link_hash in relinked.items()],
+                                     ['benefit_link_hash'], batch_size=batch_size)
+            rebuild_category_rankings()  # 카테고리별 추천 순위 재생성 (실패하면 혜택 변경까지 롤백)
+
+        # 혜택 테이블이 바뀌었으므로 카탈로그 버전을 올려 혜택 행렬 엔진이 다시 로드되도록 함
+        bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ 카드 {len(relinked)}장 재연결, 총 {len(benefits)}건의 카테고리 혜택 연동 완료!'))
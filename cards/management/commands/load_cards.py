@@ -1,52 +1,130 @@
 import csv
+import hashlib
+import time
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 from cards.models import Card
+from cards.catalog import bump_catalog_version
+from cards.rankings import rebuild_category_rankings
+from cards.families import rebuild_card_families
 
 from django.conf import settings
 
+# CSV에서 적재하는 카드 필드 (해시 계산 순서 고정)
+CARD_FIELDS = [
+    'card_name', 'company', 'annual_fee_domestic', 'annual_fee_overseas',
+    'baseline_requirements_text', 'benefit_cap_summary',
+]
+
+
+def cleanInt(val):
+    """
+    @name : cleanInt
+    @function: cleanInt - 문자열에서 숫자만 추출
+    @param : val
+    """
+    if not val:
+        return 0
+    num = "".join(filter(str.isdigit, str(val)))
+    return int(num) if num else 0
+
+
+def contentHash(values):
+    """
+    @name : contentHash
+    @function: contentHash - 카드 필드 값으로 변경 감지용 SHA-256 해시 생성
+    @param : values - CARD_FIELDS 순서의 필드 dict
+    """
+    raw = "\x1f".join("" if values[field] is None else str(values[field]) for field in CARD_FIELDS)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
 class Command(BaseCommand):
-    help = "카드 고릴라 CSV 데이터를 DB에 저장합니다."
+    help = "카드 고릴라 CSV 데이터를 DB에 반영합니다. (카드명, 카드사) 기준으로 추가/변경/소프트 삭제만 수행합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='bulk_create / bulk_update 배치 크기')
 
     def handle(self, *args, **options):
         filePath = settings.BASE_DIR / "card_gorilla_cleaned.csv"
-        
+        batchSize = options['batch_size']
+        startedAt = time.perf_counter()
+
         try:
-            # 1. 기존 데이터 삭제 (중복 방지)
-            self.stdout.write("기존 카드 데이터를 삭제 중...")
-            Card.objects.all().delete()
-            
+            # 1. CSV 읽기 → (카드명, 카드사) 기준 dict (같은 키가 여러 번 나오면 마지막 행 사용)
             with open(filePath, "r", encoding="utf-8-sig") as f:
-                reader = csv.DictReader(f)
-                cardsToCreate = []
-                
-                for row in reader:
-                    def cleanInt(val):
-                        """
-                        @name : cleanInt
-                        @function: cleanInt - 문자열에서 숫자만 추출
-                        @param : val
-                        """
-                        if not val:
-                            return 0
-                        num = "".join(filter(str.isdigit, str(val)))
-                        return int(num) if num else 0
-
+                incoming = {}
+                for row in csv.DictReader(f):
                     # 사용자님의 models.py 필드명에 정확히 맞춤
-                    cardsToCreate.append(Card(
-                        card_name=row["카드명"],
-                        company=row["카드사"],
-                        annual_fee_domestic=cleanInt(row["연회비_국내"]),
-                        annual_fee_overseas=cleanInt(row["연회비_해외"]),  # 수정됨
-                        baseline_requirements_text=row["전월실적_기준"],   # 전월실적을 텍스트 필드에 저장
-                        benefit_cap_summary=row["주요혜택"],            # 주요혜택 요약에 저장
-                    ))
-                
-                # 2. 새로운 데이터 일괄 저장
-                if cardsToCreate:
-                    Card.objects.bulk_create(cardsToCreate)
-                    self.stdout.write(self.style.SUCCESS(f"성공: {len(cardsToCreate)}개의 카드가 저장되었습니다!"))
+                    values = {
+                        "card_name": row["카드명"],
+                        "company": row["카드사"],
+                        "annual_fee_domestic": cleanInt(row["연회비_국내"]),
+                        "annual_fee_overseas": cleanInt(row["연회비_해외"]),
+                        "baseline_requirements_text": row["전월실적_기준"],  # 전월실적을 텍스트 필드에 저장
+                        "benefit_cap_summary": row["주요혜택"],  # 주요혜택 요약에 저장
+                    }
+                    incoming[(values["card_name"], values["company"])] = values
+
+            if not incoming:
+                self.stdout.write(self.style.WARNING("CSV에 저장할 데이터가 없습니다."))
+                return
+
+            # 2. 기존 카드 인덱스 (카드명, 카드사) → Card (같은 키가 중복이면 card_id가 가장 작은 카드만 유지)
+            existing = {}
+            duplicates = []
+            for card in Card.objects.order_by('card_id').only('card_id', 'card_name', 'company', 'content_hash', 'deleted_at'):
+                key = (card.card_name, card.company)
+                if key in existing:
+                    duplicates.append(card)
                 else:
-                    self.stdout.write(self.style.WARNING("CSV에 저장할 데이터가 없습니다."))
-                    
+                    existing[key] = card
+
+            # 3. 변경분 계산 (해시가 같으면 건너뜀)
+            now = timezone.now()
+            toCreate, toUpdate, toDelete = [], [], []
+            unchangedCount = 0
+            for key, values in incoming.items():
+                newHash = contentHash(values)
+                card = existing.get(key)
+                if card is None:
+                    toCreate.append(Card(content_hash=newHash, **values))
+                elif card.content_hash != newHash or card.deleted_at is not None:
+                    for field, value in values.items():
+                        setattr(card, field, value)
+                    card.content_hash = newHash
+                    card.deleted_at = None  # 사라졌던 카드가 다시 나오면 복구
+                    card.updated_at = now
+                    toUpdate.append(card)
+                else:
+                    unchangedCount += 1
+
+            for key, card in existing.items():
+                if key not in incoming and card.deleted_at is None:
+                    toDelete.append(card)
+            toDelete.extend(card for card in duplicates if card.deleted_at is None)
+            for card in toDelete:
+                card.deleted_at = now
+                card.updated_at = now
+
+            # 4. 하나의 트랜잭션에서 일괄 반영 (변경이 없으면 아무것도 쓰지 않음)
+            # 패밀리·추천 순위 재계산도 같은 트랜잭션 → 재계산이 실패하면 카드 변경까지 롤백되어 카탈로그가 어긋나지 않음
+            if toCreate or toUpdate or toDelete:
+                with transaction.atomic():
+                    Card.objects.bulk_create(toCreate, batch_size=batchSize)
+                    Card.objects.bulk_update(toUpdate, CARD_FIELDS + ['content_hash', 'deleted_at', 'updated_at'], batch_size=batchSize)
+                    Card.objects.bulk_update(toDelete, ['deleted_at', 'updated_at'], batch_size=batchSize)
+                    rebuild_card_families()  # 카드 패밀리(시리즈) 재계산
+                    rebuild_category_rankings()  # 카테고리별 추천 순위 재생성
+
+                bump_catalog_version()  # 커밋 후 버전 갱신 → 혜택 행렬 엔진이 재계산까지 끝난 카탈로그를 다시 로드
+
+            elapsed = time.perf_counter() - startedAt
+            self.stdout.write(self.style.SUCCESS(
+                f"완료 ({elapsed:.2f}s): 추가 {len(toCreate)}건 / 변경 {len(toUpdate)}건 / "
+                f"삭제 {len(toDelete)}건 / 변경 없음 {unchangedCount}건"
+            ))
+
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f"에러 발생: {e}"))
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f"에러 발생: {e}"))
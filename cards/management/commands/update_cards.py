@@ -1,43 +1,109 @@
 import csv
+import time
+from collections import defaultdict
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.utils import timezone
 from cards.models import Card
+from cards.catalog import bump_catalog_version
+from cards.families import rebuild_card_families
+from cards.rankings import rebuild_category_rankings
+from cards.management.commands.load_cards import CARD_FIELDS, contentHash
+
+# CSV 컬럼 → Card 필드 (컬럼이 없으면 기존 값 유지)
+FIELD_COLUMNS = {
+    'card_image_url': '이미지URL',
+    'benefit_cap_summary': '주요혜택',
+    'baseline_requirements_text': '전월실적',
+}
+
 
 class Command(BaseCommand):
     help = 'CSV 파일을 읽어 기존 카드 데이터의 이미지 URL과 상세 정보를 업데이트합니다.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default='/app/card_gorilla_list.csv', help='업데이트에 사용할 CSV 경로')
+        parser.add_argument('--batch-size', type=int, default=500, help='bulk_update 배치 크기')
+
     def handle(self, *args, **options):
         # 업로드된 파일 경로
-        file_path = '/app/card_gorilla_list.csv'
-        
+        file_path = options['file']
+        batch_size = options['batch_size']
+        started_at = time.perf_counter()
+
         try:
-            with open(file_path, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                updated_count = 0
-                skipped_count = 0
+            # 1. 활성 카드의 (카드명, 카드사) → (card_id, 현재 값) 인덱스를 한 번의 쿼리로 적재
+            # [설명] 소프트 삭제된 카드는 갱신하지 않음 (load_cards와 같은 기준), content_hash 재계산용으로 CARD_FIELDS도 함께 읽음
+            fields = list(dict.fromkeys(CARD_FIELDS + list(FIELD_COLUMNS)))
+            index = {}
+            for card_id, *values in Card.objects.filter(deleted_at__isnull=True).order_by('-card_id').values_list(
+                    'card_id', *fields):  # [설명] 같은 키가 여럿이면 card_id가 가장 작은 카드가 남도록 역순으로 적재
+                current = dict(zip(fields, values))
+                index[(current['card_name'], current['company'])] = (card_id, current)
+            loaded_at = time.perf_counter()
+
+            scanned_count = 0
+            changed_count = 0
+            unchanged_count = 0
+            skipped_count = 0
+            pending = defaultdict(list)  # [설명] 바뀐 필드 조합 → 업데이트할 Card 목록
+            pending_count = 0
+            now = timezone.now()
 
-                # 효율적인 업데이트를 위해 트랜잭션 사용
+            def flush():
+                # [설명] 바뀐 필드 조합별로 bulk_update (바뀐 필드만 UPDATE 문에 포함)
                 with transaction.atomic():
-                    for row in reader:
-                        card_name = row['카드명']
-                        company = row['카드사']
-                        
-                        # 카드명과 카드사가 동시에 일치하는 기존 데이터를 찾음
-                        card = Card.objects.filter(card_name=card_name, company=company).first()
-                        
-                        if card:
-                            # 필요한 필드(이미지 URL, 혜택 요약 등)만 선택적으로 업데이트
-                            card.card_image_url = row.get('이미지URL', card.card_image_url)
-                            card.benefit_cap_summary = row.get('주요혜택', card.benefit_cap_summary)
-                            card.baseline_requirements_text = row.get('전월실적', card.baseline_requirements_text)
-                            card.save()
-                            updated_count += 1
-                        else:
-                            skipped_count += 1
-
-                self.stdout.write(self.style.SUCCESS(
-                    f'업데이트 완료: {updated_count}건 / 일치하는 데이터 없음: {skipped_count}건'
-                ))
+                    for changed_fields, cards in pending.items():
+                        Card.objects.bulk_update(cards, list(changed_fields) + ['updated_at'], batch_size=batch_size)
+                pending.clear()
+
+            # 2. CSV를 한 줄씩 읽으며 바뀐 필드만 계산
+            with open(file_path, 'r', encoding='utf-8-sig') as f:
+                for row in csv.DictReader(f):
+                    scanned_count += 1
+                    # 카드명과 카드사가 동시에 일치하는 기존 데이터를 찾음
+                    match = index.get((row['카드명'], row['카드사']))
+                    if match is None:
+                        skipped_count += 1
+                        continue
+
+                    card_id, current = match
+                    changes = {
+                        field: row[column]
+                        for field, column in FIELD_COLUMNS.items()
+                        if column in row and row[column] != current[field]
+                    }
+                    if not changes:
+                        unchanged_count += 1
+                        continue
+
+                    current.update(changes)  # [설명] CSV에 같은 카드가 다시 나오면 최신 값 기준으로 비교
+                    if any(field in CARD_FIELDS for field in changes):
+                        changes['content_hash'] = contentHash(current)  # [설명] 해시도 바뀐 값 기준으로 함께 갱신
+                    pending[tuple(sorted(changes))].append(Card(card_id=card_id, updated_at=now, **changes))
+                    changed_count += 1
+                    pending_count += 1
+                    if pending_count >= batch_size:
+                        flush()
+                        pending_count = 0
+
+            if pending:
+                flush()
+            written_at = time.perf_counter()
+
+            # 3. 카드 정보가 바뀌었으면 패밀리·추천 순위 재계산 후 카탈로그 버전 갱신
+            if changed_count:
+                rebuild_card_families()
+                rebuild_category_rankings()
+                bump_catalog_version()
+            finished_at = time.perf_counter()
+
+            self.stdout.write(self.style.SUCCESS(
+                f'업데이트 완료: 읽은 행 {scanned_count}건 / 변경 {changed_count}건 / 변경 없음 {unchanged_count}건 / '
+                f'일치하는 데이터 없음: {skipped_count}건\n'
+                f'소요 시간: 인덱스 적재 {loaded_at - started_at:.2f}s, 비교·저장 {written_at - loaded_at:.2f}s, '
+                f'후처리 {finished_at - written_at:.2f}s, 전체 {finished_at - started_at:.2f}s'
+            ))
 
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f"에러 발생: {e}"))
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f"에러 발생: {e}"))
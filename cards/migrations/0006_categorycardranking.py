@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0005_remove_card_card_number_remove_card_user'),
+        ('category', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryCardRanking',
+            fields=[
+                ('ranking_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('benefit_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('card', models.ForeignKey(db_column='card_id', on_delete=django.db.models.deletion.CASCADE, to='cards.card')),
+                ('category', models.ForeignKey(db_column='category_id', on_delete=django.db.models.deletion.CASCADE, to='category.category')),
+            ],
+            options={
+                'db_table': 'category_card_rankings',
+                'constraints': [models.UniqueConstraint(fields=('category', 'rank'), name='uniq_category_rank')],
+            },
+        ),
+    ]
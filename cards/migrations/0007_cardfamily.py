@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 11:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0006_categorycardranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardFamily',
+            fields=[
+                ('family_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('company', models.CharField(max_length=50)),
+                ('family_name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'card_families',
+            },
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='family',
+            field=models.ForeignKey(blank=True, db_column='family_id', null=True, on_delete=django.db.models.deletion.SET_NULL, to='cards.cardfamily'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0008_card_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='benefit_link_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -1,6 +1,22 @@
 from django.db import models
 
 
+# 카드 패밀리(시리즈) 모델
+class CardFamily(models.Model):
+    # [설명] 같은 카드사의 이름이 유사한 카드 묶음 (예: '신한카드 구독 좋아요', 'SPOTV NOW 신한카드 구독 좋아요')
+    family_id = models.BigAutoField(primary_key=True)  # [설명] PK
+    company = models.CharField(max_length=50)  # [설명] 카드 발급사
+    family_name = models.CharField(max_length=100)  # [설명] 대표 카드 이름 (묶음 중 가장 짧은 이름)
+    created_at = models.DateTimeField(auto_now_add=True)  # [설명] 생성일
+
+    class Meta:
+        db_table = 'card_families'  # [설명] 실제 DB 테이블명
+
+    def __str__(self):
+        # [설명] admin 등에서 표시될 문자열 포맷
+        return f'CardFamily({self.family_id}, {self.family_name})'
+
+
 # 카드 정보 모델
 class Card(models.Model):
     card_id = models.BigAutoField(primary_key=True)  # [설명] PK
@@ -12,6 +28,9 @@ class Card(models.Model):
     fee_waiver_rule = models.CharField(max_length=500, null=True, blank=True)  # [설명] 연회비 면제 조건 텍스트
     baseline_requirements_text = models.CharField(max_length=500, null=True, blank=True)  # [설명] 기본 요구사항 텍스트 (예: "연소득 3000만원 이상")
     benefit_cap_summary = models.CharField(max_length=500, null=True, blank=True)  # [설명] 혜택 요약 필드 (예: "연간 최대 100만원 혜택")
+    content_hash = models.CharField(max_length=64, null=True, blank=True)  # [설명] 마지막 적재 시 원본 CSV 행의 해시 (변경 감지용)
+    benefit_link_hash = models.CharField(max_length=64, null=True, blank=True)  # [설명] 마지막 link_categories 시 혜택 텍스트 해시 (재연결 필요 여부 판단)
+    family = models.ForeignKey('CardFamily', on_delete=models.SET_NULL, null=True, blank=True, db_column='family_id')  # [설명] 카드 패밀리 (load_cards / update_cards 시 계산)
     created_at = models.DateTimeField(auto_now_add=True)  # [설명] 생성일
     updated_at = models.DateTimeField(auto_now=True)  # [설명] 수정일
     deleted_at = models.DateTimeField(null=True, blank=True)  # [설명] 소프트 삭제용 (null이면 활성 상태)
@@ -41,4 +60,24 @@ class CardBenefit(models.Model):
 
     def __str__(self):
         # [설명] admin 등에서 표시될 문자열 포맷
-        return f'CardBenefit({self.benefit_id}, {self.card.card_name}, {self.benefit_rate}%)'
\ No newline at end of file
+        return f'CardBenefit({self.benefit_id}, {self.card.card_name}, {self.benefit_rate}%)'
+
+# 카테고리별 추천 카드 순위 (link_categories / load_cards 실행 시 재생성)
+class CategoryCardRanking(models.Model):
+    # [설명] 카테고리마다 혜택율 상위 패밀리의 카드를 순위대로 미리 저장해두는 테이블 (시리즈 중복 제거는 보유 카드 제외 후 조회 시)
+    ranking_id = models.BigAutoField(primary_key=True)  # [설명] PK
+    category = models.ForeignKey('category.Category', on_delete=models.CASCADE, db_column='category_id')  # [설명] 대상 카테고리
+    card = models.ForeignKey('Card', on_delete=models.CASCADE, db_column='card_id')  # [설명] 순위에 오른 카드
+    rank = models.PositiveSmallIntegerField()  # [설명] 카테고리 내 순위 (1부터 시작)
+    benefit_rate = models.DecimalField(max_digits=5, decimal_places=2)  # [설명] 해당 카테고리 혜택율
+    created_at = models.DateTimeField(auto_now_add=True)  # [설명] 생성일
+
+    class Meta:
+        db_table = 'category_card_rankings'  # [설명] 실제 DB 테이블명
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'rank'], name='uniq_category_rank'),  # [설명] (카테고리, 순위) 인덱스 조회용
+        ]
+
+    def __str__(self):
+        # [설명] admin 등에서 표시될 문자열 포맷
+        return f'CategoryCardRanking({self.category_id}, {self.rank}, {self.card_id})'
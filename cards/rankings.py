@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from .benefit_engine import BenefitMatrix
+from .models import CategoryCardRanking
+
+# 카테고리별 추천 카드 순위 재생성
+# [설명] 요청마다 CardBenefit을 혜택율로 정렬하던 작업을 카탈로그가 바뀔 때(load_cards / link_categories) 한 번만 수행해
+# [설명] category_card_rankings에 저장합니다. 패밀리 중복 제거는 보유 카드를 뺀 뒤에 해야 하므로(보유 카드가 패밀리 대표면
+# [설명] 다음 멤버가 대신 추천되어야 함) 여기서는 패밀리 멤버를 모두 저장하고 조회 시(BenefitMatrix.top_cards_for_category) 거릅니다.
+
+RANKING_SIZE = 30  # [설명] 카테고리당 저장할 패밀리 수 (보유 카드 제외 후에도 5개 이상 남도록 여유 있게)
+
+
+def build_category_rankings(matrix, size=RANKING_SIZE):
+    # [설명] {category_id: [(card_id, 혜택율), ...]} 형태로 카테고리별 상위 카드 계산
+    # [설명] 혜택율 내림차순(동률이면 card_id 순), 활성 카드만, 상위 size개 패밀리(cards.families)의 멤버 카드 전부
+    rankings = {}
+    for col, category_id in enumerate(matrix.category_ids.tolist()):
+        rates = matrix.rate_bp[:, col]
+        rows = np.flatnonzero((rates > 0) & matrix.active)
+        rows = rows[np.lexsort((matrix.card_ids[rows], -rates[rows]))]
+
+        seen_families = set()
+        ranked = []
+        for row in rows.tolist():
+            family = matrix.family_keys[row]
+            if family not in seen_families:
+                if len(seen_families) >= size:
+                    continue
+                seen_families.add(family)
+            ranked.append((matrix.cards[row]['card_id'], Decimal(int(rates[row])) / 100))
+        rankings[category_id] = ranked
+    return rankings
+
+
+def rebuild_category_rankings(size=RANKING_SIZE):
+    # [설명] 현재 DB 카탈로그로 순위 테이블 전체를 다시 생성 (하나의 트랜잭션)
+    rankings = build_category_rankings(BenefitMatrix.load(version=None), size=size)
+    rows = [
+        CategoryCardRanking(category_id=category_id, card_id=card_id, rank=rank, benefit_rate=rate)
+        for category_id, ranked in rankings.items()
+        for rank, (card_id, rate) in enumerate(ranked, start=1)
+    ]
+    with transaction.atomic():
+        CategoryCardRanking.objects.all().delete()
+        CategoryCardRanking.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
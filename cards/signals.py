@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import UserCard
+from .benefit_engine import invalidate_owned_card_ids
+
+
+# 보유 카드 변경 시 보유 카드 캐시 무효화
+@receiver([post_save, post_delete], sender=UserCard)
+def invalidate_owned_cards(sender, instance, **kwargs):
+    invalidate_owned_card_ids(instance.user_id)
@@ -35,4 +35,427 @@ class CodefApiTest(TestCase):
         self.assertEqual(result['result']['code'], 'CF-00000')
         
         # 결과 확인을 위해 출력 (옵션)
-        print(json.dumps(result, indent=4, ensure_ascii=False))
\ No newline at end of file
+        print(json.dumps(result, indent=4, ensure_ascii=False))
+
+# 혜택 행렬 엔진 기반 카드 ROI 분석 테스트
+from datetime import timedelta
+from django.utils import timezone
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory, force_authenticate
+from category.models import Category
+from expense.models import Expense
+from users.models import User, UserCard
+from cards import benefit_engine
+from category import classifier
+from cards.models import Card, CardBenefit
+from cards.rankings import rebuild_category_rankings
+from cards.families import rebuild_card_families
+from cards.views import CardBenefitAnalysisView, CardRecommendationView, CardSimulationView, CardWalletView, BestCardForPaymentView
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class CardBenefitAnalysisViewTest(TestCase):
+    def setUp(self):
+        benefit_engine._matrix = None  # [설명] 테스트마다 행렬을 새로 로드
+        classifier._classifier = None  # [설명] 가맹점 분류 캐시 초기화
+        cache.clear()  # [설명] 보유 카드/사용 현황 캐시 초기화
+        self.user = User.objects.create(email='roi@example.com', name='테스터', password='pw')
+        self.food = Category.objects.create(category_name='식비')
+        self.cafe = Category.objects.create(category_name='카페/디저트')
+
+        self.my_card = Card.objects.create(card_name='내 카드', company='신한카드', annual_fee_domestic=10000)
+        CardBenefit.objects.create(card=self.my_card, category=self.food, benefit_rate=10, benefit_limit=5000)
+        CardBenefit.objects.create(card=self.my_card, category=self.cafe, benefit_rate=5)
+        self.other = Card.objects.create(card_name='식비 특화카드 라이트', company='KB국민카드')
+        CardBenefit.objects.create(card=self.other, category=self.food, benefit_rate=20)
+        # [설명] 같은 패밀리(정규화 이름 포함 관계) 카드는 추천에서 한 장만 남아야 함
+        self.series = Card.objects.create(card_name='식비 특화카드 라이트 플러스', company='KB국민카드')
+        CardBenefit.objects.create(card=self.series, category=self.food, benefit_rate=15)
+        rebuild_card_families()
+        rebuild_category_rankings()
+
+        user_card = UserCard.objects.create(user=self.user, card=self.my_card)
+        now = timezone.now()
+        for category, amount in [(self.food, 90000), (self.cafe, 30000), (self.cafe, 30000)]:
+            Expense.objects.create(user=self.user, category=category, user_card=user_card,
+                                   amount=amount, merchant_name='가맹점', spent_at=now - timedelta(days=1))
+
+    def test_roi_uses_matrix_and_two_queries(self):
+        benefit_engine.get_benefit_matrix()  # [설명] 행렬 적재 쿼리는 요청 쿼리 수에서 제외
+        request = APIRequestFactory().get('/api/v1/cards/benefit_analysis/')
+        force_authenticate(request, user=self.user)
+
+        with self.assertNumQueries(2):
+            response = CardBenefitAnalysisView.as_view()(request)
+
+        result = response.data['result']
+        # 식비: min(90000 × 10%, 5000) + 카페: 60000 × 5% = 8000 → 월 평균 2667, ROI = 32000 / 10000
+        self.assertEqual(result['my_cards'][0]['monthly_benefit_avg'], 2667)
+        self.assertEqual(result['my_cards'][0]['roi_ratio'], 320.0)
+        self.assertEqual(result['recommendations']['target_category'], '식비')
+        self.assertEqual([c['card_id'] for c in result['recommendations']['cards']], [self.other.card_id])
+
+    def test_owned_family_member_is_replaced_by_next_member(self):
+        # [설명] 패밀리 대표(라이트)를 이미 보유하면 같은 패밀리의 다음 카드(라이트 플러스)가 대신 추천됨
+        UserCard.objects.create(user=self.user, card=self.other)
+        request = APIRequestFactory().get('/api/v1/cards/benefit_analysis/')
+        force_authenticate(request, user=self.user)
+        result = CardBenefitAnalysisView.as_view()(request).data['result']
+        self.assertEqual([c['card_id'] for c in result['recommendations']['cards']], [self.series.card_id])
+
+    def test_mix_recommendation_scores_whole_catalog(self):
+        benefit_engine.get_benefit_matrix()
+        request = APIRequestFactory().get('/api/v1/cards/recommend/', {'mode': 'mix'})
+        force_authenticate(request, user=self.user)
+
+        with self.assertNumQueries(1):
+            response = CardRecommendationView.as_view()(request)
+
+        cards = response.data['recommended_cards']
+        # 월 지출 식비 30000, 카페 20000 → 내 카드: (3000 한도 내 + 1000) × 12 - 10000 = 38000
+        # 식비 특화 카드: 30000 × 20% × 12 = 72000
+        # 같은 패밀리의 '식비 특화카드 라이트 플러스'는 제외
+        self.assertEqual([c['card_id'] for c in cards], [self.other.card_id, self.my_card.card_id])
+        self.assertEqual(cards[0]['net_annual_benefit'], 72000)
+        self.assertEqual(cards[1]['net_annual_benefit'], 38000)
+
+    def test_top_category_recommendation_reads_ranking_index(self):
+        benefit_engine.get_benefit_matrix()
+        request = APIRequestFactory().get('/api/v1/cards/recommend/')
+        force_authenticate(request, user=self.user)
+
+        with self.assertNumQueries(1):
+            response = CardRecommendationView.as_view()(request)
+
+        # 시리즈 카드(식비 특화카드 라이트 플러스)는 제외되고 혜택율 순으로 정렬
+        self.assertEqual([c['card_id'] for c in response.data['recommended_cards']],
+                         [self.other.card_id, self.my_card.card_id])
+
+    def test_simulation_is_served_without_queries(self):
+        benefit_engine.get_benefit_matrix()
+        benefit_engine.get_owned_card_ids(self.user.user_id)  # [설명] 보유 카드 캐시 예열
+        token = AccessToken.for_user(self.user)
+
+        def simulate():
+            request = APIRequestFactory().post('/api/v1/cards/simulate/', {
+                'spending': {'식비': 30000, str(self.cafe.category_id): 20000}
+            }, format='json', HTTP_AUTHORIZATION=f'Bearer {token}')
+            return CardSimulationView.as_view()(request)
+
+        with self.assertNumQueries(0):
+            response = simulate()
+
+        result = response.data['result']
+        # 분석 뷰와 같은 공식 (1개월 기준): min(3000, 5000) + 1000 = 4000 → ROI 48000 / 10000
+        self.assertEqual(result['my_cards'][0]['monthly_benefit_avg'], 4000)
+        self.assertEqual(result['my_cards'][0]['roi_ratio'], 480.0)
+        self.assertEqual(result['best_cards'][0]['card_id'], self.other.card_id)
+
+        # 보유 카드가 바뀌면 캐시가 무효화되어 다음 요청에 반영됨
+        UserCard.objects.create(user=self.user, card=self.other)
+        self.assertEqual(len(simulate().data['result']['my_cards']), 2)
+
+    def test_simulation_rejects_non_finite_amount(self):
+        token = AccessToken.for_user(self.user)
+        for amount in ['nan', 'inf', '-inf', '1e999', -1000]:
+            request = APIRequestFactory().post('/api/v1/cards/simulate/', {'spending': {'식비': amount}}, format='json',
+                                               HTTP_AUTHORIZATION=f'Bearer {token}')
+            response = CardSimulationView.as_view()(request)
+            self.assertEqual(response.status_code, 400, amount)
+            self.assertEqual(response.data['code'], 'INVALID_AMOUNT')
+
+    def test_wallet_combines_cards_per_category(self):
+        request = APIRequestFactory().get('/api/v1/cards/wallet/', {'k': 2, 'include_owned': 'true'})
+        force_authenticate(request, user=self.user)
+        result = CardWalletView.as_view()(request).data['result']
+
+        # 식비는 20% 카드, 카페는 보유 카드(연회비 0원 처리)로 배정: (6000 + 1000) × 12
+        self.assertEqual({c['card_id'] for c in result['cards']}, {self.other.card_id, self.my_card.card_id})
+        self.assertEqual(result['net_annual_benefit'], 84000)
+
+    def test_best_card_reflects_consumed_limit(self):
+        other_card = UserCard.objects.create(user=self.user, card=self.other)
+        token = AccessToken.for_user(self.user)
+
+        def lookup():
+            request = APIRequestFactory().get('/api/v1/cards/best_card/', {'merchant_name': '동네 식당', 'amount': 10000},
+                                              HTTP_AUTHORIZATION=f'Bearer {token}')
+            return BestCardForPaymentView.as_view()(request).data['result']
+
+        result = lookup()
+        self.assertEqual(result['category_name'], '식비')
+        self.assertEqual(result['best_card']['card_id'], self.other.card_id)  # 20% 무제한 카드
+
+        with self.assertNumQueries(0):
+            lookup()
+
+        # 이번 달 식비 한도(5000원)를 다 쓴 내 카드는 혜택 0원, 무제한 카드는 그대로 20%
+        my_user_card = UserCard.objects.get(user=self.user, card=self.my_card)
+        Expense.objects.create(user=self.user, category=self.food, user_card=my_user_card,
+                               amount=50000, merchant_name='식당', spent_at=timezone.now())
+        cards = {c['card_id']: c for c in lookup()['cards']}
+        self.assertEqual(cards[self.my_card.card_id]['remaining_limit'], 0)
+        self.assertEqual(cards[self.my_card.card_id]['expected_benefit'], 0)
+        self.assertEqual(cards[self.other.card_id]['expected_benefit'], 2000)
+
+
+# 카드 조합 최적화 테스트
+import itertools
+import numpy as np
+from django.test import SimpleTestCase
+from cards.wallet import WalletSolver, fill_benefits
+
+
+class WalletSolverTest(SimpleTestCase):
+    def brute_force(self, solver, n, k):
+        best = ((), 0.0)
+        for size in range(1, k + 1):
+            for rows in itertools.combinations(range(n), size):
+                monthly = fill_benefits(solver.rates[[rows]], solver.caps[[rows]], solver.spend)[0]
+                net = monthly * 12 - solver.annual_fee[list(rows)].sum()
+                if net > best[1]:
+                    best = (rows, net)
+        return best
+
+    def test_identical_capped_cards_can_be_combined(self):
+        # [설명] 혜택 구조가 같은 카드 두 장은 한도도 두 배 → 10% 카드 2장(5000 + 5000)이 10% + 1% 조합(5000 + 1500)보다 나음
+        solver = WalletSolver([[1000], [1000], [100]], [[5000], [5000], [np.inf]], [0, 0, 0], [200000])
+        self.assertEqual(solver.solve(2), ((0, 1), 120000.0))
+        self.assertEqual(solver.solve(1)[1], 60000.0)
+
+    def test_matches_brute_force_with_duplicate_cards(self):
+        rng = np.random.default_rng(7)
+        rate_bp = rng.integers(0, 4, size=(6, 3)) * 500
+        limit = rng.choice([3000, 5000, np.inf], size=(6, 3))
+        rate_bp = np.vstack([rate_bp, rate_bp[:3]])  # [설명] 앞 3장과 혜택 구조가 같은 카드
+        limit = np.vstack([limit, limit[:3]])
+        fee = rng.integers(0, 5, size=9) * 5000
+        for _ in range(5):
+            spend = rng.integers(0, 41, size=3) * 10000.0
+            solver = WalletSolver(rate_bp, limit, fee, spend)
+            for k in (1, 2, 3):
+                self.assertAlmostEqual(solver.solve(k)[1], self.brute_force(solver, 9, k)[1])
+
+
+# 혜택 텍스트 추출기 테스트
+from cards.benefit_extractor import build_benefit_matcher, extract_benefits
+
+
+class BenefitExtractorTest(SimpleTestCase):
+    def test_extracts_rate_after_first_keyword(self):
+        matcher = build_benefit_matcher()
+        text = '스타벅스 50% 할인 | 버스/지하철 10% 청구할인 | 편의점 GS25 적립'
+        self.assertEqual(extract_benefits(text, matcher), [
+            ('카페/디저트', 50.0, 10000),
+            ('대중교통', 10.0, 10000),
+            ('편의점', 5.0, 10000),  # [설명] 뒤에 "숫자%"가 없으면 기본 5%
+        ])
+
+
+
+# 카드 패밀리(시리즈) 묶기 테스트
+from cards.families import cluster_cards, normalize_card_name, same_family
+from cards.models import CardFamily
+
+
+class CardFamilyTest(SimpleTestCase):
+    def test_normalize_card_name(self):
+        # [설명] 괄호 내용·카드사명·수식어·공백/기호 제거, 영문 대문자화
+        self.assertEqual(normalize_card_name('신한카드 Deep Dream 체크(미니언즈)', '신한카드'), 'DEEPDREAM')
+        self.assertEqual(normalize_card_name('KB국민 My WE:SH 카드', 'KB국민카드'), 'MYWESH')
+        self.assertEqual(normalize_card_name('삼성카드 taptap O', '삼성카드'), 'TAPTAPO')
+        self.assertEqual(normalize_card_name('[노리] 카드', 'KB국민카드'), '')
+
+    def test_similarity_threshold_edges(self):
+        self.assertTrue(same_family('ABCDEFGHIJ', 'ABCDEFGHXY'))  # [설명] 유사도 정확히 0.8
+        self.assertFalse(same_family('ABCDEFGHI', 'ABCDEFGXY'))  # [설명] 유사도 0.78
+        # [설명] 포함 관계는 짧은 쪽이 MIN_CONTAINED_LENGTH(4)자 이상일 때만 (유사도가 낮아도 묶음)
+        self.assertTrue(same_family('ABCD', 'ABCDEFGHIJ'))
+        self.assertFalse(same_family('ABC', 'ABCDEFGHIJ'))
+        # [설명] 정규화 후 빈 이름은 빈 이름끼리만 같음
+        self.assertTrue(same_family('', ''))
+        self.assertFalse(same_family('A', ''))
+
+    def test_transitive_merge_within_company_only(self):
+        # [설명] GH~GX, GX~YX 는 유사하지만 GH~YX 는 아님 → 같은 카드사 안에서는 한 패밀리로 합쳐짐
+        self.assertFalse(same_family('ABCDEFGH', 'ABCDEFYX'))
+        families = cluster_cards([
+            (3, 'ABCDEFYX 카드', '신한카드'),
+            (1, 'ABCDEFGH', '신한카드'),
+            (2, 'abcdefgx 체크카드', '신한카드'),
+            (4, 'ABCDEFGH', 'KB국민카드'),  # [설명] 이름이 같아도 카드사가 다르면 다른 패밀리
+            (5, 'ZZZZ', '신한카드'),
+        ])
+        self.assertEqual(families, [
+            ('신한카드', [1, 2, 3], 'ABCDEFGH'),
+            ('KB국민카드', [4], 'ABCDEFGH'),
+            ('신한카드', [5], 'ZZZZ'),
+        ])
+
+
+class RebuildCardFamiliesTest(TestCase):
+    def test_assigns_family_ids_to_active_cards(self):
+        lite = Card.objects.create(card_name='식비 특화카드 라이트', company='KB국민카드')
+        plus = Card.objects.create(card_name='식비 특화카드 라이트 플러스', company='KB국민카드')
+        other = Card.objects.create(card_name='식비 특화카드 라이트', company='신한카드')
+        deleted = Card.objects.create(card_name='식비 특화카드 라이트 맥스', company='KB국민카드', deleted_at=timezone.now())
+
+        self.assertEqual(rebuild_card_families(), 2)
+        for card in (lite, plus, other, deleted):
+            card.refresh_from_db()
+        self.assertEqual(lite.family_id, plus.family_id)
+        self.assertNotEqual(lite.family_id, other.family_id)
+        self.assertIsNone(deleted.family_id)
+        self.assertEqual(CardFamily.objects.get(pk=lite.family_id).family_name, '식비 특화카드 라이트')
+
+# 카드 카탈로그 관리 명령 테스트 (update_cards / load_cards / link_categories)
+import csv
+import io
+import tempfile
+from django.core.management import call_command
+from cards.management.commands.load_cards import contentHash
+
+
+def write_csv(rows):
+    # [설명] 헤더 포함 CSV를 임시 파일로 저장하고 경로 반환
+    f = tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8-sig', newline='', delete=False)
+    with f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return f.name
+
+
+class UpdateCardsCommandTest(TestCase):
+    def test_updates_active_cards_and_content_hash(self):
+        values = {'card_name': '여행 카드', 'company': '신한카드', 'annual_fee_domestic': 10000, 'annual_fee_overseas': 12000,
+                  'baseline_requirements_text': '30만원', 'benefit_cap_summary': '항공 5%'}
+        card = Card.objects.create(content_hash=contentHash(values), **values)
+        deleted = Card.objects.create(card_name='단종 카드', company='신한카드', benefit_cap_summary='옛 혜택',
+                                      deleted_at=timezone.now())
+
+        path = write_csv([
+            {'카드명': '여행 카드', '카드사': '신한카드', '이미지URL': 'https://img/1.png', '주요혜택': '항공 7%'},
+            {'카드명': '단종 카드', '카드사': '신한카드', '이미지URL': 'https://img/2.png', '주요혜택': '새 혜택'},
+        ])
+        self.addCleanup(os.remove, path)
+        call_command('update_cards', file=path, stdout=io.StringIO())
+
+        card.refresh_from_db()
+        self.assertEqual((card.card_image_url, card.benefit_cap_summary), ('https://img/1.png', '항공 7%'))
+        self.assertEqual(card.content_hash, contentHash({**values, 'benefit_cap_summary': '항공 7%'}))
+        deleted.refresh_from_db()
+        self.assertEqual(deleted.benefit_cap_summary, '옛 혜택')  # [설명] 소프트 삭제된 카드는 건드리지 않음
+
+
+from pathlib import Path
+from unittest import mock
+from django.test import override_settings
+from cards.models import CategoryCardRanking
+
+LOAD_CARDS_COLUMNS = ['카드명', '카드사', '연회비_국내', '연회비_해외', '전월실적_기준', '주요혜택']
+
+
+class LoadCardsCommandTest(TestCase):
+    def setUp(self):
+        self.food = Category.objects.create(category_name='식비')
+        self.data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.data_dir.cleanup)
+
+    def load(self, rows):
+        # [설명] BASE_DIR/card_gorilla_cleaned.csv 를 임시 디렉터리에 만들고 load_cards 실행, 버전 갱신 호출 여부 반환
+        with open(Path(self.data_dir.name) / 'card_gorilla_cleaned.csv', 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(LOAD_CARDS_COLUMNS)
+            writer.writerows(rows)
+        with override_settings(BASE_DIR=Path(self.data_dir.name)), \
+                mock.patch('cards.management.commands.load_cards.bump_catalog_version') as bump:
+            call_command('load_cards', stdout=io.StringIO())
+        return bump.called
+
+    def test_create_update_unchanged_and_soft_delete(self):
+        self.assertTrue(self.load([
+            ['딥드림', '신한카드', '10,000원', '12,000원', '30만원', '식비 5%'],
+            ['노리', 'KB국민카드', '0', '0', '없음', '카페 10%'],
+        ]))
+        deep = Card.objects.get(card_name='딥드림')
+        self.assertEqual((deep.annual_fee_domestic, deep.benefit_cap_summary), (10000, '식비 5%'))
+        first_hash = deep.content_hash
+
+        # [설명] 같은 CSV를 다시 적재하면 content_hash가 같아 아무것도 쓰지 않고 버전도 그대로
+        self.assertFalse(self.load([
+            ['딥드림', '신한카드', '10,000원', '12,000원', '30만원', '식비 5%'],
+            ['노리', 'KB국민카드', '0', '0', '없음', '카페 10%'],
+        ]))
+
+        # [설명] 값이 바뀐 카드는 갱신, CSV에서 사라진 카드는 소프트 삭제
+        self.assertTrue(self.load([['딥드림', '신한카드', '15,000원', '12,000원', '30만원', '식비 7%']]))
+        deep.refresh_from_db()
+        self.assertEqual((deep.annual_fee_domestic, deep.benefit_cap_summary), (15000, '식비 7%'))
+        self.assertNotEqual(deep.content_hash, first_hash)
+        self.assertIsNotNone(Card.objects.get(card_name='노리').deleted_at)
+
+        # [설명] 다시 나오면 복구
+        self.load([['딥드림', '신한카드', '15,000원', '12,000원', '30만원', '식비 7%'], ['노리', 'KB국민카드', '0', '0', '없음', '카페 10%']])
+        self.assertIsNone(Card.objects.get(card_name='노리').deleted_at)
+
+    def test_rebuilds_finish_before_version_bump(self):
+        card = Card.objects.create(card_name='식비 카드', company='신한카드')
+        CardBenefit.objects.create(card=card, category=self.food, benefit_rate=10)
+
+        seen = []
+
+        def record_catalog():
+            # [설명] 버전이 올라가는 시점의 패밀리·추천 순위 상태 기록 (명령이 예외를 삼키므로 여기서 assert 하지 않음)
+            seen.append((Card.objects.get(card_name='식비 카드').family_id is not None,
+                         CategoryCardRanking.objects.filter(card=card).exists()))
+
+        with mock.patch('cards.management.commands.load_cards.bump_catalog_version', side_effect=record_catalog), \
+                override_settings(BASE_DIR=Path(self.data_dir.name)):
+            with open(Path(self.data_dir.name) / 'card_gorilla_cleaned.csv', 'w', encoding='utf-8-sig', newline='') as f:
+                csv.writer(f).writerows([LOAD_CARDS_COLUMNS, ['식비 카드', '신한카드', '0', '0', '', '식비 10%']])
+            call_command('load_cards', stdout=io.StringIO())
+        self.assertEqual(seen, [(True, True)])
+
+    def test_failed_rebuild_rolls_back_cards(self):
+        with mock.patch('cards.management.commands.load_cards.rebuild_category_rankings', side_effect=RuntimeError('boom')):
+            self.assertFalse(self.load([['딥드림', '신한카드', '0', '0', '', '식비 5%']]))
+        self.assertFalse(Card.objects.filter(card_name='딥드림').exists())
+
+
+class LinkCategoriesCommandTest(TestCase):
+    def setUp(self):
+        self.cafe = Category.objects.create(category_name='카페/디저트')
+        self.card = Card.objects.create(card_name='카페 카드', company='신한카드', benefit_cap_summary='스타벅스 50% 할인')
+        # [설명] 단종(소프트 삭제)됐지만 보유자가 있어 혜택 분석에 쓰이는 카드
+        self.retired = Card.objects.create(card_name='단종 카드', company='신한카드', benefit_cap_summary='스타벅스 30% 할인',
+                                           deleted_at=timezone.now())
+        CardBenefit.objects.create(card=self.retired, category=self.cafe, benefit_rate=30)
+
+    def link(self, **options):
+        with mock.patch('cards.management.commands.link_categories.bump_catalog_version') as bump:
+            call_command('link_categories', stdout=io.StringIO(), **options)
+        return bump.called
+
+    def rates(self, card):
+        return list(CardBenefit.objects.filter(card=card).values_list('benefit_rate', flat=True))
+
+    def test_incremental_skips_unchanged_and_full_keeps_retired_cards(self):
+        self.assertTrue(self.link())
+        self.assertEqual(self.rates(self.card), [50])
+
+        # [설명] 혜택 텍스트가 그대로면(benefit_link_hash 동일) 다시 연결하지 않음 — 수동 수정값이 그대로 남음
+        CardBenefit.objects.filter(card=self.card).update(benefit_rate=45)
+        self.assertFalse(self.link())
+        self.assertEqual(self.rates(self.card), [45])
+
+        # [설명] 텍스트가 바뀐 카드만 다시 연결
+        Card.objects.filter(pk=self.card.pk).update(benefit_cap_summary='스타벅스 40% 할인')
+        self.assertTrue(self.link())
+        self.assertEqual(self.rates(self.card), [40])
+
+        # [설명] --full 은 활성 카드 전체를 다시 연결하되 소프트 삭제된 카드의 혜택은 지우지 않음
+        CardBenefit.objects.filter(card=self.card).update(benefit_rate=45)
+        self.assertTrue(self.link(full=True))
+        self.assertEqual(self.rates(self.card), [40])
+        self.assertEqual(self.rates(self.retired), [30])
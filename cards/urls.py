@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import CardRecommendationView, CardBenefitAnalysisView, CardListView  # [설명] 카드 관련 뷰 import
+from .views import CardRecommendationView, CardBenefitAnalysisView, CardListView, CardSimulationView, CardWalletView, BestCardForPaymentView  # [설명] 카드 관련 뷰 import
 
 app_name = 'cards'  # [설명] URL 네임스페이스 설정
 
@@ -7,4 +7,7 @@ urlpatterns = [
     path('recommend/', CardRecommendationView.as_view(), name='card_recommendation'),  # [설명] 카드 추천 조회 엔드포인트
     path('', CardListView.as_view(), name='card_list'),  # [설명] 내 카드 목록 조회 엔드포인트
     path('benefit_analysis/', CardBenefitAnalysisView.as_view(), name='card_benefit_analysis'),  # [설명] 카드 ROI 분석 조회 엔드포인트 (현재는 card_id 미사용)
+    path('simulate/', CardSimulationView.as_view(), name='card_simulation'),  # [설명] 가상 지출 기반 카드 혜택 시뮬레이션 엔드포인트
+    path('wallet/', CardWalletView.as_view(), name='card_wallet'),  # [설명] 최적 카드 조합 추천 엔드포인트
+    path('best_card/', BestCardForPaymentView.as_view(), name='best_card_for_payment'),  # [설명] 결제 시점 최적 카드 조회 엔드포인트
 ]
\ No newline at end of file
@@ -1,15 +1,20 @@
+import math
+from collections import defaultdict
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.utils import timezone
 from datetime import timedelta
-from .models import CardBenefit  # [설명] 본인 앱(cards)의 모델
 from users.models import UserCard  # [설명] users 앱의 User 모델
-from expense.models import Expense  # [설명] expense 앱의 Expense 모델
+from expense.models import Expense, CardBenefitUsage  # [설명] expense 앱의 Expense 모델 / 카드 혜택 원장
 from django.db.models import Avg, Sum  # [설명] 집계 함수 import
-from .serializers import CardSerializer, RecommendedCardSerializer
+from .serializers import CardSerializer
 from drf_spectacular.utils import extend_schema, OpenApiParameter  # [추가] drf-spectacular 스웨거 설정을 위해 import
-from category.models import Category
+from .benefit_engine import get_benefit_matrix, get_owned_card_ids, get_owned_cards  # [설명] 카드×카테고리 혜택 행렬 엔진
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from .wallet import WalletSolver  # [설명] 카드 조합 최적화
+from expense.benefit_usage import get_monthly_usage, month_key  # [설명] 월별 카드 혜택 사용 현황
+from category.classifier import get_merchant_classifier
 # 사용자가 보유한 모든 카드 조회, 카드 등록, 카드 추천, 카드 혜택 효율 분석 API 구현
 
 # 공통 에러 응답 함수 (중복 제거)
@@ -20,6 +25,17 @@ def error_response(message, code, status_code, reason=None):
         res["reason"] = reason
     return Response(res, status=status_code)
 
+# 카드 ROI 계산 결과 응답 포맷 (분석/시뮬레이션 공통)
+def roi_summary(result):
+    roi = result['roi_ratio']
+    return {
+        "card_id": result['card_id'],
+        "card_name": result['card_name'],
+        "roi_ratio": round(roi, 1),
+        "monthly_benefit_avg": round(result['monthly_benefit_avg']),
+        "comment": "효율이 좋습니다!" if roi > 100 else "무난한 혜택입니다."
+    }
+
 # 카드 목록 조회 뷰
 class CardListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -48,10 +64,22 @@ class CardListView(APIView):
 class CardRecommendationView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @extend_schema(
+        summary="카드 추천 조회",
+        description="최근 3개월 소비 기준 추천 카드를 반환합니다. mode=mix 이면 전체 소비 구성으로 카탈로그 전체 카드를 채점합니다.",
+        parameters=[
+            OpenApiParameter(name='mode', description='추천 방식 (top_category: 최다 소비 카테고리 기준, mix: 전체 소비 구성 기준)', required=False, type=str),
+            OpenApiParameter(name='limit', description='mix 모드 추천 개수 (기본 5, 최대 20)', required=False, type=int),
+        ],
+        tags=["Cards"]
+    )
     def get(self, request):
         user = request.user
         three_months_ago = timezone.now() - timedelta(days=90)
 
+        if request.query_params.get('mode') == 'mix':
+            return self.get_mix_recommendation(request, three_months_ago)
+
         # 1. 최근 3개월간 가장 많이 소비한 카테고리 Top 1 추출
         top_category_data = Expense.objects.filter(
             user=user,
@@ -66,26 +94,47 @@ class CardRecommendationView(APIView):
 
         top_category_id = top_category_data['category']
 
-        # 2. 해당 카테고리 혜택이 높은 순으로 카드 조회 (중복 제거 필수)
-        recommended_benefits = CardBenefit.objects.filter(
-            category_id=top_category_id,
-            deleted_at__isnull=True
-        ).select_related('card').order_by('-benefit_rate')
-
-        # [수정] 동일한 카드가 여러 번 나오지 않도록 중복 제거하며 5개 추출
-        seen_cards = set()
-        unique_cards = []
-        for benefit in recommended_benefits:
-            if benefit.card.card_id not in seen_cards:
-                unique_cards.append(benefit.card)
-                seen_cards.add(benefit.card.card_id)
-            if len(unique_cards) >= 5: break
-
-        serializer = RecommendedCardSerializer(unique_cards, many=True)
+        # 2. 카테고리 추천 순위 인덱스에서 상위 5개 조회 (시리즈는 패밀리당 한 장만)
+        matrix = get_benefit_matrix()
+        recommended_cards = [
+            matrix.card_payload(row)
+            for row, _ in matrix.top_cards_for_category(top_category_id, k=5)
+        ]
+
         return Response({
             "message": "카드 추천 목록 조회 성공",
             "target_category_id": top_category_id,
-            "recommended_cards": serializer.data # 데이터가 잘 담겨 나가는지 확인
+            "recommended_cards": recommended_cards # RecommendedCardSerializer와 같은 필드 구성
+        }, status=200)
+
+    def get_mix_recommendation(self, request, three_months_ago):
+        # [설명] 최근 3개월 카테고리별 지출 전체(월 평균)로 카탈로그 전 카드를 채점 (카드별 쿼리 없음)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 5)), 1), 20)
+        except ValueError:
+            return error_response("추천 실패", "INVALID_LIMIT", 400, "limit은 숫자여야 합니다.")
+
+        category_spending = dict(Expense.objects.filter(
+            user=request.user, spent_at__gte=three_months_ago, deleted_at__isnull=True
+        ).values_list('category').annotate(total_amount=Sum('amount')))
+
+        if not category_spending:
+            return error_response("추천 실패", "NO_DATA", 404, "최근 지출 내역이 없습니다.")
+
+        matrix = get_benefit_matrix()
+        monthly_spending = {category_id: total / 3 for category_id, total in category_spending.items()}
+
+        recommended_cards = []
+        for row, annual_benefit, net_benefit in matrix.top_catalog_cards(monthly_spending, k=limit):
+            card = matrix.card_payload(row)
+            card["expected_annual_benefit"] = round(annual_benefit)
+            card["net_annual_benefit"] = round(net_benefit)  # 연간 혜택 - 국내 연회비
+            recommended_cards.append(card)
+
+        return Response({
+            "message": "카드 추천 목록 조회 성공",
+            "mode": "mix",
+            "recommended_cards": recommended_cards
         }, status=200)
     
 # 카드 혜택 효율 분석 뷰
@@ -99,89 +148,54 @@ class CardBenefitAnalysisView(APIView):
     )
     def get(self, request):
         user = request.user
-        three_months_ago = timezone.now() - timedelta(days=90)
+        # [설명] 최근 3개월 = 이번 달 포함 최근 3개 달력 월 (혜택 원장의 월 단위와 동일)
+        this_month = timezone.localdate().replace(day=1)
+        target_months = [this_month.strftime('%Y-%m')]
+        for _ in range(2):
+            this_month = (this_month - timedelta(days=1)).replace(day=1)
+            target_months.append(this_month.strftime('%Y-%m'))
         
         try:
+            # [설명] 카드·혜택 정보는 메모리 행렬에서 읽고, 요청당 SQL은 보유 카드/혜택 원장 2회만 사용
+            matrix = get_benefit_matrix()
+
             # --- 1. 내 카드 효율(ROI) 분석 로직 ---
-            user_cards = UserCard.objects.filter(user=user).select_related('card')
-            my_cards_analysis = []
-            seen_card_ids = set() # 내 카드 ID 저장용
-
-            for uc in user_cards:
-                card = uc.card
-                seen_card_ids.add(card.card_id) # 추천 리스트에서 제외하기 위해 추가
-                
-                total_benefit = 0
-                benefits = CardBenefit.objects.filter(card=card)
-                
-                for benefit in benefits:
-                    expense_sum = Expense.objects.filter(
-                        user=user, category=benefit.category,
-                        spent_at__gte=three_months_ago, deleted_at__isnull=True
-                    ).aggregate(Sum('amount'))['amount__sum'] or 0
-                    
-                    if expense_sum > 0:
-                        calc = expense_sum * (float(benefit.benefit_rate) / 100)
-                        total_benefit += min(calc, benefit.benefit_limit) if benefit.benefit_limit else calc
-
-                annual_fee = max(card.annual_fee_domestic, 1000)
-                monthly_avg = total_benefit / 3
-                roi = ((monthly_avg * 12) / annual_fee) * 100
-
-                my_cards_analysis.append({
-                    "card_id": card.card_id,
-                    "card_name": card.card_name,
-                    "roi_ratio": round(roi, 1),
-                    "monthly_benefit_avg": round(monthly_avg),
-                    "comment": "효율이 좋습니다!" if roi > 100 else "무난한 혜택입니다."
-                })
+            owned_card_ids = list(UserCard.objects.filter(user=user).values_list('card_id', flat=True))
+            seen_card_ids = set(owned_card_ids) # 추천 리스트에서 제외하기 위해 저장
+
+            # 최근 3개월 혜택 원장 (카드·카테고리별 결제액과 월 한도가 적용된 받은 혜택, 한 번의 GROUP BY 쿼리)
+            category_spending = defaultdict(int)
+            card_benefits = defaultdict(int)
+            for card_id, category_id, spent, benefit in CardBenefitUsage.objects.filter(
+                user=user, target_month__in=target_months
+            ).values_list('user_card__card_id', 'category_id').annotate(
+                spent=Sum('spent_amount'), benefit=Sum('benefit_amount')
+            ):
+                category_spending[category_id] += spent
+                card_benefits[card_id] += benefit
+
+            my_cards_analysis = [roi_summary(result) for result in matrix.ledger_roi(owned_card_ids, card_benefits, months=3)]
             
             my_cards_analysis.sort(key=lambda x: x['roi_ratio'], reverse=True)
 
             # --- 2. 맞춤 카드 추천 로직 ---
-            top_category_data = Expense.objects.filter(
-                user=user, spent_at__gte=three_months_ago, deleted_at__isnull=True
-            ).values('category').annotate(
-                total_amount=Sum('amount')
-            ).order_by('-total_amount').first()
+            # 위에서 구한 카테고리별 지출 중 최대 카테고리 (추가 쿼리 없음)
+            top_category_id = max(category_spending, key=category_spending.get) if category_spending else None
 
             recommended_cards_data = []
             target_category_name = "데이터 부족"
             
-            # [추가] 시리즈 카드(이름 유사 카드) 중복을 막기 위한 집합
-            seen_card_names = set() 
-
-            if top_category_data:
-                target_category_id = top_category_data['category']
-                target_category_name = Category.objects.get(category_id=target_category_id).category_name
-                
-                recommended_benefits = CardBenefit.objects.filter(
-                    category_id=target_category_id, deleted_at__isnull=True
-                ).select_related('card').order_by('-benefit_rate')
-
-                for b in recommended_benefits:
-                    card = b.card
-                    
-                    # A. 이미 내가 가진 카드는 추천에서 제외
-                    if card.card_id in seen_card_ids:
-                        continue
-                    
-                    # B. 이름 중복 체크 로직 (추가된 부분)
-                    # 카드 이름에서 공백을 제거하고 앞 7글자만 따서 비교합니다.
-                    # '신한카드 구독 좋아요'와 'SPOTV NOW 신한카드 구독 좋아요'를 같은 군으로 묶음
-                    card_prefix = card.card_name.replace(" ", "")[:7]
-                    
-                    if card_prefix not in seen_card_names:
-                        recommended_cards_data.append({
-                            "card_id": card.card_id,
-                            "card_name": card.card_name,
-                            "benefit_rate": b.benefit_rate,
-                            "main_category": target_category_name
-                        })
-                        seen_card_names.add(card_prefix) # 사용된 이름으로 등록
-                    
-                    if len(recommended_cards_data) >= 5: 
-                        break
+            if top_category_id is not None:
+                target_category_name = matrix.category_names.get(top_category_id, target_category_name)
+
+                # 카테고리 추천 순위 인덱스에서 내가 가진 카드를 제외한 뒤 시리즈(패밀리)당 한 장씩 5개
+                for row, benefit_rate in matrix.top_cards_for_category(top_category_id, seen_card_ids, k=5):
+                    recommended_cards_data.append({
+                        "card_id": matrix.cards[row]['card_id'],
+                        "card_name": matrix.cards[row]['card_name'],
+                        "benefit_rate": benefit_rate,
+                        "main_category": target_category_name
+                    })
 
             # --- 3. 최종 응답 ---
             return Response({
@@ -196,4 +210,203 @@ class CardBenefitAnalysisView(APIView):
             }, status=200)
 
         except Exception as e:
-            return Response({"message": f"분석 중 에러 발생: {str(e)}"}, status=500)
\ No newline at end of file
+            return Response({"message": f"분석 중 에러 발생: {str(e)}"}, status=500)
+
+
+# 소비 시뮬레이션 뷰 (가상의 월 지출로 보유 카드 ROI 및 추천 카드 계산)
+class CardSimulationView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    # [설명] 토큰 서명만 검증하고 사용자 DB 조회는 하지 않음 (슬라이더 드래그마다 호출되는 경로)
+    authentication_classes = [JWTStatelessUserAuthentication]
+
+    @extend_schema(
+        summary="소비 시뮬레이션",
+        description="가상의 월 지출(카테고리 ID 또는 이름 → 금액)로 보유 카드의 ROI/월 혜택과 카탈로그 추천 카드를 계산합니다. "
+                    "CardBenefitAnalysisView와 같은 공식을 사용하며 메모리의 혜택 행렬만으로 응답합니다.",
+        request={
+            "application/json": {
+                "type": "object",
+                "properties": {
+                    "spending": {"type": "object", "example": {"식비": 400000, "2": 80000}},
+                    "limit": {"type": "integer", "example": 5},
+                },
+                "required": ["spending"],
+            }
+        },
+        tags=["Cards"]
+    )
+    def post(self, request):
+        spending = request.data.get('spending')
+        if not isinstance(spending, dict) or not spending:
+            return error_response("시뮬레이션 실패", "INVALID_SPENDING", 400, "spending은 카테고리별 금액 객체여야 합니다.")
+
+        try:
+            limit = min(max(int(request.data.get('limit', 5)), 1), 20)
+        except (TypeError, ValueError):
+            return error_response("시뮬레이션 실패", "INVALID_LIMIT", 400, "limit은 숫자여야 합니다.")
+
+        matrix = get_benefit_matrix()
+
+        # 1. 카테고리 키(ID 또는 이름) → category_id 로 변환
+        monthly_spending = {}
+        for key, amount in spending.items():
+            category_id = matrix.category_ids_by_name.get(key)
+            if category_id is None and str(key).isdigit():
+                category_id = int(key)
+            if category_id not in matrix.category_index:
+                return error_response("시뮬레이션 실패", "UNKNOWN_CATEGORY", 400, f"알 수 없는 카테고리입니다: {key}")
+            try:
+                amount = float(amount)
+            except (TypeError, ValueError):
+                amount = -1
+            if not math.isfinite(amount) or amount < 0:  # [설명] 'nan'·'inf'도 float()로는 통과하므로 함께 거름
+                return error_response("시뮬레이션 실패", "INVALID_AMOUNT", 400, f"금액이 올바르지 않습니다: {key}")
+            monthly_spending[category_id] = amount
+
+        # 2. 보유 카드 ROI (월 지출 그대로 1개월 기준으로 계산)
+        owned_card_ids = get_owned_card_ids(int(request.user.id))
+        my_cards = [roi_summary(result) for result in matrix.card_roi(owned_card_ids, monthly_spending, months=1)]
+        my_cards.sort(key=lambda x: x['roi_ratio'], reverse=True)
+
+        # 3. 카탈로그 추천 카드 (연간 순혜택 기준 상위 limit개)
+        best_cards = []
+        for row, annual_benefit, net_benefit in matrix.top_catalog_cards(monthly_spending, k=limit):
+            card = matrix.card_payload(row)
+            card["monthly_benefit"] = round(annual_benefit / 12)
+            card["net_annual_benefit"] = round(net_benefit)
+            best_cards.append(card)
+
+        return Response({
+            "message": "소비 시뮬레이션 성공",
+            "result": {
+                "my_cards": my_cards,
+                "best_cards": best_cards
+            }
+        }, status=200)
+
+
+# 카드 조합(지갑) 최적화 뷰
+class CardWalletView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="최적 카드 조합 추천",
+        description="최근 3개월 소비(월 평균)를 기준으로 함께 쓸 때 연간 순혜택(혜택 - 연회비)이 가장 큰 k장 이하 카드 조합을 찾습니다. "
+                    "카테고리별 지출은 조합 안에서 혜택율이 높은 카드부터 혜택 한도까지 배정합니다.",
+        parameters=[
+            OpenApiParameter(name='k', description='조합 카드 수 (1~3, 기본 2)', required=False, type=int),
+            OpenApiParameter(name='include_owned', description='보유 카드를 후보에 포함 (보유 카드 연회비는 이미 낸 것으로 보고 0원 처리)', required=False, type=bool),
+        ],
+        tags=["Cards"]
+    )
+    def get(self, request):
+        try:
+            k = int(request.query_params.get('k', 2))
+        except ValueError:
+            k = 0
+        if not 1 <= k <= 3:
+            return error_response("조합 추천 실패", "INVALID_K", 400, "k는 1~3 사이여야 합니다.")
+        include_owned = request.query_params.get('include_owned', 'false').lower() in ('true', '1')
+
+        three_months_ago = timezone.now() - timedelta(days=90)
+        category_spending = dict(Expense.objects.filter(
+            user=request.user, spent_at__gte=three_months_ago, deleted_at__isnull=True
+        ).values_list('category').annotate(total_amount=Sum('amount')))
+        if not category_spending:
+            return error_response("조합 추천 실패", "NO_DATA", 404, "최근 지출 내역이 없습니다.")
+
+        matrix = get_benefit_matrix()
+        spend = matrix.spending_vector({category_id: total / 3 for category_id, total in category_spending.items()})
+
+        # 후보: 활성 카탈로그 카드 (+ 보유 카드, 연회비 0원 처리)
+        annual_fee = matrix.annual_fee.copy()
+        candidates = set(matrix.active_rows.tolist())
+        if include_owned:
+            owned_rows = matrix.rows_for(get_owned_card_ids(request.user.user_id))
+            annual_fee[owned_rows] = 0
+            candidates.update(owned_rows.tolist())
+
+        solver = WalletSolver(matrix.rate_bp, matrix.limit, annual_fee, spend)
+        rows, net_benefit = solver.solve(k, sorted(candidates))
+
+        allocation = [{
+            "category_id": int(matrix.category_ids[col]),
+            "category_name": matrix.category_names[int(matrix.category_ids[col])],
+            "card_id": matrix.cards[row]['card_id'],
+            "monthly_benefit": round(benefit),
+        } for col, row, benefit in solver.allocation(rows)]
+        total_fee = int(annual_fee[list(rows)].sum()) if rows else 0
+
+        return Response({
+            "message": "카드 조합 추천 성공",
+            "result": {
+                "cards": [matrix.card_payload(row) for row in rows],
+                "annual_benefit": round(net_benefit + total_fee),
+                "annual_fee": total_fee,
+                "net_annual_benefit": round(net_benefit),
+                "allocation": allocation
+            }
+        }, status=200)
+
+
+# 결제 시점 최적 카드 조회 뷰
+class BestCardForPaymentView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    # [설명] 결제 직전에 호출되는 경로이므로 토큰만 검증 (사용자 DB 조회 없음)
+    authentication_classes = [JWTStatelessUserAuthentication]
+
+    @extend_schema(
+        summary="결제 시점 최적 카드 조회",
+        description="가맹점명과 결제 금액으로 보유 카드 중 지금 혜택이 가장 큰 카드를 반환합니다. "
+                    "이번 달 이미 사용한 혜택 한도를 반영하며, 지출 기록 시 갱신되는 사용 현황만 읽습니다.",
+        parameters=[
+            OpenApiParameter(name='merchant_name', description='가맹점명', required=True, type=str),
+            OpenApiParameter(name='amount', description='결제 금액', required=True, type=int),
+            OpenApiParameter(name='category_id', description='카테고리 ID (생략 시 가맹점명으로 추정)', required=False, type=int),
+        ],
+        tags=["Cards"]
+    )
+    def get(self, request):
+        merchant_name = request.query_params.get('merchant_name', '')
+        try:
+            amount = int(request.query_params.get('amount', ''))
+        except ValueError:
+            amount = -1
+        if amount < 0:
+            return error_response("카드 조회 실패", "INVALID_AMOUNT", 400, "결제 금액이 올바르지 않습니다.")
+
+        matrix = get_benefit_matrix()
+
+        # 1. 카테고리 결정 (명시값 우선, 없으면 가맹점 분류기로 추정)
+        category_id = request.query_params.get('category_id')
+        if category_id:
+            category_id = int(category_id) if category_id.isdigit() else None
+        else:
+            category_id = get_merchant_classifier().classify(merchant_name)
+        if category_id not in matrix.category_index:
+            return error_response("카드 조회 실패", "UNKNOWN_CATEGORY", 400, "가맹점의 카테고리를 알 수 없습니다.")
+
+        # 2. 보유 카드 × 이번 달 사용 현황으로 카드별 혜택 계산
+        user_id = int(request.user.id)
+        usage = get_monthly_usage(user_id, month_key(timezone.now()))
+        results = matrix.payment_benefits(get_owned_cards(user_id), usage, category_id, amount)
+        if not results:
+            return error_response("카드 조회 실패", "NO_CARD", 404, "등록된 카드가 없습니다.")
+
+        cards = [{
+            **result,
+            "benefit_rate": round(result['benefit_rate'], 2),
+            "expected_benefit": round(result['expected_benefit']),
+            "remaining_limit": None if result['remaining_limit'] is None else round(result['remaining_limit']),
+        } for result in results]
+
+        return Response({
+            "message": "결제 카드 추천 성공",
+            "result": {
+                "merchant_name": merchant_name,
+                "category_id": category_id,
+                "category_name": matrix.category_names[category_id],
+                "best_card": cards[0],
+                "cards": cards
+            }
+        }, status=200)
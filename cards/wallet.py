@@ -0,0 +1,109 @@
+import numpy as np
+
+from .benefit_engine import BASIS_POINTS
+
+# 카드 조합(지갑) 최적화
+# [설명] 카테고리별 지출을 조합 안에서 혜택율이 높은 카드부터 한도까지 채워 배정하고,
+# [설명] (연간 혜택 - 연회비 합)이 최대인 k장 이하 조합을 분기 한정(branch and bound)으로 찾습니다.
+# [설명] 조합 가치는 카드를 추가할수록 증가폭이 줄어드는(submodular) 구조이므로
+# [설명] "현재 조합 기준 한계 이득"을 남은 카드 수만큼 더한 값이 상한이 되어 C(n, k) 전수 탐색 없이 가지치기할 수 있습니다.
+
+
+def fill_benefits(rates, caps, spend):
+    # [설명] rates/caps: (m, t, C) 조합 m개 × 카드 t장 × 카테고리, spend: (C,) 월 지출
+    # [설명] 카테고리마다 혜택율 높은 카드부터 한도(지출 기준)까지 배정했을 때의 월 혜택 합계 (m,)
+    order = np.argsort(-rates, axis=1, kind='stable')
+    rates = np.take_along_axis(rates, order, axis=1)
+    caps = np.take_along_axis(caps, order, axis=1)
+    filled_before = np.concatenate([np.zeros_like(caps[:, :1]), np.cumsum(caps, axis=1)[:, :-1]], axis=1)
+    used = np.clip(spend - filled_before, 0, caps)
+    return (used * rates).sum(axis=(1, 2))
+
+
+class WalletSolver:
+    def __init__(self, rate_bp, limit, annual_fee, spend):
+        # [설명] rate_bp: (n, C) 혜택율(bp), limit: (n, C) 월 혜택 한도(inf=무제한), annual_fee: (n,), spend: (C,) 월 지출
+        self.spend = np.asarray(spend, dtype=np.float64)
+        self.rates = np.asarray(rate_bp, dtype=np.float64) / BASIS_POINTS
+        # [설명] 혜택 한도를 "한도까지 채우는 데 필요한 지출"로 변환 (혜택율 0이면 무제한)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.caps = np.where(self.rates > 0, np.asarray(limit, dtype=np.float64) / self.rates, np.inf)
+        self.annual_fee = np.asarray(annual_fee, dtype=np.float64)
+        self.nodes = 0  # [설명] 평가한 조합 수 (벤치마크용)
+
+    def monthly_values(self, base, candidates):
+        # [설명] base 조합에 후보 카드를 각각 하나씩 추가했을 때의 월 혜택 (후보 수,)
+        rows = np.column_stack([np.repeat([base], len(candidates), axis=0), candidates]) if base else \
+            np.asarray(candidates)[:, np.newaxis]
+        self.nodes += len(candidates)
+        return fill_benefits(self.rates[rows], self.caps[rows], self.spend)
+
+    def solve(self, k, candidates=None):
+        # [설명] 연간 순혜택이 최대인 k장 이하 조합 → (행 번호 튜플, 연간 순혜택)
+        if candidates is None:
+            candidates = np.arange(len(self.rates))
+        candidates = np.asarray(candidates, dtype=np.int64)
+        if len(candidates) == 0 or k <= 0:
+            return (), 0.0
+
+        # 1. 단독 가치로 후보 정리: 단독으로도 연회비를 못 넘는 카드는 어떤 조합에서도 이득이 될 수 없음
+        single = self.monthly_values((), candidates) * 12 - self.annual_fee[candidates]
+        keep = single > 0
+        candidates, single = candidates[keep], single[keep]
+
+        # 2. 혜택 구조(혜택율·한도)가 같은 카드는 연회비가 낮은 순으로 k장까지만 남김
+        # [설명] 한도가 카드마다 따로 있으므로 같은 카드 두 장(예: VISA/Master 버전)이 다른 카드 조합보다 나을 수 있음
+        order = np.lexsort((self.annual_fee[candidates], -single))
+        candidates, single = candidates[order], single[order]
+        copies = {}
+        unique = []
+        for i, row in enumerate(candidates.tolist()):
+            key = (self.rates[row].tobytes(), self.caps[row].tobytes())
+            if copies.get(key, 0) < k:
+                copies[key] = copies.get(key, 0) + 1
+                unique.append(i)
+        candidates, single = candidates[unique], single[unique]
+
+        self.best = ((), 0.0)
+        self._search((), 0.0, 0.0, candidates, single, k)
+        rows, net = self.best
+        return tuple(int(r) for r in rows), float(net)
+
+    def _search(self, chosen, monthly, fees, candidates, gains, slots):
+        # [설명] chosen: 현재 조합, candidates/gains: 현재 조합 기준 한계 이득(연간 순) 내림차순 후보
+        net = monthly * 12 - fees
+        for i in range(len(candidates)):
+            # [설명] 상한 = 현재 순혜택 + 남은 후보 중 상위 slots개 한계 이득 (정렬되어 있으므로 i부터 연속 구간)
+            bound = net + gains[i:i + slots].clip(min=0).sum()
+            if bound <= self.best[1]:
+                return
+            row = int(candidates[i])
+            new_chosen = chosen + (row,)
+            new_fees = fees + self.annual_fee[row]
+            new_monthly = monthly + (gains[i] + self.annual_fee[row]) / 12
+            new_net = new_monthly * 12 - new_fees
+            if new_net > self.best[1]:
+                self.best = (new_chosen, new_net)
+
+            rest = candidates[i + 1:]
+            if slots == 1 or len(rest) == 0:
+                continue
+            # [설명] 새 조합 기준으로 남은 후보의 한계 이득을 한 번에 계산하고, 이득이 있는 후보만 내림차순 정렬
+            rest_gains = (self.monthly_values(new_chosen, rest) - new_monthly) * 12 - self.annual_fee[rest]
+            positive = rest_gains > 0
+            rest, rest_gains = rest[positive], rest_gains[positive]
+            order = np.argsort(-rest_gains, kind='stable')
+            self._search(new_chosen, new_monthly, new_fees, rest[order], rest_gains[order], slots - 1)
+
+    def allocation(self, rows):
+        # [설명] 조합 내 카테고리별 배정 결과 [(카테고리 열, 카드 행, 월 혜택)] (혜택이 생기는 배정만)
+        result = []
+        for col, spend in enumerate(self.spend.tolist()):
+            remaining = spend
+            for row in sorted(rows, key=lambda r: -self.rates[r, col]):
+                if remaining <= 0 or self.rates[row, col] <= 0:
+                    break
+                used = min(remaining, self.caps[row, col])
+                result.append((col, row, used * self.rates[row, col]))
+                remaining -= used
+        return result
@@ -0,0 +1,113 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from .keywords import CATEGORY_KEYWORDS
+from .matcher import KeywordMatcher
+from .models import Category, MerchantCategory
+
+# 가맹점명 → 카테고리 분류기
+# [설명] 정규화한 가맹점명으로 (1) 프로세스 내 LRU 캐시 (2) 가맹점 매핑 테이블(MerchantCategory) (3) 키워드 오토마톤 순서로 찾습니다.
+# [설명] 여러 가맹점을 한 번에 분류(classify_many)하면 캐시에 없는 이름만 모아 테이블을 청크 단위로 조회합니다.
+# [설명] 지출 가져오기·카드 승인 동기화·결제 카드 추천 등 가맹점명으로 카테고리를 정하는 모든 경로가 사용합니다.
+
+CACHE_SIZE = 100000  # [설명] LRU 캐시에 보관하는 가맹점 수
+CACHE_TIMEOUT = 300  # [설명] 다른 워커에서 바뀐 매핑도 최대 5분 안에는 반영되도록 캐시 전체를 비움
+LOOKUP_CHUNK_SIZE = 1000  # [설명] 매핑 테이블 IN 조회 청크 크기
+
+_CORPORATE_MARKS = re.compile(r'\(주\)|㈜|주식회사|\(유\)|유한회사')
+_NON_WORD = re.compile(r'[^0-9A-Z가-힣]+')
+
+
+def normalize_merchant(name):
+    # [설명] 전각/반각 통일(NFKC) → 대문자 → 법인 표기 제거 → 공백·기호 제거 (예: '(주) 스타벅스 강남점' → '스타벅스강남점')
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKC', name).upper()
+    return _NON_WORD.sub('', _CORPORATE_MARKS.sub('', text))[:100]
+
+
+def build_merchant_matcher(category_map=CATEGORY_KEYWORDS):
+    # [설명] 키워드도 같은 방식으로 정규화해 등록, 값은 카테고리 우선순위 (사전 순서가 앞설수록 우선)
+    patterns = []
+    for order, (category_name, keywords) in enumerate(category_map.items()):
+        patterns.extend((normalize_merchant(keyword), (order, category_name)) for keyword in keywords)
+    return KeywordMatcher(patterns, ignore_case=True)
+
+
+class MerchantClassifier:
+    def __init__(self, cache_size=CACHE_SIZE, cache_timeout=CACHE_TIMEOUT):
+        self.matcher = build_merchant_matcher()
+        self.cache_size = cache_size
+        self.cache_timeout = cache_timeout
+        self._cache = OrderedDict()  # [설명] 정규화한 가맹점명 → category_id (없으면 None)
+        self._category_ids = None  # [설명] 카테고리명 → category_id
+        self._loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _keyword_category_id(self, key):
+        best = None
+        for _, _, value in self.matcher.finditer(key):
+            if best is None or value < best:
+                best = value
+        return self._category_ids.get(best[1]) if best else None
+
+    def _remember(self, key, category_id):
+        self._cache[key] = category_id
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def classify_many(self, merchant_names):
+        # [설명] 가맹점명 목록 → 같은 순서의 category_id 목록 (알 수 없으면 None)
+        keys = [normalize_merchant(name) for name in merchant_names]
+        with self._lock:
+            if self._category_ids is None or time.monotonic() - self._loaded_at > self.cache_timeout:
+                self._cache.clear()
+                self._category_ids = dict(Category.objects.filter(deleted_at__isnull=True)
+                                          .values_list('category_name', 'category_id'))
+                self._loaded_at = time.monotonic()
+
+            found = {}
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+            missing = list(dict.fromkeys(key for key in keys if key and key not in found))
+            for i in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+                found.update(MerchantCategory.objects.filter(
+                    merchant_key__in=missing[i:i + LOOKUP_CHUNK_SIZE]
+                ).values_list('merchant_key', 'category_id'))
+            for key in missing:
+                if key not in found:
+                    found[key] = self._keyword_category_id(key)
+                self._remember(key, found[key])
+        return [found.get(key) for key in keys]
+
+    def classify(self, merchant_name):
+        return self.classify_many([merchant_name])[0]
+
+    def assign(self, merchant_name, category_id, source='MANUAL'):
+        # [설명] 가맹점 매핑 저장 (이 프로세스 캐시는 바로 반영, 다른 워커는 CACHE_TIMEOUT 안에 반영)
+        key = normalize_merchant(merchant_name)
+        if not key:
+            return None
+        MerchantCategory.objects.update_or_create(
+            merchant_key=key, defaults={'category_id': category_id, 'source': source})
+        with self._lock:
+            self._remember(key, category_id)
+        return key
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_merchant_classifier():
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = MerchantClassifier()
+    return _classifier
@@ -0,0 +1,19 @@
+# 카테고리 키워드 사전
+# [설명] 카드 혜택 텍스트(link_categories)와 가맹점명 분류(category.classifier)에서 공통으로 사용하는 카테고리별 키워드
+CATEGORY_KEYWORDS = {
+    '식비': ['식음료', '식당', '푸드', '베이커리', '외식', '음식점'],
+    '카페/디저트': ['카페', '커피', '스타벅스', '디저트', '제과'],
+    '대중교통': ['대중교통', '버스', '지하철', '택시', '철도'],
+    '편의점': ['편의점', 'GS25', 'CU', '세븐일레븐', '생활 편의'], # '생활 편의' 추가
+    '온라인쇼핑': ['온라인 쇼핑', '온라인쇼핑', '쿠팡', '11번가', 'G마켓', '쇼핑'],
+    '대형마트': ['마트', '이마트', '홈플러스', '롯데마트'],
+    '주유/차량': ['주유', '충전', '주차', '정비', 'LPG'],
+    '통신/공과금': ['통신', '공과금', '핸드폰', '전기', '수도'],
+    '디지털구독': ['디지털콘텐츠', '멤버십', '넷플릭스', '유튜브', '구독', 'OTT'], # '디지털콘텐츠' 추가
+    '문화/여가': ['영화', '테마파크', '놀이공원', '공연', '스포츠'],
+    '의료/건강': ['병원', '약국', '건강검진'],
+    '교육': ['학원', '교육', '도서', '서점'],
+    '뷰티/잡화': ['뷰티', '화장품', '올리브영'],
+    '여행/숙박': ['여행', '항공', '숙박', '호텔', '면세점'],
+}
+
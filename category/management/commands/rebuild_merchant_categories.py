@@ -0,0 +1,57 @@
+from collections import Counter, defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from category.classifier import normalize_merchant
+from category.models import MerchantCategory
+from expense.models import Expense
+
+
+class Command(BaseCommand):
+    help = '지출 내역에서 가맹점별로 가장 많이 쓰인 카테고리를 가맹점 매핑 테이블에 학습합니다. (수동 지정 매핑은 유지)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-count', type=int, default=3, help='학습에 필요한 가맹점 최소 지출 건수')
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create / bulk_update 배치 크기')
+
+    def handle(self, *args, **options):
+        min_count = options['min_count']
+        batch_size = options['batch_size']
+
+        # [설명] (가맹점명, 카테고리)별 건수는 DB에서 집계하고, 정규화한 가맹점명 기준으로 합침
+        counts = defaultdict(Counter)
+        for merchant_name, category_id, count in Expense.objects.filter(deleted_at__isnull=True).values_list(
+            'merchant_name', 'category_id'
+        ).annotate(count=Count('expense_id')).order_by().iterator(chunk_size=5000):
+            key = normalize_merchant(merchant_name)
+            if key:
+                counts[key][category_id] += count
+
+        learned = {}
+        for key, by_category in counts.items():
+            if sum(by_category.values()) >= min_count:
+                learned[key] = by_category.most_common(1)[0][0]
+
+        keys = list(learned)
+        existing = {}
+        for i in range(0, len(keys), batch_size):
+            existing.update((m.merchant_key, m) for m in MerchantCategory.objects.filter(merchant_key__in=keys[i:i + batch_size]))
+        to_create, to_update = [], []
+        now = timezone.now()
+        for key, category_id in learned.items():
+            mapping = existing.get(key)
+            if mapping is None:
+                to_create.append(MerchantCategory(merchant_key=key, category_id=category_id))
+            elif mapping.source == 'LEARNED' and mapping.category_id != category_id:
+                mapping.category_id = category_id
+                mapping.updated_at = now
+                to_update.append(mapping)
+
+        with transaction.atomic():
+            MerchantCategory.objects.bulk_create(to_create, batch_size=batch_size)
+            MerchantCategory.objects.bulk_update(to_update, ['category_id', 'updated_at'], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ 가맹점 매핑 학습 완료: 가맹점 {len(counts)}곳 중 {len(learned)}곳 / 추가 {len(to_create)}건, 변경 {len(to_update)}건'
+        ))
@@ -0,0 +1,54 @@
+from collections import deque
+
+# 다중 키워드 매처 (Aho-Corasick 오토마톤)
+# [설명] 키워드 수와 관계없이 텍스트를 한 번만 훑어 모든 키워드 출현 위치를 찾습니다.
+# [설명] link_categories(카드 혜택 텍스트)와 가맹점명 분류에서 카테고리 키워드 검색에 사용합니다.
+
+
+class KeywordMatcher:
+    def __init__(self, patterns, ignore_case=False):
+        # [설명] patterns: [(키워드, 값)] — 값은 매칭 시 그대로 돌려줄 데이터 (예: (카테고리명, 키워드 여부))
+        self.ignore_case = ignore_case
+        self.goto = [{}]  # [설명] 상태별 전이 (문자 → 다음 상태)
+        self.fail = [0]  # [설명] 실패 링크
+        self.output = [[]]  # [설명] 상태에서 끝나는 (키워드 길이, 값) 목록
+
+        for keyword, value in patterns:
+            if not keyword:
+                continue
+            state = 0
+            for ch in self._fold(keyword):
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = nxt
+            self.output[state].append((len(keyword), value))
+
+        # [설명] BFS 로 실패 링크 계산, 실패 상태의 출력도 합쳐둠
+        queue = deque(self.goto[0].values())  # [설명] 깊이 1 상태의 실패 링크는 루트(0)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def _fold(self, text):
+        return text.upper() if self.ignore_case else text
+
+    def finditer(self, text):
+        # [설명] (시작 위치, 끝 위치, 값)을 끝 위치 순서로 반환
+        state = 0
+        for i, ch in enumerate(self._fold(text or '')):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length, value in self.output[state]:
+                yield i + 1 - length, i + 1, value
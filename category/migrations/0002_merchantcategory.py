@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 02:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchantCategory',
+            fields=[
+                ('mapping_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('merchant_key', models.CharField(max_length=100, unique=True)),
+                ('source', models.CharField(choices=[('LEARNED', '지출 내역 학습'), ('MANUAL', '수동 지정')], default='LEARNED', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(db_column='category_id', on_delete=django.db.models.deletion.CASCADE, to='category.category')),
+            ],
+            options={
+                'db_table': 'merchant_categories',
+            },
+        ),
+    ]
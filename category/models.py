@@ -16,3 +16,25 @@ class Category(models.Model):
     def __str__(self):
         # [설명] admin 등에서 표시될 문자열 포맷
         return f'Category({self.category_id}, {self.category_name})'
+
+
+# 가맹점 → 카테고리 매핑
+class MerchantCategory(models.Model):
+    # [설명] 정규화한 가맹점명별 카테고리 (category.classifier가 키워드 매칭보다 먼저 사용)
+    mapping_id = models.BigAutoField(primary_key=True)  # [설명] PK
+    merchant_key = models.CharField(max_length=100, unique=True)  # [설명] 정규화한 가맹점명 (classifier.normalize_merchant)
+    category = models.ForeignKey('Category', on_delete=models.CASCADE, db_column='category_id')  # [설명] 분류 카테고리
+    source = models.CharField(  # [설명] 매핑 출처 (학습 결과는 재계산 시 덮어쓰고, 수동 지정은 유지)
+        max_length=10,
+        choices=[('LEARNED', '지출 내역 학습'), ('MANUAL', '수동 지정')],
+        default='LEARNED',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)  # [설명] 생성 시각
+    updated_at = models.DateTimeField(auto_now=True)  # [설명] 수정 시각
+
+    class Meta:
+        db_table = 'merchant_categories'  # [설명] 실제 DB 테이블명
+
+    def __str__(self):
+        # [설명] admin 등에서 표시될 문자열 포맷
+        return f'MerchantCategory({self.merchant_key}, {self.category_id})'
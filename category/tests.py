@@ -1,3 +1,56 @@
 from django.test import TestCase
 
 # Create your tests here.
+from django.core.management import call_command
+from django.utils import timezone
+from category import classifier
+from category.classifier import MerchantClassifier, normalize_merchant
+from category.models import Category, MerchantCategory
+from cards.models import Card
+from expense.models import Expense
+from users.models import User, UserCard
+
+
+class MerchantClassifierTest(TestCase):
+    def setUp(self):
+        classifier._classifier = None
+        self.food = Category.objects.create(category_name='식비')
+        self.cafe = Category.objects.create(category_name='카페/디저트')
+        self.store = Category.objects.create(category_name='편의점')
+
+    def test_normalize_and_keyword_fallback(self):
+        self.assertEqual(normalize_merchant('(주) 스타벅스  강남점'), '스타벅스강남점')
+        self.assertEqual(normalize_merchant('ｇｓ２５ 역삼점'), 'GS25역삼점')
+
+        c = MerchantClassifier()
+        # [설명] 키워드 사전 순서가 앞선 카테고리 우선 ('식당' + '카페' → 식비), 대소문자/전각 무시, 모르면 None
+        self.assertEqual(c.classify_many(['카페 식당', '스타벅스 강남점', 'ｇｓ２５ 역삼점', '알 수 없는 상점', '']),
+                         [self.food.category_id, self.cafe.category_id, self.store.category_id, None, None])
+
+    def test_mapping_table_overrides_keywords_and_cache_is_bounded(self):
+        MerchantCategory.objects.create(merchant_key=normalize_merchant('커피 식당'), category=self.cafe)
+        c = MerchantClassifier(cache_size=2)
+        self.assertEqual(c.classify('커피  식당'), self.cafe.category_id)
+
+        c.assign('동네 가게', self.store.category_id)
+        self.assertEqual(MerchantCategory.objects.get(merchant_key='동네가게').source, 'MANUAL')
+        self.assertEqual(c.classify('동네 가게'), self.store.category_id)
+
+        c.classify_many(['a', 'b', 'c'])
+        self.assertEqual(len(c._cache), 2)
+
+        with self.assertNumQueries(0):  # [설명] 캐시에 있는 가맹점은 DB 조회 없음
+            c.classify_many(['b', 'c'] * 1000)
+
+    def test_rebuild_learns_majority_category_and_keeps_manual(self):
+        user = User.objects.create(email='m@example.com', name='학습', password='pw')
+        user_card = UserCard.objects.create(user=user, card=Card.objects.create(card_name='카드', company='신한카드'))
+        MerchantCategory.objects.create(merchant_key='수동가게', category=self.food, source='MANUAL')
+        rows = [('골목 상점', self.store)] * 2 + [('골목상점', self.cafe)] + [('수동 가게', self.cafe)] * 3
+        for merchant_name, category in rows:
+            Expense.objects.create(user=user, user_card=user_card, category=category, amount=1000,
+                                   merchant_name=merchant_name, spent_at=timezone.now())
+
+        call_command('rebuild_merchant_categories', min_count=3, stdout=open('/dev/null', 'w'))
+        mappings = dict(MerchantCategory.objects.values_list('merchant_key', 'category_id'))
+        self.assertEqual(mappings, {'골목상점': self.store.category_id, '수동가게': self.food.category_id})
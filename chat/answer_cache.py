@@ -0,0 +1,103 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from expense.models import ExpenseDailyRollup
+
+# 챗봇 답변 캐시 (정규화한 질문 기준)
+# [설명] '연회비 없는 카드', '연회비없는 카드?'처럼 표기만 다른 반복 질문은 답변 생성기를 거치지 않고 메모리에서 바로 답합니다.
+# [설명] 키 = (카탈로그 버전, 정규화한 질문[, 사용자 소비 구간]) — 사용자 소비 구간은 소비 패턴을 답변에 쓰는 생성기(personalized)일 때만 포함합니다.
+# [설명] load_cards / link_categories 등으로 카탈로그 버전이 바뀌면 이전 버전 답변은 모두 비웁니다. (키에도 버전이 있어 다른 워커도 즉시 무효)
+# [설명] 워커(프로세스)마다 LRU + TTL로 관리하며, 적중/실패 등 지표는 stats()로 확인합니다.
+
+SPENDING_LOOKBACK_DAYS = 90  # [설명] 소비 구간 계산에 사용하는 기간
+SPENDING_BANDS = (300000, 1000000, 2000000)  # [설명] 월 평균 지출 구간 경계
+SPENDING_TOP_CATEGORIES = 2  # [설명] 소비 구간에 포함하는 상위 카테고리 수
+SPENDING_BUCKET_CACHE_TIMEOUT = 3600
+
+_NON_WORD = re.compile(r'[^0-9a-z가-힣]+')
+
+
+def normalize_question(question):
+    # [설명] NFKC → 소문자 → 공백·기호 제거 (예: '연회비 없는 카드?' → '연회비없는카드')
+    return _NON_WORD.sub('', unicodedata.normalize('NFKC', question or '').lower())
+
+
+def spending_bucket(user_id):
+    # [설명] 최근 지출의 (월 평균 지출 구간, 상위 카테고리) → 'b1:c3-7' 형태 (지출이 없으면 'none'), 일별 큐브 조회 1회
+    key = f'chat:spending_bucket:{user_id}'
+    bucket = cache.get(key)
+    if bucket is None:
+        since = timezone.localdate() - timedelta(days=SPENDING_LOOKBACK_DAYS)
+        totals = dict(ExpenseDailyRollup.objects.filter(user_id=user_id, day__gte=since).values_list('category_id')
+                      .annotate(total=Sum('amount')).order_by())
+        monthly = sum(totals.values()) * 30 / SPENDING_LOOKBACK_DAYS
+        if monthly <= 0:
+            bucket = 'none'
+        else:
+            band = sum(monthly >= edge for edge in SPENDING_BANDS)
+            top = sorted(sorted(totals, key=totals.get, reverse=True)[:SPENDING_TOP_CATEGORIES])
+            bucket = f"b{band}:c{'-'.join(map(str, top))}"
+        cache.set(key, bucket, SPENDING_BUCKET_CACHE_TIMEOUT)
+    return bucket
+
+
+class AnswerCache:
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size or settings.CHAT_ANSWER_CACHE_SIZE
+        self.ttl = ttl or settings.CHAT_ANSWER_CACHE_TTL
+        self.version = None  # [설명] 현재 담고 있는 답변의 카탈로그 버전
+        self._entries = OrderedDict()  # [설명] 키 → (만료 시각, 값)
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(('hits', 'misses', 'evictions', 'expirations', 'invalidations'), 0)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {**self._counters, 'size': len(self._entries),
+                    'hit_rate': round(self._counters['hits'] / lookups, 4) if lookups else 0.0}
+
+    def check_version(self, version):
+        # [설명] 카탈로그 버전이 바뀌었으면 전부 비움
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    if self._entries:
+                        self._counters['invalidations'] += 1
+                    self._entries.clear()
+                    self.version = version
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self._counters['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
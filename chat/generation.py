@@ -0,0 +1,129 @@
+import asyncio
+import re
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from cards.catalog import get_catalog_version
+
+from .answer_cache import AnswerCache, normalize_question, spending_bucket
+from .retrieval import search_cards
+
+# 챗봇 답변 생성기 (교체 가능한 비동기 인터페이스)
+# [설명] 생성기는 질문 하나에 대해 이벤트를 만들어지는 즉시 하나씩 내보내는 비동기 제너레이터입니다.
+# [설명]   {'event': 'cards', 'cards': [...]} — 추천 카드 정보 (ChatCardResponseSerializer 형태)
+# [설명]   {'event': 'token', 'text': '...'} — 답변 텍스트 조각 (이어 붙이면 전체 답변)
+# [설명] 사용할 생성기는 settings.CHAT_ANSWER_GENERATOR(클래스 경로)로 지정합니다. (LLM 연동 시 이 클래스만 교체)
+# [설명] SSE 스트리밍 뷰는 이벤트를 그대로 흘려보내고, 일반 send_message 뷰는 collect_answer로 모아서 응답합니다.
+# [설명] CHAT_ANSWER_CACHE_SIZE > 0이면 생성기 앞에 답변 캐시(CachedAnswerGenerator)를 둡니다.
+
+_TOKEN = re.compile(r'\S+\s*')
+CATALOG_VERSION_TTL = 1.0  # [설명] 답변 캐시가 카탈로그 버전 파일을 다시 읽는 간격 (초)
+
+
+def split_tokens(text):
+    # [설명] 공백을 앞 단어에 붙여 나눔 (이어 붙이면 원문 그대로)
+    return _TOKEN.findall(text)
+
+
+class AnswerGenerator:
+    personalized = False  # [설명] 사용자 소비 패턴을 답변에 쓰는 생성기면 True (답변 캐시 키에 소비 구간 포함)
+
+    async def stream(self, question, user_id):
+        # [설명] 이벤트 dict를 차례로 yield 하는 비동기 제너레이터로 구현
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+
+class RetrievalAnswerGenerator(AnswerGenerator):
+    # [설명] 기본 생성기 — 카드 혜택 색인(chat.retrieval)에서 찾은 카드를 먼저 보내고 안내 문장을 이어서 보냄
+    async def stream(self, question, user_id):
+        # [설명] 메모리 색인 검색 (수 ms, DB 조회 없음) — 버전이 바뀐 첫 요청은 색인을 DB에서 다시 만들 수 있어 스레드에서 실행
+        cards = await sync_to_async(search_cards)(question)
+        yield {'event': 'cards', 'cards': cards}
+        if cards:
+            names = ', '.join(f"'{card['card_name']}'" for card in cards)
+            answer = f'질문하신 혜택에 맞는 추천 카드는 {names} 입니다.'
+        else:
+            answer = '질문과 관련된 카드를 찾지 못했습니다.'
+        for token in split_tokens(answer):
+            yield {'event': 'token', 'text': token}
+
+
+class StubAnswerGenerator(AnswerGenerator):
+    # [설명] 테스트/로컬 개발용 결정적 생성기 — 질문을 그대로 되돌려주고, 토큰 사이에 delay초씩 쉼
+    delay = 0
+
+    async def stream(self, question, user_id):
+        yield {'event': 'cards', 'cards': []}
+        for token in split_tokens(f'[stub] {question}'):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield {'event': 'token', 'text': token}
+
+
+class CachedAnswerGenerator(AnswerGenerator):
+    # [설명] 캐시에 있으면 저장해둔 이벤트를 바로 다시 보내고, 없으면 원래 생성기 이벤트를 그대로 보내면서 끝까지 생성된 답변만 저장
+    def __init__(self, generator, cache=None, version_ttl=CATALOG_VERSION_TTL):
+        self.generator = generator
+        self.cache = cache or AnswerCache()
+        self.personalized = generator.personalized
+        self.version_ttl = version_ttl
+        self._version = None
+        self._version_expires = 0.0
+
+    async def catalog_version(self):
+        # [설명] 버전 파일은 version_ttl초마다 한 번만 스레드에서 읽음 — 캐시 적중 요청은 이벤트 루프에서 파일 I/O 없이 처리
+        # [설명] (카탈로그가 바뀐 뒤 최대 version_ttl초 동안은 이전 버전 답변이 나갈 수 있음)
+        now = time.monotonic()
+        if self._version is None or now >= self._version_expires:
+            self._version = await sync_to_async(get_catalog_version)()
+            self._version_expires = now + self.version_ttl
+        return self._version
+
+    async def cache_key(self, question, user_id):
+        version = await self.catalog_version()
+        self.cache.check_version(version)
+        bucket = await sync_to_async(spending_bucket)(user_id) if self.personalized else None
+        return version, normalize_question(question), bucket
+
+    async def stream(self, question, user_id):
+        key = await self.cache_key(question, user_id)
+        events = self.cache.get(key)
+        if events is not None:
+            for event in events:
+                yield event
+            return
+        events = []
+        async for event in self.generator.stream(question, user_id):
+            events.append(event)
+            yield event
+        self.cache.set(key, tuple(events))  # [설명] 제한 시간 초과·연결 끊김으로 중간에 멈춘 답변은 저장하지 않음
+
+
+_generators = {}
+
+
+def get_answer_generator():
+    path = settings.CHAT_ANSWER_GENERATOR
+    generator = _generators.get(path)
+    if generator is None:
+        generator = import_string(path)()
+        if settings.CHAT_ANSWER_CACHE_SIZE > 0:
+            generator = CachedAnswerGenerator(generator)
+        _generators[path] = generator
+    return generator
+
+
+async def collect_answer(question, user_id, generator=None):
+    # [설명] 스트리밍하지 않는 경로용 — 이벤트를 모두 받아 (답변 텍스트, 카드 목록) 반환
+    generator = generator or get_answer_generator()
+    tokens, cards = [], []
+    async for event in generator.stream(question, user_id):
+        if event['event'] == 'cards':
+            cards = event['cards']
+        elif event['event'] == 'token':
+            tokens.append(event['text'])
+    return ''.join(tokens), cards
@@ -0,0 +1,146 @@
+import atexit
+import logging
+import threading
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+from .rooms import save_chat_logs
+
+# 채팅 기록 지연 저장(write-behind) 버퍼
+# [설명] send_message 요청은 ChatLog를 메모리 큐에 넣고 바로 응답하며, 백그라운드 스레드가
+# [설명] 큐가 batch_size만큼 쌓이거나 flush_interval초가 지날 때마다 bulk_create로 한 번에 저장합니다. (채팅방 요약도 함께 갱신)
+# [설명] 큐가 가득 차면(max_size) 그 요청은 예전처럼 바로 저장하고, 워커 종료 시(atexit) 남은 기록을 모두 저장합니다.
+# [설명] 저장 시각(created_at)은 큐에 넣은 시각이 아니라 실제 저장 시각입니다. (최대 flush_interval초 차이, 순서는 유지)
+
+COUNTER_NAMES = ('queued', 'flushed', 'dropped', 'overflow', 'flushes')
+
+logger = logging.getLogger(__name__)
+
+
+class ChatLogBuffer:
+    def __init__(self, max_size=None, batch_size=None, flush_interval=None, background=True):
+        self.max_size = max_size or settings.CHAT_LOG_BUFFER_SIZE
+        self.batch_size = batch_size or settings.CHAT_LOG_FLUSH_BATCH
+        self.flush_interval = flush_interval or settings.CHAT_LOG_FLUSH_INTERVAL
+        self.background = background  # [설명] False면 스레드 없이 add()한 쪽에서 batch_size마다 저장 (테스트용)
+        self._pending = deque()
+        self._lock = threading.Lock()  # [설명] 큐·카운터 보호
+        self._flush_lock = threading.Lock()  # [설명] 저장은 한 번에 하나씩 (순서 유지)
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._closed = False
+        # [설명] queued: 큐에 넣은 수 / flushed: 지연 저장된 수 / dropped: 저장 실패로 버린 수
+        # [설명] overflow: 큐가 가득 차거나 종료 중이라 바로 저장한 수 / flushes: bulk_create 횟수
+        self._counters = dict.fromkeys(COUNTER_NAMES, 0)
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, 'pending': len(self._pending)}
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def offer(self, log):
+        # [설명] 큐에 넣었으면 True, 가득 찼거나 종료 중이면 False (DB 접근 없음 — 이벤트 루프에서 바로 호출 가능)
+        with self._lock:
+            if self._closed or len(self._pending) >= self.max_size:
+                return False
+            self._pending.append(log)
+            self._counters['queued'] += 1
+            full_batch = len(self._pending) >= self.batch_size
+        if self.background:
+            self._ensure_thread()
+            if full_batch:
+                self._wakeup.set()
+        elif full_batch:
+            self.flush()
+        return True
+
+    def add(self, log):
+        if not self.offer(log):
+            save_chat_logs([log])
+            self._count('overflow')
+
+    async def aadd(self, log):
+        if not self.offer(log):
+            await sync_to_async(save_chat_logs)([log])
+            self._count('overflow')
+
+    def flush(self):
+        # [설명] 큐에 쌓인 기록을 모두 저장하고 저장한 수 반환
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+            try:
+                saved = self._save(batch)
+            except Exception:
+                # [설명] DB 오류가 아닌 예외도 큐에서 꺼낸 배치는 버린 것으로 집계
+                logger.exception('채팅 기록 %d건 저장 실패', len(batch))
+                saved = 0
+            with self._lock:
+                self._counters['dropped'] += len(batch) - saved
+                self._counters['flushed'] += saved
+                self._counters['flushes'] += 1
+            return saved
+
+    def _save(self, batch):
+        try:
+            return save_chat_logs(batch, batch_size=self.batch_size)
+        except DatabaseError:
+            # [설명] 한 건(예: 그사이 삭제된 채팅방) 때문에 배치 전체를 잃지 않도록 한 건씩 다시 저장
+            saved = 0
+            for log in batch:
+                try:
+                    saved += save_chat_logs([log])
+                except DatabaseError:
+                    pass
+            return saved
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None and not self._closed:
+                    self._thread = threading.Thread(target=self._run, name='chat-log-buffer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                if self._pending:
+                    close_old_connections()  # [설명] 요청 밖 스레드이므로 끊기거나 오래된 DB 연결은 직접 정리
+                    self.flush()
+            except Exception:
+                # [설명] 스레드가 죽으면 다시 시작되지 않아 종료 시까지 아무것도 저장되지 않으므로 기록만 남기고 계속 실행
+                logger.exception('채팅 기록 버퍼 저장 스레드 오류')
+
+    def close(self, timeout=5):
+        # [설명] 새 기록은 받지 않고(바로 저장) 스레드를 멈춘 뒤 남은 기록 저장
+        with self._lock:
+            self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_chat_log_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ChatLogBuffer()
+                atexit.register(_buffer.close)  # [설명] 워커 종료 시 남은 기록 저장
+    return _buffer
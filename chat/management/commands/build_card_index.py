@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from cards.catalog import get_catalog_version
+from chat.retrieval import INDEX_FILE, CardSearchIndex
+
+
+class Command(BaseCommand):
+    help = '현재 카탈로그 버전의 카드 혜택 검색 색인(BM25)을 만들어 디스크에 저장합니다. (배포 시 미리 만들어 두면 워커가 DB 대신 파일을 읽음)'
+
+    def handle(self, *args, **options):
+        version = get_catalog_version()
+        index = CardSearchIndex.build(version)
+        index.save(INDEX_FILE)
+        self.stdout.write(self.style.SUCCESS(
+            f'카드 검색 색인 저장 완료: 버전 {version}, 카드 {len(index.cards)}장, 토큰 {len(index.terms)}개 → {INDEX_FILE}'
+        ))
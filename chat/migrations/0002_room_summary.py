@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-18 03:30
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_room_summaries(apps, schema_editor):
+    # [설명] 기존 채팅방의 마지막 질문 미리보기·시각·기록 수 채우기
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    ChatLog = apps.get_model('chat', 'ChatLog')
+    summaries = list(ChatLog.objects.filter(deleted_at__isnull=True).values('chatting_room_id')
+                     .annotate(count=Count('chat_id'), last_id=Max('chat_id')).order_by())
+    for i in range(0, len(summaries), 1000):
+        chunk = summaries[i:i + 1000]
+        last_logs = ChatLog.objects.in_bulk([s['last_id'] for s in chunk])
+        rooms = ChatRoom.objects.in_bulk([s['chatting_room_id'] for s in chunk])
+        for summary in chunk:
+            room, log = rooms[summary['chatting_room_id']], last_logs[summary['last_id']]
+            room.message_count = summary['count']
+            room.last_message = log.question[:100]
+            room.last_message_at = log.created_at
+        ChatRoom.objects.bulk_update(rooms.values(), ['message_count', 'last_message', 'last_message_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='chatlog',
+            index=models.Index(fields=['chatting_room', 'created_at', 'chat_id'], name='idx_chat_room_created'),
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['user', 'created_at', 'chatting_room_id'], name='idx_room_user_created'),
+        ),
+        migrations.RunPython(backfill_room_summaries, migrations.RunPython.noop),
+    ]
@@ -6,12 +6,18 @@ class ChatRoom(models.Model):
     chatting_room_id = models.BigAutoField(primary_key=True)  # [설명] PK
     user = models.ForeignKey('users.User', on_delete=models.CASCADE, db_column='user_id')  # [설명] 채팅방 소유자
     title = models.CharField(max_length=100)  # [설명] 채팅방 제목 (자동 생성 또는 사용자 지정)
+    last_message = models.CharField(max_length=100, null=True, blank=True)  # [설명] 마지막 질문 미리보기 (채팅 기록 저장 시 갱신)
+    last_message_at = models.DateTimeField(null=True, blank=True)  # [설명] 마지막 채팅 기록 시각
+    message_count = models.PositiveIntegerField(default=0)  # [설명] 채팅 기록 수
     created_at = models.DateTimeField(auto_now_add=True)  # [설명] 생성 시각
     updated_at = models.DateTimeField(auto_now=True)  # [설명] 수정 시각
     deleted_at = models.DateTimeField(null=True, blank=True)  # [설명] 소프트 삭제용 (null이면 활성 상태)
 
     class Meta:
         db_table = 'chatting_room'  # [설명] 실제 DB 테이블명
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'chatting_room_id'], name='idx_room_user_created'),  # [설명] 채팅방 목록 키셋 페이지네이션
+        ]
 
     def __str__(self):
         # [설명] admin 등에서 표시될 문자열 포맷
@@ -30,6 +36,9 @@ class ChatLog(models.Model):
 
     class Meta:
         db_table = 'chat_logs'  # [설명] 실제 DB 테이블명
+        indexes = [
+            models.Index(fields=['chatting_room', 'created_at', 'chat_id'], name='idx_chat_room_created'),  # [설명] 대화 기록 키셋 페이지네이션
+        ]
 
     def __str__(self):
         # [설명] admin 등에서 표시될 문자열 포맷
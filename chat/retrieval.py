@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Prefetch
+
+from cards.catalog import get_catalog_version
+from cards.models import Card, CardBenefit
+from category.keywords import CATEGORY_KEYWORDS
+
+from .serializers import ChatCardResponseSerializer
+
+# 카드 혜택 검색 엔진 (BM25)
+# [설명] 활성 카드마다 카드명·발급사·혜택 요약·연회비 면제 조건·연결된 카테고리(카테고리 키워드 포함)를 한 문서로 보고,
+# [설명] 한글 글자 n-gram(기본 2-gram) 토큰으로 역색인을 만들어 BM25 점수로 질문과 가까운 카드를 찾습니다.
+# [설명] 색인은 카탈로그 버전(cards.catalog)마다 한 번 만들어 INDEX_FILE(npz)에 저장하고, 새로 뜬 워커는 DB 대신 파일을 읽습니다.
+# [설명] 응답용 카드 정보(ChatCardResponseSerializer 형태)도 색인에 함께 저장하므로 검색 시 DB를 조회하지 않습니다.
+
+INDEX_FILE = getattr(settings, 'CARD_SEARCH_INDEX_FILE', settings.BASE_DIR / '.card_search_index.npz')
+NGRAM_SIZE = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {
+    # [설명] 필드별 토큰 가중치 (카테고리가 일치하는 카드를 카드명 우연 일치보다 우선)
+    'card_name': 1.5,
+    'company': 1.0,
+    'benefit_cap_summary': 1.0,
+    'fee_waiver_rule': 0.5,
+    'categories': 2.0,
+}
+DEFAULT_TOP_K = 3
+MIN_RELATIVE_SCORE = 0.3  # [설명] 1위 점수의 이 비율 미만인 카드는 제외 ('카드', '추천'처럼 어디에나 있는 토큰만 걸린 카드)
+
+_WORD = re.compile(r'[0-9a-z가-힣]+')
+
+
+def tokenize(text, n=NGRAM_SIZE):
+    # [설명] NFKC 정규화 → 소문자 → 단어별 글자 n-gram (n보다 짧은 단어는 단어 그대로)
+    # [설명] 예: '스타벅스 할인' → ['스타', '타벅', '벅스', '할인'] — 띄어쓰기·조사가 달라도 부분 일치
+    if not text:
+        return []
+    tokens = []
+    for word in _WORD.findall(unicodedata.normalize('NFKC', text).lower()):
+        if len(word) <= n:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+def category_text(category_name):
+    # [설명] 카테고리명 + 키워드 사전 (예: '카페/디저트' → '카페/디저트 카페 커피 스타벅스 ...')
+    return ' '.join([category_name, *CATEGORY_KEYWORDS.get(category_name, ())])
+
+
+class CardSearchIndex:
+    def __init__(self, version, terms, offsets, doc_ids, weights, doc_lengths, cards):
+        self.version = version
+        # [설명] 토큰 → 포스팅 구간 (CSR 형식: offsets[i]:offsets[i + 1] 구간의 doc_ids/weights)
+        self.term_index = {term: i for i, term in enumerate(terms)}
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights  # [설명] 문서 내 가중 토큰 빈도
+        self.doc_lengths = doc_lengths
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        self.cards = cards  # [설명] 문서 번호 → {'family': ..., 'payload': 응답용 카드 정보}
+        doc_freq = np.diff(offsets)
+        n = len(doc_lengths)
+        self.idf = np.log1p((n - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    @classmethod
+    def build(cls, version):
+        # [설명] 카드 1회 + 혜택(카테고리 포함) 1회 조회로 색인 생성 (요청 경로가 아니라 버전 변경 시 1회)
+        benefits = CardBenefit.objects.filter(
+            deleted_at__isnull=True, category__deleted_at__isnull=True
+        ).select_related('category').order_by('benefit_id')
+        cards = list(Card.objects.filter(deleted_at__isnull=True).order_by('card_id')
+                     .prefetch_related(Prefetch('cardbenefit_set', queryset=benefits, to_attr='active_benefits')))
+
+        postings = {}  # [설명] 토큰 → {문서 번호: 가중 빈도}
+        doc_lengths = np.zeros(len(cards), dtype=np.float64)
+        docs = []
+        for doc, card in enumerate(cards):
+            fields = {
+                'card_name': card.card_name,
+                'company': card.company,
+                'benefit_cap_summary': card.benefit_cap_summary,
+                'fee_waiver_rule': card.fee_waiver_rule,
+                'categories': ' '.join(dict.fromkeys(
+                    category_text(b.category.category_name) for b in card.active_benefits)),
+            }
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    freq = postings.setdefault(token, {})
+                    freq[doc] = freq.get(doc, 0.0) + weight
+                    doc_lengths[doc] += weight
+            card.benefits = card.active_benefits  # [설명] 시리얼라이저의 benefits 필드가 활성 혜택만 읽도록
+            docs.append({
+                'family': card.family_id or f'card-{card.card_id}',
+                'payload': ChatCardResponseSerializer(card).data,
+            })
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        doc_ids, weights = [], []
+        for i, term in enumerate(terms):
+            freq = postings[term]
+            doc_ids.extend(freq)
+            weights.extend(freq.values())
+            offsets[i + 1] = len(doc_ids)
+        return cls(version, terms, offsets, np.array(doc_ids, dtype=np.int32),
+                   np.array(weights, dtype=np.float32), doc_lengths, docs)
+
+    def save(self, path):
+        # [설명] 임시 파일에 쓰고 교체 (다른 워커가 쓰다 만 파일을 읽지 않도록), pickle 없이 배열 + JSON만 저장
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                version=np.array(self.version),
+                terms=np.array(self.terms, dtype=str),
+                offsets=self.offsets, doc_ids=self.doc_ids, weights=self.weights, doc_lengths=self.doc_lengths,
+                cards=np.array(json.dumps(self.cards, ensure_ascii=False)),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        # [설명] 저장된 색인 읽기 (파일이 없거나 깨졌으면 None)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(str(data['version']), data['terms'].tolist(), data['offsets'], data['doc_ids'],
+                           data['weights'], data['doc_lengths'], json.loads(str(data['cards'])))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def scores(self, question):
+        # [설명] 질문 토큰별 포스팅만 훑어 BM25 점수 누적 (같은 토큰이 여러 번 나오면 그만큼 반영)
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float64)
+        if not len(scores):
+            return scores
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / self.avg_length)
+        for token in tokenize(question):
+            i = self.term_index.get(token)
+            if i is None:
+                continue
+            start, end = self.offsets[i], self.offsets[i + 1]
+            docs, tf = self.doc_ids[start:end], self.weights[start:end]
+            scores[docs] += self.idf[i] * tf * (BM25_K1 + 1) / (tf + norm[docs])
+        return scores
+
+    def search(self, question, k=DEFAULT_TOP_K):
+        # [설명] 점수 상위 k개 카드 정보 (점수가 낮은 카드 제외, 같은 패밀리는 점수가 가장 높은 한 장만)
+        scores = self.scores(question)
+        if not len(scores) or scores.max() <= 0:
+            return []
+        candidates = np.flatnonzero(scores >= scores.max() * MIN_RELATIVE_SCORE)
+        # [설명] 점수 내림차순, 같은 점수면 card_id 오름차순(문서 번호 순)
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        results, seen_families = [], set()
+        for doc in candidates.tolist():
+            card = self.cards[doc]
+            if card['family'] in seen_families:
+                continue
+            seen_families.add(card['family'])
+            results.append(card['payload'])
+            if len(results) >= k:
+                break
+        return results
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def load_or_build_index(version, path=None):
+    # [설명] 디스크 색인이 현재 버전이면 그대로 사용, 아니면 DB에서 만들어 저장
+    path = path or INDEX_FILE
+    index = CardSearchIndex.load(path)
+    if index is None or index.version != version:
+        index = CardSearchIndex.build(version)
+        index.save(path)
+    return index
+
+
+def get_card_search_index():
+    # [설명] 현재 카탈로그 버전에 맞는 색인 반환 (버전이 바뀌었으면 다시 로드)
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = load_or_build_index(version)
+        return _index
+
+
+def search_cards(question, k=DEFAULT_TOP_K):
+    return get_card_search_index().search(question, k)
@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models import Q
+
+from expense.bulk import bulk_upsert
+from expense.listing import decode_cursor, encode_cursor
+
+from .models import ChatLog, ChatRoom
+
+# 채팅방 목록 / 대화 기록 조회와 채팅방 요약 갱신
+# [설명] 채팅방의 마지막 질문 미리보기·시각·기록 수는 ChatRoom에 비정규화해 두고 채팅 기록을 저장할 때 함께 갱신합니다.
+# [설명] 그래서 채팅방 목록은 채팅방마다 마지막 기록을 찾는 추가 쿼리(N+1) 없이 (user, created_at, id) 인덱스 한 번으로 조회됩니다.
+# [설명] 목록과 대화 기록은 (created_at, id) 내림차순 키셋(커서) 페이지네이션입니다. (커서 형식은 지출 내역 조회와 동일)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+PREVIEW_LENGTH = 100  # [설명] 마지막 질문 미리보기 길이 (ChatRoom.last_message max_length)
+SUMMARY_CHUNK_SIZE = 1000  # [설명] 채팅방 요약을 한 번에 잠가 읽고 기록하는 채팅방 수
+
+
+def update_room_summaries(logs):
+    # [설명] 저장된 채팅 기록 목록 → 채팅방 행을 한 번에 잠가 읽고 최종 요약을 upsert 문 하나로 기록 (청크당 쿼리 2번)
+    # [설명] 다른 워커가 더 최근 기록을 먼저 반영했으면 미리보기는 덮어쓰지 않음 (기록 수는 항상 더함)
+    summaries = {}
+    for log in logs:
+        count, _ = summaries.get(log.chatting_room_id, (0, None))
+        summaries[log.chatting_room_id] = (count + 1, log)
+    room_ids = sorted(summaries)  # [설명] 잠금 순서를 고정해 워커 간 교착 방지
+    for i in range(0, len(room_ids), SUMMARY_CHUNK_SIZE):
+        rooms = list(ChatRoom.objects.select_for_update().filter(pk__in=room_ids[i:i + SUMMARY_CHUNK_SIZE]).order_by('pk'))
+        for room in rooms:
+            count, log = summaries[room.pk]
+            room.message_count += count
+            if room.last_message_at is None or room.last_message_at <= log.created_at:
+                room.last_message = log.question[:PREVIEW_LENGTH]
+                room.last_message_at = log.created_at
+        bulk_upsert(ChatRoom, rooms, ['chatting_room_id'], ['message_count', 'last_message', 'last_message_at', 'updated_at'])
+
+
+def save_chat_logs(logs, batch_size=None):
+    # [설명] 채팅 기록 저장 + 채팅방 요약 갱신 (같은 트랜잭션) — 채팅 기록은 반드시 이 함수로 저장
+    with transaction.atomic():
+        ChatLog.objects.bulk_create(logs, batch_size=batch_size)
+        update_room_summaries(logs)
+    return len(logs)
+
+
+def before_cursor(queryset, cursor, pk_field):
+    if not cursor:
+        return queryset
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, **{f'{pk_field}__lt': pk}))
+
+
+def fetch_page(queryset, pk_field, limit, cursor=None):
+    # [설명] (행 목록, 다음 커서 또는 None) — limit + 1건을 읽어 다음 페이지 여부 판단
+    rows = list(before_cursor(queryset, cursor, pk_field).order_by('-created_at', f'-{pk_field}')[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1][pk_field])
+    return rows, next_cursor
+
+
+def room_queryset(user_id):
+    return ChatRoom.objects.filter(user_id=user_id, deleted_at__isnull=True).values(
+        'chatting_room_id', 'title', 'last_message', 'last_message_at', 'message_count', 'created_at')
+
+
+def history_queryset(room_id):
+    return ChatLog.objects.filter(chatting_room_id=room_id, deleted_at__isnull=True).values(
+        'chat_id', 'question', 'answer', 'created_at')
+
+
+def serialize_room(row):
+    return {
+        "session_id": f"sess-{row['chatting_room_id']}",
+        "title": row['title'],
+        "last_message": row['last_message'],
+        "last_message_at": row['last_message_at'].isoformat() if row['last_message_at'] else None,
+        "message_count": row['message_count'],
+        "created_at": row['created_at'].isoformat(),
+    }
+
+
+def serialize_log(row):
+    return {
+        "message_id": row['chat_id'],
+        "question": row['question'],
+        "answer": row['answer'],
+        "created_at": row['created_at'].isoformat(),
+    }
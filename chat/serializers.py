@@ -5,6 +5,8 @@ from cards.models import Card, CardBenefit
 # 카드 혜택 정보 직렬화
 class BenefitSerializer(serializers.ModelSerializer):
     # [설명] 카드 혜택 정보를 JSON으로 변환하는 시리얼라이저
+    category_name = serializers.CharField(source='category.category_name', read_only=True)  # [설명] 혜택 카테고리명
+
     class Meta:
         model = CardBenefit  # [설명] CardBenefit 모델 기반
         fields = ['benefit_id', 'category_name', 'benefit_rate', 'benefit_limit']  # [설명] 응답에 포함할 필드
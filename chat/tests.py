@@ -1,3 +1,390 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from cards.models import Card, CardBenefit
+from category.models import Category
+from expense.models import ExpenseDailyRollup
+from users.models import User
+from chat import generation, log_buffer, retrieval
+from chat.answer_cache import AnswerCache, normalize_question
+from chat.generation import AnswerGenerator, CachedAnswerGenerator, collect_answer
+from chat.log_buffer import ChatLogBuffer
+from chat.models import ChatLog, ChatRoom
+from chat.rooms import save_chat_logs
+from chat.views import ChatHistoryView, ChatRoomListView, SendMessageView
+
+
+# 카드 혜택 검색(BM25) 테스트
+class CardSearchIndexTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.index_file = os.path.join(self.tmp.name, 'index.npz')
+        patcher = mock.patch.object(retrieval, 'INDEX_FILE', self.index_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        retrieval._index = None  # [설명] 테스트마다 색인을 새로 생성
+        generation._generators.clear()  # [설명] 답변 캐시 초기화
+        self.logs = log_buffer._buffer = ChatLogBuffer(background=False)  # [설명] 채팅 기록은 flush()로 직접 저장
+
+        self.user = User.objects.create(email='chat@example.com', name='테스터', password='pw')
+        cafe = Category.objects.create(category_name='카페/디저트')
+        transit = Category.objects.create(category_name='대중교통')
+        mart = Category.objects.create(category_name='대형마트')
+
+        self.cafe_card = Card.objects.create(card_name='모닝 카드', company='신한카드', benefit_cap_summary='커피 업종 월 1만원 할인')
+        CardBenefit.objects.create(card=self.cafe_card, category=cafe, benefit_rate=10)
+        self.commute_card = Card.objects.create(card_name='출근길 카드', company='KB국민카드')
+        CardBenefit.objects.create(card=self.commute_card, category=cafe, benefit_rate=5)
+        CardBenefit.objects.create(card=self.commute_card, category=transit, benefit_rate=10)
+        self.mart_card = Card.objects.create(card_name='장보기 카드', company='삼성카드', fee_waiver_rule='전월 실적 30만원 이상 시 연회비 면제')
+        CardBenefit.objects.create(card=self.mart_card, category=mart, benefit_rate=5)
+        deleted = Card.objects.create(card_name='단종 커피 카드', company='신한카드')
+        CardBenefit.objects.create(card=deleted, category=cafe, benefit_rate=50)
+        Card.objects.filter(pk=deleted.pk).update(deleted_at=timezone.now())  # [설명] 색인에는 활성 카드만 포함되어야 함
+        self.room = ChatRoom.objects.create(user=self.user, title='테스트')
+
+    def test_tokenize_uses_character_bigrams(self):
+        self.assertEqual(retrieval.tokenize('스타벅스 할인!'), ['스타', '타벅', '벅스', '할인'])
+        self.assertEqual(retrieval.tokenize('GS25 편의점'), ['gs', 's2', '25', '편의', '의점'])
+
+    def test_search_ranks_cards_by_linked_categories(self):
+        index = retrieval.get_card_search_index()
+        # [설명] '커피'와 '지하철'이 모두 카테고리 키워드에 걸리는 카드가 가장 위
+        cards = index.search('커피랑 지하철 할인 많이 되는 카드 추천해줘')
+        self.assertEqual([c['card_id'] for c in cards][:2], [self.commute_card.card_id, self.cafe_card.card_id])
+        self.assertEqual(cards[0]['benefits'][0]['category_name'], '카페/디저트')
+        # [설명] 연회비 면제 조건 필드도 검색 대상
+        self.assertEqual(index.search('연회비 면제 실적')[0]['card_id'], self.mart_card.card_id)
+        self.assertEqual(index.search('골프'), [])
+
+    def test_index_persists_per_catalog_version(self):
+        with mock.patch.object(retrieval, 'get_catalog_version', return_value='v1'):
+            retrieval.get_card_search_index()
+        self.assertTrue(os.path.exists(self.index_file))
+
+        # [설명] 새 워커(메모리 색인 없음)는 같은 버전이면 DB 대신 파일을 읽음
+        retrieval._index = None
+        with mock.patch.object(retrieval, 'get_catalog_version', return_value='v1'), self.assertNumQueries(0):
+            cards = retrieval.search_cards('지하철')
+        self.assertEqual(cards[0]['card_id'], self.commute_card.card_id)
+
+        # [설명] 카탈로그 버전이 바뀌면 다시 생성
+        Card.objects.filter(pk=self.commute_card.pk).update(card_name='지하철 카드')
+        with mock.patch.object(retrieval, 'get_catalog_version', return_value='v2'):
+            index = retrieval.get_card_search_index()
+        self.assertEqual(index.version, 'v2')
+        self.assertEqual(retrieval.CardSearchIndex.load(self.index_file).version, 'v2')
+
+    def test_send_message_answers_from_index(self):
+        retrieval.get_card_search_index()
+        request = APIRequestFactory().post('/api/v1/chat/send_message/', {
+            'question': '스타벅스 할인 카드', 'session_id': f'sess-{self.room.chatting_room_id}',
+        }, format='json')
+        force_authenticate(request, user=self.user)
+
+        with self.assertNumQueries(1):  # [설명] 채팅방 조회만 (카드 조회 없음, 로그는 지연 저장)
+            response = SendMessageView.as_view()(request)
+        self.logs.flush()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['type'], 'CARD_INFO')
+        self.assertEqual(response.data['data']['cards'][0]['card_id'], self.cafe_card.card_id)
+        self.assertEqual(ChatLog.objects.get(chatting_room=self.room).answer, "질문하신 혜택에 맞는 추천 카드는 '모닝 카드', '출근길 카드' 입니다.")
+
+
+class SlowAnswerGenerator(AnswerGenerator):
+    # [설명] 첫 토큰 뒤에 멈추는 생성기 (제한 시간 테스트용)
+    async def stream(self, question, user_id):
+        yield {'event': 'token', 'text': '생각 중 '}
+        await asyncio.sleep(10)
+        yield {'event': 'token', 'text': '끝'}
+
+
+def parse_sse(body):
+    # [설명] SSE 본문 → [(이벤트명, 데이터)]
+    events = []
+    for block in body.decode('utf-8').strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+# 챗봇 SSE 스트리밍 테스트
+@override_settings(CHAT_ANSWER_GENERATOR='chat.generation.StubAnswerGenerator')
+class SendMessageStreamTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='stream@example.com', name='테스터', password='pw')
+        self.room = ChatRoom.objects.create(user=self.user, title='테스트')
+        self.logs = log_buffer._buffer = ChatLogBuffer(background=False)
+        generation._generators.clear()
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.url = '/api/v1/chat/send_message/stream/'
+
+    async def post(self, question):
+        response = await self.async_client.post(self.url, {
+            'question': question, 'session_id': f'sess-{self.room.chatting_room_id}',
+        }, content_type='application/json', headers=self.auth)
+        body = b''.join([chunk async for chunk in response.streaming_content]) if response.streaming else response.content
+        return response, body
+
+    async def test_streams_tokens_then_done_and_saves_log(self):
+        response, body = await self.post('연회비 없는 카드')
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+        events = parse_sse(body)
+        self.assertEqual([name for name, _ in events], ['meta', 'cards', 'token', 'token', 'token', 'token', 'done'])
+        self.assertEqual(events[0][1]['session_id'], f'sess-{self.room.chatting_room_id}')
+        self.assertEqual(''.join(data['text'] for name, data in events if name == 'token'), '[stub] 연회비 없는 카드')
+        self.assertEqual(events[-1][1]['message'], '[stub] 연회비 없는 카드')
+        await sync_to_async(self.logs.flush)()
+        log = await ChatLog.objects.aget(chatting_room=self.room)
+        self.assertEqual(log.answer, '[stub] 연회비 없는 카드')
+
+    @override_settings(CHAT_ANSWER_GENERATOR='chat.tests.SlowAnswerGenerator', CHAT_RESPONSE_TIMEOUT=0.05)
+    async def test_timeout_sends_error_event_without_log(self):
+        response, body = await self.post('느린 질문')
+
+        events = parse_sse(body)
+        self.assertEqual([name for name, _ in events], ['meta', 'token', 'error'])
+        self.assertEqual(events[-1][1]['error_code'], 'AI_RESPONSE_TIMEOUT')
+        self.assertEqual(self.logs.stats()['queued'], 0)
+
+    async def test_rejects_missing_token_and_foreign_room(self):
+        response = await self.async_client.post(self.url, {'question': '질문'}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.post(self.url, {'question': '질문', 'session_id': 'sess-999999'},
+                                                content_type='application/json', headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content)['error_code'], 'ROOM_NOT_FOUND')
+
+
+# 채팅 기록 지연 저장 버퍼 테스트
+class ChatLogBufferTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(email='buffer@example.com', name='테스터', password='pw')
+        self.room = ChatRoom.objects.create(user=user, title='테스트')
+
+    def log(self, i):
+        return ChatLog(chatting_room=self.room, question=f'질문 {i}', answer='답변')
+
+    def test_flushes_in_batches_and_overflows_to_direct_writes(self):
+        logs = ChatLogBuffer(max_size=3, batch_size=2, background=False)
+        with self.assertNumQueries(0):
+            logs.add(self.log(0))  # [설명] 큐에만 쌓임
+        with self.assertNumQueries(5):
+            logs.add(self.log(1))  # [설명] batch_size 도달 → INSERT 한 번 + 채팅방 요약 잠금 조회·upsert (+ 세이브포인트)
+        self.assertEqual(ChatLog.objects.count(), 2)
+
+        logs = ChatLogBuffer(max_size=1, batch_size=10, background=False)
+        logs.add(self.log(2))
+        with self.assertNumQueries(5):
+            logs.add(self.log(3))  # [설명] 큐가 가득 참 → 바로 저장
+        self.assertEqual(logs.stats(), {'queued': 1, 'flushed': 0, 'dropped': 0, 'overflow': 1, 'flushes': 0, 'pending': 1})
+        self.assertEqual(logs.close(), 1)  # [설명] 종료 시 남은 기록 저장
+        logs.add(self.log(4))  # [설명] 종료 후에는 바로 저장
+        self.assertEqual(list(ChatLog.objects.order_by('chat_id').values_list('question', flat=True)),
+                         ['질문 0', '질문 1', '질문 3', '질문 2', '질문 4'])
+        self.assertEqual(logs.stats()['overflow'], 2)
+
+    def test_failed_flush_counts_dropped_entries(self):
+        logs = ChatLogBuffer(batch_size=10, background=False)
+        logs.add(self.log(0))
+        logs.add(self.log(1))
+        # [설명] 배치 저장 실패 → 한 건씩 재시도 (첫 건 성공, 둘째 건 실패)
+        with mock.patch.object(log_buffer, 'save_chat_logs', side_effect=[DatabaseError, 1, DatabaseError]):
+            self.assertEqual(logs.flush(), 1)
+        self.assertEqual(logs.stats()['dropped'], 1)
+        self.assertEqual(logs.stats()['flushed'], 1)
+
+
+class ChatLogBufferThreadTest(TransactionTestCase):
+    def test_background_thread_flushes_on_interval(self):
+        user = User.objects.create(email='thread@example.com', name='테스터', password='pw')
+        room = ChatRoom.objects.create(user=user, title='테스트')
+        logs = ChatLogBuffer(batch_size=100, flush_interval=0.05)
+        logs.add(ChatLog(chatting_room=room, question='질문', answer='답변'))
+        for _ in range(100):
+            if logs.stats()['flushed']:
+                break
+            time.sleep(0.02)
+        logs.close()
+        self.assertEqual(logs.stats()['flushed'], 1)
+        self.assertEqual(ChatLog.objects.filter(chatting_room=room).count(), 1)
+
+    def test_background_thread_survives_unexpected_errors(self):
+        user = User.objects.create(email='survive@example.com', name='테스터', password='pw')
+        room = ChatRoom.objects.create(user=user, title='테스트')
+        logs = ChatLogBuffer(batch_size=100, flush_interval=0.05)
+
+        def wait_for(name, value):
+            for _ in range(100):
+                if logs.stats()[name] >= value:
+                    return
+                time.sleep(0.02)
+
+        # [설명] DB 오류가 아닌 예외 → 배치는 버린 것으로 집계되고 스레드는 계속 동작
+        with mock.patch.object(log_buffer, 'save_chat_logs', side_effect=RuntimeError('boom')), \
+                self.assertLogs('chat.log_buffer', 'ERROR'):
+            logs.add(ChatLog(chatting_room=room, question='버려지는 질문', answer='답변'))
+            wait_for('dropped', 1)
+        logs.add(ChatLog(chatting_room=room, question='다음 질문', answer='답변'))
+        wait_for('flushed', 1)
+        self.assertTrue(logs._thread.is_alive())
+        logs.close()
+        self.assertEqual((logs.stats()['dropped'], logs.stats()['flushed']), (1, 1))
+        self.assertEqual(list(ChatLog.objects.filter(chatting_room=room).values_list('question', flat=True)), ['다음 질문'])
+
+
+# 채팅방 목록 / 대화 기록 테스트
+class ChatRoomHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='rooms@example.com', name='테스터', password='pw')
+        self.rooms = [ChatRoom.objects.create(user=self.user, title=f'채팅 {i}') for i in range(3)]
+        other = User.objects.create(email='other@example.com', name='다른 사용자', password='pw')
+        self.other_room = ChatRoom.objects.create(user=other, title='남의 채팅')
+
+    def get(self, view, params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request)
+
+    def test_saving_logs_maintains_room_summary(self):
+        first, second = self.rooms[0], self.rooms[1]
+        save_chat_logs([ChatLog(chatting_room=first, question='첫 질문', answer='답'),
+                        ChatLog(chatting_room=second, question='다른 방 질문', answer='답'),
+                        ChatLog(chatting_room=first, question='마지막 질문' * 30, answer='답')])
+        save_chat_logs([ChatLog(chatting_room=first, question='또 질문', answer='답')])
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.message_count, first.last_message), (3, '또 질문'))
+        self.assertEqual((second.message_count, second.last_message), (1, '다른 방 질문'))
+        self.assertEqual(self.rooms[2].message_count, 0)
+
+        # [설명] 다른 워커가 더 최근 기록을 먼저 반영한 경우 — 기록 수만 더하고 미리보기는 유지
+        stale = ChatLog(chatting_room=first, question='늦게 저장된 질문', answer='답')
+        ChatRoom.objects.filter(pk=first.pk).update(last_message_at=timezone.now() + timezone.timedelta(minutes=1))
+        save_chat_logs([stale])
+        first.refresh_from_db()
+        self.assertEqual((first.message_count, first.last_message), (4, '또 질문'))
+
+    def test_room_list_is_one_query_with_keyset_pages(self):
+        save_chat_logs([ChatLog(chatting_room=self.rooms[0], question=f'질문 {i}', answer='답') for i in range(50)])
+
+        with self.assertNumQueries(1):
+            response = self.get(ChatRoomListView, {'limit': 2})
+        page = response.data
+        self.assertEqual([r['title'] for r in page['rooms']], ['채팅 2', '채팅 1'])
+        self.assertTrue(page['has_more'])
+
+        response = self.get(ChatRoomListView, {'limit': 2, 'cursor': page['next_cursor']})
+        self.assertEqual(response.data['rooms'][0]['title'], '채팅 0')
+        self.assertEqual(response.data['rooms'][0]['message_count'], 50)
+        self.assertEqual(response.data['rooms'][0]['last_message'], '질문 49')
+        self.assertFalse(response.data['has_more'])
+
+        self.assertEqual(self.get(ChatRoomListView, {'cursor': '잘못된'}).status_code, 400)
+
+    def test_history_pages_newest_first(self):
+        room = self.rooms[0]
+        save_chat_logs([ChatLog(chatting_room=room, question=f'질문 {i}', answer='답') for i in range(5)])
+        session_id = f'sess-{room.chatting_room_id}'
+
+        seen, cursor = [], None
+        while True:
+            params = {'session_id': session_id, 'limit': 2, **({'cursor': cursor} if cursor else {})}
+            data = self.get(ChatHistoryView, params).data
+            seen.extend(m['question'] for m in data['messages'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, ['질문 4', '질문 3', '질문 2', '질문 1', '질문 0'])
+
+        response = self.get(ChatHistoryView, {'session_id': f'sess-{self.other_room.chatting_room_id}'})
+        self.assertEqual(response.status_code, 404)
+
+
+class CountingAnswerGenerator(AnswerGenerator):
+    # [설명] 호출 횟수를 세는 생성기 (답변 캐시 테스트용)
+    def __init__(self, personalized=False):
+        self.personalized = personalized
+        self.calls = 0
+
+    async def stream(self, question, user_id):
+        self.calls += 1
+        yield {'event': 'cards', 'cards': [{'card_id': self.calls}]}
+        yield {'event': 'token', 'text': f'답변 {self.calls}'}
+
+
+# 챗봇 답변 캐시 테스트
+class AnswerCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()  # [설명] 소비 구간 캐시 초기화
+        self.user = User.objects.create(email='cache@example.com', name='테스터', password='pw')
+        self.generator = CountingAnswerGenerator()
+        self.cached = CachedAnswerGenerator(self.generator, AnswerCache(max_size=10, ttl=60))
+
+    def ask(self, question, user=None, cached=None):
+        return async_to_sync(collect_answer)(question, (user or self.user).user_id, cached or self.cached)
+
+    def test_normalized_question_hits_cache_until_catalog_changes(self):
+        self.assertEqual(normalize_question(' 연회비 없는 카드?! '), normalize_question('연회비없는카드'))
+        with mock.patch.object(generation, 'get_catalog_version', return_value='v1'):
+            self.assertEqual(self.ask('연회비 없는 카드'), ('답변 1', [{'card_id': 1}]))
+            self.assertEqual(self.ask('연회비없는 카드?'), ('답변 1', [{'card_id': 1}]))
+        self.assertEqual(self.generator.calls, 1)
+
+        # [설명] load_cards / link_categories 등으로 카탈로그 버전이 바뀌면 (버전 재확인 간격이 지난 뒤) 다시 생성
+        with mock.patch.object(generation, 'get_catalog_version', return_value='v2') as version:
+            self.assertEqual(self.ask('연회비 없는 카드'), ('답변 1', [{'card_id': 1}]))
+            version.assert_not_called()  # [설명] 간격 안에서는 버전 파일을 읽지 않음
+            self.cached._version_expires = 0.0
+            self.assertEqual(self.ask('연회비 없는 카드'), ('답변 2', [{'card_id': 2}]))
+        stats = self.cached.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['invalidations'], stats['size']), (2, 2, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_lru_eviction_and_ttl(self):
+        answers = AnswerCache(max_size=2, ttl=10)
+        with mock.patch('chat.answer_cache.time.monotonic', return_value=100):
+            answers.set('a', 1)
+            answers.set('b', 2)
+            self.assertEqual(answers.get('a'), 1)  # [설명] a가 최근 사용 → b가 밀려남
+            answers.set('c', 3)
+            self.assertIsNone(answers.get('b'))
+        with mock.patch('chat.answer_cache.time.monotonic', return_value=111):
+            self.assertIsNone(answers.get('a'))  # [설명] TTL 만료
+        stats = answers.stats()
+        self.assertEqual((stats['evictions'], stats['expirations'], stats['size']), (1, 1, 1))
+
+    def test_personalized_generator_keys_on_spending_bucket(self):
+        generator = CountingAnswerGenerator(personalized=True)
+        cached = CachedAnswerGenerator(generator, AnswerCache(max_size=10, ttl=60))
+        food = Category.objects.create(category_name='식비')
+        cafe = Category.objects.create(category_name='카페/디저트')
+        twin = User.objects.create(email='twin@example.com', name='비슷한 사용자', password='pw')
+        heavy = User.objects.create(email='heavy@example.com', name='다른 사용자', password='pw')
+        today = timezone.localdate()
+        for user, category, amount in [(self.user, food, 900000), (self.user, cafe, 300000),
+                                       (twin, food, 800000), (twin, cafe, 100000),
+                                       (heavy, food, 9000000)]:
+            ExpenseDailyRollup.objects.create(user=user, day=today, category=category, amount=amount, count=1)
+
+        self.ask('내 소비에 맞는 카드', cached=cached)
+        self.ask('내 소비에 맞는 카드', user=twin, cached=cached)  # [설명] 같은 소비 구간 → 캐시 적중
+        self.ask('내 소비에 맞는 카드', user=heavy, cached=cached)  # [설명] 다른 구간 → 새로 생성
+        self.assertEqual(generator.calls, 2)
@@ -1,9 +1,14 @@
 from django.urls import path
-from .views import MakeChatRoomView, SendMessageView  # [설명] 채팅방 생성 및 메시지 전송 뷰 import
+from .views import (  # [설명] 채팅방 생성·조회 및 메시지 전송 뷰 import
+    MakeChatRoomView, SendMessageView, SendMessageStreamView, ChatRoomListView, ChatHistoryView,
+)
 
 app_name = 'chat'  # [설명] URL 네임스페이스 설정
 
 urlpatterns = [
     path('make_room/', MakeChatRoomView.as_view(), name='make_chat_room'),  # [설명] 채팅방 생성 엔드포인트
     path('send_message/', SendMessageView.as_view(), name='send_message'),  # [설명] 메시지 전송 및 챗봇 응답 엔드포인트
+    path('send_message/stream/', SendMessageStreamView.as_view(), name='send_message_stream'),  # [설명] 챗봇 응답 SSE 스트리밍 엔드포인트
+    path('rooms/', ChatRoomListView.as_view(), name='chat_room_list'),  # [설명] 채팅방 목록 (키셋 페이지네이션)
+    path('history/', ChatHistoryView.as_view(), name='chat_history'),  # [설명] 채팅방 대화 기록 (키셋 페이지네이션)
 ]
\ No newline at end of file
@@ -1,13 +1,25 @@
+import asyncio
+import json
 import uuid
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions, serializers
-from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
 
 from .models import ChatRoom, ChatLog
-from cards.models import Card
-from .serializers import ChatCardResponseSerializer
+from .generation import collect_answer, get_answer_generator
+from .log_buffer import get_chat_log_buffer
+from .rooms import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, fetch_page, history_queryset,
+                    room_queryset, serialize_log, serialize_room)
 
 # 공통 에러 응답 헬퍼 함수
 def error_response(message, error_code, reason, status_code):
@@ -93,14 +105,15 @@ class SendMessageView(APIView):
 
         # 3. 비즈니스 로직 (카드 추천 및 로그 저장)
         try:
-            recommended_cards = Card.objects.all()[:1]
-            card_data = ChatCardResponseSerializer(recommended_cards, many=True).data
-            
-            ChatLog.objects.create(
+            # [설명] 답변 생성기(chat.generation)의 이벤트를 모두 모아서 한 번에 응답
+            answer, card_data = async_to_sync(collect_answer)(question, request.user.user_id)
+
+            # [설명] 채팅 기록은 지연 저장 버퍼에 넣고 바로 응답 (INSERT는 백그라운드에서 모아서 실행)
+            get_chat_log_buffer().add(ChatLog(
                 chatting_room=room,
                 question=question,
-                answer="추천 카드 정보입니다."
-            )
+                answer=answer
+            ))
 
             return Response({
                 "type": "CARD_INFO",
@@ -108,8 +121,188 @@ class SendMessageView(APIView):
                 "session_id": session_id,
                 "user_id": request.user.user_id,
                 "timestamp": timezone.now().isoformat(),
+                "message": answer,
                 "data": {"cards": card_data}
             }, status=status.HTTP_200_OK)
 
         except Exception:
-            return error_response("답변 생성 실패", "AI_RESPONSE_TIMEOUT", "챗봇 응답이 지연되고 있습니다.", status.HTTP_504_GATEWAY_TIMEOUT)
\ No newline at end of file
+            return error_response("답변 생성 실패", "AI_RESPONSE_TIMEOUT", "챗봇 응답이 지연되고 있습니다.", status.HTTP_504_GATEWAY_TIMEOUT)
+
+
+
+def parse_page_params(params):
+    # [설명] (limit, cursor) — 잘못되면 ValueError
+    limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit은 1~{MAX_PAGE_SIZE} 사이여야 합니다.')
+    cursor = params.get('cursor')
+    if cursor:
+        decode_cursor(cursor)
+    return limit, cursor
+
+
+PAGE_PARAMETERS = [
+    OpenApiParameter(name='limit', description=f'페이지 크기 (1~{MAX_PAGE_SIZE}, 기본 {DEFAULT_PAGE_SIZE})', required=False, type=int),
+    OpenApiParameter(name='cursor', description='이전 응답의 next_cursor', required=False, type=str),
+]
+
+
+class ChatRoomListView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="채팅방 목록 조회",
+        description="사용자의 채팅방을 최근 생성순으로 조회합니다. 각 채팅방의 마지막 질문 미리보기와 기록 수를 포함하며, "
+                    "응답의 next_cursor를 cursor로 넘기면 다음 페이지를 조회합니다.",
+        parameters=PAGE_PARAMETERS,
+        tags=["Chat"]
+    )
+    def get(self, request):
+        try:
+            limit, cursor = parse_page_params(request.query_params)
+        except ValueError as e:
+            return error_response("채팅방 목록 조회 실패", "INVALID_PARAMETER", str(e), status.HTTP_400_BAD_REQUEST)
+
+        # [설명] 요약이 채팅방 행에 있으므로 (user, created_at, id) 인덱스 범위 쿼리 한 번
+        rooms, next_cursor = fetch_page(room_queryset(request.user.user_id), 'chatting_room_id', limit, cursor)
+        return Response({
+            "rooms": [serialize_room(row) for row in rooms],
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        }, status=status.HTTP_200_OK)
+
+
+class ChatHistoryView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="대화 기록 조회",
+        description="채팅방(session_id)의 대화 기록을 최신순으로 조회합니다. 응답의 next_cursor를 cursor로 넘기면 이전 기록을 조회합니다. "
+                    "방금 보낸 메시지는 지연 저장되므로 최대 몇 초 뒤에 조회될 수 있습니다.",
+        parameters=[
+            OpenApiParameter(name='session_id', description='채팅방 세션 ID (sess-<id>)', required=True, type=str),
+            *PAGE_PARAMETERS,
+        ],
+        tags=["Chat"]
+    )
+    def get(self, request):
+        try:
+            limit, cursor = parse_page_params(request.query_params)
+        except ValueError as e:
+            return error_response("대화 기록 조회 실패", "INVALID_PARAMETER", str(e), status.HTTP_400_BAD_REQUEST)
+
+        session_id = request.query_params.get('session_id')
+        room_id = session_id.replace("sess-", "") if session_id else None
+        try:
+            room = ChatRoom.objects.only('chatting_room_id').get(
+                chatting_room_id=room_id, user=request.user, deleted_at__isnull=True)
+        except (ChatRoom.DoesNotExist, ValueError):
+            return error_response("대화 기록 조회 실패", "ROOM_NOT_FOUND", "해당 채팅방이 존재하지 않습니다.", status.HTTP_404_NOT_FOUND)
+
+        logs, next_cursor = fetch_page(history_queryset(room.chatting_room_id), 'chat_id', limit, cursor)
+        return Response({
+            "session_id": session_id,
+            "messages": [serialize_log(row) for row in logs],
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        }, status=status.HTTP_200_OK)
+
+# SSE(Server-Sent Events) 스트리밍 응답
+# [설명] ASGI(uvicorn)에서 비동기로 동작하므로 열린 스트림이 워커 스레드를 점유하지 않습니다.
+# [설명] 답변 생성기가 이벤트를 만드는 즉시 전송합니다: meta → cards → token × N → done (실패 시 error)
+# [설명] done은 채팅 기록을 지연 저장 버퍼에 넣은 뒤 보냅니다.
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def authenticate_jwt(request):
+    # [설명] DRF 뷰가 아니므로 JWT 인증을 직접 수행 (실패하면 None)
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+@method_decorator(csrf_exempt, name='dispatch')  # [설명] 쿠키가 아닌 Authorization 헤더(JWT)로 인증
+class SendMessageStreamView(View):
+    async def post(self, request):
+        try:
+            body = json.loads(request.body or b'{}')
+        except ValueError:
+            body = {}
+        question = body.get('question')
+        session_id = body.get('session_id')
+        # [설명] 인증 + 채팅방 조회를 스레드 전환 한 번으로 처리 (첫 바이트까지의 시간 단축)
+        user, room = await sync_to_async(self.load_room)(request, session_id)
+
+        if user is None:
+            return JsonResponse({"message": "답변 생성 실패", "error_code": "LOGIN_REQUIRED",
+                                 "reason": "로그인이 필요한 서비스입니다."}, status=status.HTTP_401_UNAUTHORIZED)
+        # 1. 유효성 검사
+        if not question:
+            return JsonResponse({"message": "답변 생성 실패", "error_code": "EMPTY_QUESTION",
+                                 "reason": "질문 내용을 입력해주세요."}, status=status.HTTP_400_BAD_REQUEST)
+        # 2. 채팅방 확인
+        if room is None:
+            return JsonResponse({"message": "답변 생성 실패", "error_code": "ROOM_NOT_FOUND",
+                                 "reason": "해당 채팅방이 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
+
+        events = self.stream(room, user, question, session_id)
+        response = StreamingHttpResponse(events, content_type='text/event-stream; charset=utf-8')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # [설명] 리버스 프록시(nginx)가 응답을 모아두지 않도록
+        return response
+
+    @staticmethod
+    def load_room(request, session_id):
+        # [설명] (사용자, 채팅방) — 인증 실패면 (None, None), 채팅방이 없으면 (사용자, None)
+        user = authenticate_jwt(request)
+        if user is None:
+            return None, None
+        try:
+            room_id = session_id.replace("sess-", "") if session_id else None
+            return user, ChatRoom.objects.get(chatting_room_id=room_id, user=user)
+        except (ChatRoom.DoesNotExist, ValueError):
+            return user, None
+
+    async def stream(self, room, user, question, session_id):
+        # [설명] 첫 이벤트(meta)는 답변 생성 전에 바로 전송 → 첫 바이트까지의 시간이 생성 속도와 무관
+        yield sse_event('meta', {
+            "message_id": f"msg-{uuid.uuid4().hex[:12]}",
+            "session_id": session_id,
+            "user_id": user.user_id,
+            "timestamp": timezone.now().isoformat(),
+        })
+
+        tokens, cards = [], []
+        events = get_answer_generator().stream(question, user.user_id)
+        deadline = asyncio.get_running_loop().time() + settings.CHAT_RESPONSE_TIMEOUT
+        try:
+            while True:
+                # [설명] 전체 답변 시간이 CHAT_RESPONSE_TIMEOUT을 넘으면 중단 (이벤트마다 남은 시간만큼만 대기)
+                remaining = deadline - asyncio.get_running_loop().time()
+                try:
+                    event = await asyncio.wait_for(anext(events), max(remaining, 0))
+                except StopAsyncIteration:
+                    break
+                if event['event'] == 'cards':
+                    cards = event['cards']
+                    yield sse_event('cards', {"cards": cards})
+                elif event['event'] == 'token':
+                    tokens.append(event['text'])
+                    yield sse_event('token', {"text": event['text']})
+        except asyncio.TimeoutError:
+            yield sse_event('error', {"message": "답변 생성 실패", "error_code": "AI_RESPONSE_TIMEOUT",
+                                      "reason": "챗봇 응답이 지연되고 있습니다."})
+            return
+        except Exception:
+            yield sse_event('error', {"message": "답변 생성 실패", "error_code": "AI_RESPONSE_ERROR",
+                                      "reason": "챗봇 답변 생성 중 오류가 발생했습니다."})
+            return
+        finally:
+            await events.aclose()
+
+        answer = ''.join(tokens)
+        await get_chat_log_buffer().aadd(ChatLog(chatting_room=room, question=question, answer=answer))
+        yield sse_event('done', {"type": "CARD_INFO", "message": answer, "data": {"cards": cards}})
@@ -16,3 +16,12 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 # [설명] ASGI 서버(gunicorn, uvicorn 등)가 사용할 애플리케이션 객체
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402 (get_asgi_application에서 설정 로드 후 import)
+
+if settings.DEBUG:
+    # [설명] uvicorn은 runserver와 달리 정적 파일을 서빙하지 않으므로 개발(DEBUG)에서는 /static/(스웨거·DRF 화면 CSS/JS)을 직접 서빙
+    # [설명] 운영(DEBUG=False)은 collectstatic 후 웹 서버에서 서빙
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
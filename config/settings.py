@@ -104,6 +104,19 @@ DATABASES = {
     }
 }
 
+# 캐시 설정
+# [설명] 보유 카드·월별 혜택 사용 현황 캐시는 지출 기록·카드 등록 시 무효화하므로 워커·크롤러·관리 명령이 같은 캐시를 봐야 합니다.
+# [설명] REDIS_URL이 있으면 공유 Redis 캐시 사용, 없으면 프로세스별 로컬 메모리 캐시 (다른 프로세스의 무효화가 안 보이므로 유효 시간을 짧게)
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+SHARED_CACHE = bool(REDIS_URL)  # [설명] False면 무효화가 필요한 캐시는 몇 초만 유지
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -164,6 +177,20 @@ SIMPLE_JWT = {
 # CORS 설정
 CORS_ALLOW_ALL_ORIGINS = True  # [설명] 테스트용으로 모든 도메인 허용 (운영 환경에서는 제한 권장)
 
+# CODEF 카드 승인내역 동기화 설정 (expense.codef_sync)
+CODEF_API_HOST = os.getenv('CODEF_API_HOST', 'https://sandbox.codef.io')  # [설명] 운영: https://api.codef.io
+CODEF_ACCESS_TOKEN = os.getenv('CODEF_ACCESS_TOKEN', os.getenv('DB_ACCESS_TOKEN'))  # [설명] CODEF OAuth 액세스 토큰
+CODEF_SYNC_CONCURRENCY = int(os.getenv('CODEF_SYNC_CONCURRENCY', '8'))  # [설명] 동시에 조회하는 카드 수 (HTTP 세션 수)
+
+# 챗봇 답변 생성 설정 (chat.generation)
+CHAT_ANSWER_GENERATOR = os.getenv('CHAT_ANSWER_GENERATOR', 'chat.generation.RetrievalAnswerGenerator')  # [설명] 답변 생성기 클래스 경로
+CHAT_RESPONSE_TIMEOUT = int(os.getenv('CHAT_RESPONSE_TIMEOUT', '30'))  # [설명] 답변 생성 제한 시간 (초)
+CHAT_ANSWER_CACHE_SIZE = int(os.getenv('CHAT_ANSWER_CACHE_SIZE', '10000'))  # [설명] 워커별 답변 캐시 크기 (0이면 캐시 사용 안 함)
+CHAT_ANSWER_CACHE_TTL = int(os.getenv('CHAT_ANSWER_CACHE_TTL', '3600'))  # [설명] 답변 캐시 유효 시간 (초)
+CHAT_LOG_BUFFER_SIZE = int(os.getenv('CHAT_LOG_BUFFER_SIZE', '10000'))  # [설명] 채팅 기록 지연 저장 큐 최대 크기 (넘치면 바로 저장)
+CHAT_LOG_FLUSH_BATCH = int(os.getenv('CHAT_LOG_FLUSH_BATCH', '200'))  # [설명] 이만큼 쌓이면 바로 저장
+CHAT_LOG_FLUSH_INTERVAL = float(os.getenv('CHAT_LOG_FLUSH_INTERVAL', '1.0'))  # [설명] 쌓인 기록을 저장하는 주기 (초)
+
 # 커스텀 User 모델 설정
 AUTH_USER_MODEL = 'users.User'  # [설명] Django 기본 User 대신 users.User 사용
 
@@ -1,14 +1,52 @@
 import time
 import schedule
+import subprocess
 from .crawlingProcess import runCrawlingJob
 import datetime # Import datetime for timestamp
 
+
+def runCohortStatsJob():
+    """
+    연령대/성별 코호트 지출 통계를 재집계합니다. (이번 달 + 지난달)
+    """
+    try:
+        subprocess.run(["python", "manage.py", "rebuild_cohort_stats"], check=True, capture_output=True, text=True)
+        print(f"[{datetime.datetime.now()}] 코호트 통계 재집계 완료.")
+    except subprocess.CalledProcessError as e:
+        print(f"[{datetime.datetime.now()}] 코호트 통계 재집계 중 오류 발생: {e}\nStderr:\n{e.stderr}")
+
+def runCardSyncJob():
+    """
+    CODEF 카드 승인내역을 동기화 커서부터 가져와 지출로 저장합니다.
+    """
+    try:
+        subprocess.run(["python", "manage.py", "sync_card_approvals"], check=True, capture_output=True, text=True)
+        print(f"[{datetime.datetime.now()}] 카드 승인내역 동기화 완료.")
+    except subprocess.CalledProcessError as e:
+        print(f"[{datetime.datetime.now()}] 카드 승인내역 동기화 중 오류 발생: {e}\nStderr:\n{e.stderr}")
+
+def runSubscriptionDetectJob():
+    """
+    지출 내역에서 정기 결제를 감지해 구독 정보를 생성/갱신합니다.
+    """
+    try:
+        subprocess.run(["python", "manage.py", "detect_subscriptions"], check=True, capture_output=True, text=True)
+        print(f"[{datetime.datetime.now()}] 정기 결제 감지 완료.")
+    except subprocess.CalledProcessError as e:
+        print(f"[{datetime.datetime.now()}] 정기 결제 감지 중 오류 발생: {e}\nStderr:\n{e.stderr}")
+
 if __name__ == "__main__":
     print(f"[{datetime.datetime.now()}] 크롤링 스케줄러가 시작되었습니다.")
     print(f"[{datetime.datetime.now()}] 매주 월요일 03:00에 작업이 실행됩니다.")
 
     # 스케줄 등록: 매주 월요일 새벽 3시에 실행
     schedule.every().monday.at("03:00").do(runCrawlingJob)
+    # 스케줄 등록: 매일 새벽 4시에 코호트 통계 재집계
+    schedule.every().day.at("04:00").do(runCohortStatsJob)
+    # 스케줄 등록: 매일 새벽 5시에 정기 결제(구독) 감지
+    schedule.every().day.at("05:00").do(runSubscriptionDetectJob)
+    # 스케줄 등록: 1시간마다 카드 승인내역 동기화
+    schedule.every().hour.do(runCardSyncJob)
 
     # # 테스트용: 1분마다 실행
     # schedule.every(1).minutes.do(runCrawlingJob)
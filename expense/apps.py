@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ExpenseConfig(AppConfig):
     name = 'expense'
+
+    def ready(self):
+        from . import signals  # noqa: F401  [설명] 시그널 핸들러 등록
@@ -0,0 +1,210 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from cards.benefit_engine import get_benefit_matrix, get_owned_cards
+from users.models import UserCard
+from users.monthly_stats import apply_monthly_spend_deltas
+
+from .bulk import bulk_upsert
+from .models import CardBenefitUsage, Expense
+from .rollups import BULK_UPSERT_THRESHOLD, apply_rollup_deltas, collect_rollup_deltas, month_bounds, new_rollup_deltas
+
+# 카드 혜택 원장 증분 갱신
+# [설명] Expense가 저장/수정/삭제될 때 (보유 카드, 카테고리(혜택), 월) 단위 누적 결제 금액과 받은 혜택(월 한도 적용)을 갱신하고,
+# [설명] 지출 한 건이 받은 혜택(이번 결제로 늘어난 월 혜택)을 Expense.benefit_received에 기록합니다.
+# [설명] 지출이 수정/취소/삭제되면 같은 (카드, 카테고리, 월)의 지출 전체를 결제 순서로 다시 배분해
+# [설명] benefit_received 합계가 항상 원장의 benefit_amount와 같도록 유지합니다.
+# [설명] 혜택 한도 잔여량·달성률·ROI를 Expense 집계 없이 원장 합계로 바로 계산할 수 있게 합니다. (MonthlyStat도 함께 갱신)
+# [설명] 일별/시간대별 지출 큐브(expense.rollups)도 같은 경로에서 함께 갱신합니다.
+# [설명] bulk_create 등 시그널이 발생하지 않는 경로는 record_expenses()를 직접 호출해야 합니다.
+# [설명] (bulk_create 전에 호출하면 계산된 benefit_received가 INSERT에 그대로 포함됩니다)
+
+# [설명] 사용자 월별 사용 현황 캐시 (지출 기록 시 무효화) — 공유 캐시가 아니면 다른 프로세스의 무효화가 안 보이므로 짧게
+USAGE_CACHE_TIMEOUT = 60 * 60 if settings.SHARED_CACHE else 5
+
+
+def month_key(dt):
+    # [설명] 결제 시각 → 'YYYY-MM' (settings.TIME_ZONE 기준)
+    return timezone.localtime(dt).strftime('%Y-%m')
+
+
+def expense_usage(expense):
+    # [설명] 지출 한 건이 사용 현황에 기여하는 (키, 금액) — 취소/소프트 삭제된 지출은 기여하지 않음
+    if expense.deleted_at is not None or expense.status != 'PAID':
+        return None
+    key = (expense.user_id, expense.user_card_id, expense.category_id, month_key(expense.spent_at))
+    return key, expense.amount
+
+
+def _card_ids_for(user_ids, user_card_ids):
+    # [설명] user_card_id → card_id (보유 카드 캐시 우선, 삭제된 보유 카드 등 캐시에 없으면 1회 조회)
+    card_ids = {}
+    for user_id in user_ids:
+        card_ids.update(get_owned_cards(user_id))
+    missing = [user_card_id for user_card_id in user_card_ids if user_card_id not in card_ids]
+    if missing:
+        card_ids.update(UserCard.objects.filter(user_card_id__in=missing).values_list('user_card_id', 'card_id'))
+    return card_ids
+
+
+def _lock_usage(user_id, user_card_id, category_id, target_month):
+    # [설명] 원장 행을 잠금 (같은 카드·카테고리·월의 혜택 계산을 직렬화), 없으면 생성
+    lookup = {'user_card_id': user_card_id, 'category_id': category_id, 'target_month': target_month}
+    usage = CardBenefitUsage.objects.select_for_update().filter(**lookup).first()
+    if usage is None:
+        try:
+            with transaction.atomic():
+                usage = CardBenefitUsage.objects.create(user_id=user_id, **lookup)
+        except IntegrityError:
+            # [설명] 동시에 다른 요청이 먼저 행을 만든 경우
+            usage = CardBenefitUsage.objects.select_for_update().get(**lookup)
+    return usage
+
+
+def allocate_benefits(matrix, card_id, category_id, expenses, spent=0):
+    # [설명] 결제 순서로 정렬된 지출마다 "이번 결제로 늘어난 월 혜택"을 benefit_received에 설정 → (누적 결제 금액, 월 혜택)
+    # [설명] spent: 이 지출들보다 앞선 누적 결제 금액 (0이면 그 달 지출 전체를 처음부터 배분)
+    benefit = matrix.capped_benefit(card_id, category_id, spent)
+    for expense in expenses:
+        spent += expense.amount
+        new_benefit = matrix.capped_benefit(card_id, category_id, spent)
+        expense.benefit_received = new_benefit - benefit
+        benefit = new_benefit
+    return spent, benefit
+
+
+def _stored_month_expenses(user_id, user_card_id, category_id, target_month, exclude):
+    # [설명] 원장 키에 기여하는 저장된 지출 (exclude: 메모리의 새 값으로 계산할 지출 pk)
+    start, end = month_bounds(*map(int, target_month.split('-')))
+    return list(Expense.objects.filter(
+        user_id=user_id, user_card_id=user_card_id, category_id=category_id,
+        spent_at__gte=start, spent_at__lt=end, status='PAID', deleted_at__isnull=True,
+    ).exclude(pk__in=exclude).only('expense_id', 'amount', 'spent_at', 'benefit_received'))
+
+
+def apply_usage_changes(changes):
+    # [설명] {(user_id, user_card_id, category_id, 'YYYY-MM'): [빠진 금액 합계, [추가된 지출]]} 반영
+    # [설명] 추가된 지출은 결제 순서대로 "이번 결제로 늘어난 월 혜택"을 benefit_received에 설정
+    # [설명] 빠진 지출이 있는 키는 그 달 지출 전체의 benefit_received를 다시 계산해 같은 트랜잭션에서 저장
+    if not changes:
+        return
+    matrix = get_benefit_matrix()
+    card_ids = _card_ids_for({key[0] for key in changes}, {key[1] for key in changes})
+
+    monthly = defaultdict(lambda: [0, 0])  # [설명] (user_id, 'YYYY-MM') → [월 지출 증감액, 월 혜택 증감액] (MonthlyStat 갱신용)
+
+    def apply(user_id, user_card_id, category_id, target_month, usage_spent, usage_benefit, removed_amount, added,
+              recomputed):
+        # [설명] 잠근 원장 값 → (새 누적 결제 금액, 새 월 혜택), 추가된 지출의 benefit_received 설정
+        # [설명] recomputed: benefit_received가 바뀐 저장된 지출을 모으는 목록 (호출한 쪽에서 bulk_update)
+        card_id = card_ids.get(user_card_id)
+        if removed_amount:
+            # [설명] 그 달 지출 전체를 결제 순서로 0원부터 다시 배분 (원장 값도 실제 지출 기준으로 맞춰짐)
+            stored = _stored_month_expenses(user_id, user_card_id, category_id, target_month,
+                                            [expense.pk for expense in added if expense.pk])
+            before = {expense.pk: expense.benefit_received for expense in stored}
+            spent, benefit = allocate_benefits(matrix, card_id, category_id,
+                                               sorted(stored + added, key=lambda e: (e.spent_at, e.pk or 0)))
+            recomputed.extend(expense for expense in stored if expense.benefit_received != before[expense.pk])
+        else:
+            spent, benefit = allocate_benefits(matrix, card_id, category_id, added, usage_spent)
+        monthly[(user_id, target_month)][0] += spent - usage_spent
+        monthly[(user_id, target_month)][1] += benefit - usage_benefit
+        return spent, benefit
+
+    if len(changes) > BULK_UPSERT_THRESHOLD:
+        # [설명] 키가 많을 때 (일괄 가져오기 등): 원장 행을 한 번에 잠가 읽고 upsert 문 하나로 기록
+        with transaction.atomic():
+            existing = {
+                (user_card_id, category_id, target_month): (spent, benefit)
+                for user_card_id, category_id, target_month, spent, benefit in
+                CardBenefitUsage.objects.select_for_update().filter(
+                    user_card_id__in={key[1] for key in changes}, target_month__in={key[3] for key in changes}
+                ).values_list('user_card_id', 'category_id', 'target_month', 'spent_amount', 'benefit_amount')
+            }
+            rows, recomputed = [], []
+            for (user_id, user_card_id, category_id, target_month), (removed_amount, added) in changes.items():
+                usage_spent, usage_benefit = existing.get((user_card_id, category_id, target_month), (0, 0))
+                spent, benefit = apply(user_id, user_card_id, category_id, target_month,
+                                       usage_spent, usage_benefit, removed_amount, added, recomputed)
+                rows.append(CardBenefitUsage(user_id=user_id, user_card_id=user_card_id, category_id=category_id,
+                                             target_month=target_month, spent_amount=spent, benefit_amount=benefit))
+            bulk_upsert(CardBenefitUsage, rows, ['user_card', 'category', 'target_month'],
+                        ['spent_amount', 'benefit_amount', 'updated_at'])
+            Expense.objects.bulk_update(recomputed, ['benefit_received'], batch_size=500)
+    else:
+        for (user_id, user_card_id, category_id, target_month), (removed_amount, added) in changes.items():
+            with transaction.atomic():
+                usage = _lock_usage(user_id, user_card_id, category_id, target_month)
+                recomputed = []
+                usage.spent_amount, usage.benefit_amount = apply(
+                    user_id, user_card_id, category_id, target_month,
+                    usage.spent_amount, usage.benefit_amount, removed_amount, added, recomputed)
+                usage.save(update_fields=['spent_amount', 'benefit_amount', 'updated_at'])
+                Expense.objects.bulk_update(recomputed, ['benefit_received'], batch_size=500)
+
+    for user_id, target_month in monthly:
+        cache.delete(usage_cache_key(user_id, target_month))
+
+    apply_monthly_spend_deltas(monthly)  # [설명] 사용자별 월 지출·혜택 통계와 분포도 함께 갱신
+
+
+def record_expense_changes(removed=(), added=()):
+    # [설명] 빠진 지출(수정 전/삭제)의 기여분을 빼고 추가된 지출의 기여분을 더함 — 같은 키는 모아서 한 번만 갱신
+    removed, added = list(removed), list(added)
+    previous = [expense.benefit_received for expense in added]
+
+    changes = defaultdict(lambda: [0, []])
+    for expense in removed:
+        usage = expense_usage(expense)
+        if usage:
+            changes[usage[0]][0] += usage[1]
+    for expense in sorted(added, key=lambda e: e.spent_at):
+        usage = expense_usage(expense)
+        if usage:
+            changes[usage[0]][1].append(expense)
+        else:
+            expense.benefit_received = 0  # [설명] 취소/삭제된 지출은 혜택 없음
+    apply_usage_changes(changes)
+
+    daily, hourly = new_rollup_deltas()
+    collect_rollup_deltas(removed, -1, daily, hourly)
+    collect_rollup_deltas(added, 1, daily, hourly)
+    apply_rollup_deltas(daily, hourly)
+
+    # [설명] 이미 저장된 지출만 benefit_received 갱신 (pk가 없는 지출은 호출한 쪽에서 INSERT 시 함께 저장)
+    changed = [expense for expense, before in zip(added, previous)
+               if expense.pk and expense.benefit_received != before]
+    if changed:
+        Expense.objects.bulk_update(changed, ['benefit_received'], batch_size=500)
+
+
+def record_expenses(expenses, sign=1):
+    # [설명] 여러 지출을 한 번에 반영 (bulk_create 전후 등), sign=-1 이면 기여분 차감
+    if sign > 0:
+        record_expense_changes(added=expenses)
+    else:
+        record_expense_changes(removed=expenses)
+
+
+def usage_cache_key(user_id, target_month):
+    return f'expense:usage:{user_id}:{target_month}'
+
+
+def get_monthly_usage(user_id, target_month):
+    # [설명] {(user_card_id, category_id): 누적 결제 금액} — 캐시 미스일 때만 (user, month) 인덱스 1회 조회
+    key = usage_cache_key(user_id, target_month)
+    usage = cache.get(key)
+    if usage is None:
+        usage = {
+            (user_card_id, category_id): spent
+            for user_card_id, category_id, spent in CardBenefitUsage.objects.filter(
+                user_id=user_id, target_month=target_month
+            ).values_list('user_card_id', 'category_id', 'spent_amount')
+        }
+        cache.set(key, usage, USAGE_CACHE_TIMEOUT)
+    return usage
@@ -0,0 +1,71 @@
+from django.db import connection
+from django.utils import timezone
+
+# 일괄 upsert 헬퍼
+# [설명] bulk_create(update_conflicts=True) → MySQL: INSERT ... ON DUPLICATE KEY UPDATE / SQLite·PostgreSQL: ON CONFLICT DO UPDATE
+# [설명] 값은 덮어쓰므로(증분 아님) 호출한 쪽에서 기존 행을 select_for_update로 잠가 읽고 최종 값을 계산해서 넘겨야 합니다.
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=1000):
+    if not objs:
+        return
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = unique_fields  # [설명] MySQL은 충돌 대상 컬럼을 지정하지 않음 (모든 유니크 키 기준)
+    model.objects.bulk_create(objs, batch_size=batch_size, **options)
+
+
+# 일괄 INSERT 헬퍼 (대량 가져오기용)
+# [설명] bulk_create는 값마다 get_db_prep_save를 거쳐 SQL을 컴파일하므로 행이 많으면 DB 실행보다 컴파일이 더 오래 걸립니다.
+# [설명] 여기서는 INSERT 문 하나를 cursor.executemany로 실행합니다. (mysqlclient는 다중 행 INSERT로 묶어서 전송)
+# [설명] 정수·문자열·FK 값은 그대로, 날짜시각만 DB 형식으로 변환합니다. PK는 채워지지 않고 시그널도 보내지 않습니다. (bulk_create와 동일)
+RAW_FIELD_TYPES = {
+    'IntegerField', 'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField',
+    'CharField', 'TextField', 'ForeignKey', 'BooleanField',
+}
+
+
+def _adapter(field):
+    internal_type = field.get_internal_type()
+    if internal_type in RAW_FIELD_TYPES:
+        return None
+    if internal_type == 'DateTimeField':
+        return connection.ops.adapt_datetimefield_value
+    return lambda value: field.get_db_prep_save(value, connection)
+
+
+def _row_values(obj, columns):
+    values = []
+    for attname, adapt, constant in columns:
+        if attname is None:
+            values.append(constant)
+            continue
+        value = getattr(obj, attname)
+        values.append(adapt(value) if adapt is not None and value is not None else value)
+    return values
+
+
+def bulk_insert(model, objs, batch_size=5000):
+    if not objs:
+        return
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    now = timezone.now()
+    columns = []
+    for field in fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            # [설명] created_at / updated_at: pre_save와 같은 값, DB 형식 변환은 한 번만
+            for obj in objs:
+                setattr(obj, field.attname, now)
+            columns.append((None, None, _adapter(field)(now)))
+        else:
+            columns.append((field.attname, _adapter(field), None))
+
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(objs), batch_size):
+            cursor.executemany(sql, [_row_values(obj, columns) for obj in objs[start:start + batch_size]])
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from urllib.parse import unquote_plus
+from zoneinfo import ZoneInfo
+
+import requests
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .benefit_usage import record_expenses
+from .importer import CategoryResolver, RowError
+from .models import CardSyncState, Expense
+
+# CODEF 카드 승인내역(approval-list) 증분 동기화
+# [설명] 보유 카드마다 동기화 커서(cursor_date)부터 오늘까지 승인내역을 가져와 Expense로 저장합니다.
+# [설명] HTTP 호출은 asyncio로 여러 카드를 동시에 진행하되, 세션 풀 크기(CODEF_SYNC_CONCURRENCY)만큼만 동시에 요청하고
+# [설명] 세션(커넥션)은 카드 간에 재사용합니다. DB 저장은 sync_to_async로 한 스레드에서 차례로 처리합니다.
+# [설명] 승인 한 건 = (보유 카드, 승인일, 승인번호) 해시(import_hash)로 멱등 저장 — 다시 가져오면 취소/부분취소만 반영합니다.
+# [설명] sync_card_approvals 명령과 스케줄러(crawling/main.py)가 호출합니다.
+
+APPROVAL_LIST_PATH = '/v1/kr/card/p/account/approval-list'
+SUCCESS_CODE = 'CF-00000'
+INITIAL_LOOKBACK_DAYS = 90  # [설명] 커서가 없는(처음 동기화하는) 카드의 조회 시작일
+REQUEST_TIMEOUT = 30  # [설명] 요청당 타임아웃 (초)
+CODEF_TIME_ZONE = ZoneInfo('Asia/Seoul')  # [설명] CODEF 승인일시는 한국 시간
+
+
+class CodefError(Exception):
+    # [설명] CODEF 응답 코드가 성공이 아닌 경우
+    pass
+
+
+def parse_response(text):
+    # [설명] CODEF 응답 본문은 URL 인코딩된 JSON (샌드박스 등 일부는 평문 JSON)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(unquote_plus(text))
+
+
+class CodefClient:
+    # [설명] 세션 풀 = 동시 요청 상한, 요청은 스레드에서 실행 (requests는 동기 클라이언트)
+    def __init__(self, host=None, access_token=None, concurrency=None, timeout=REQUEST_TIMEOUT):
+        self.url = (host or settings.CODEF_API_HOST).rstrip('/') + APPROVAL_LIST_PATH
+        self.access_token = access_token or settings.CODEF_ACCESS_TOKEN
+        self.concurrency = concurrency or settings.CODEF_SYNC_CONCURRENCY
+        self.timeout = timeout
+        self._all_sessions = [self._new_session() for _ in range(self.concurrency)]
+        self._sessions = None
+        self._loop = None
+
+    def _new_session(self):
+        session = requests.Session()
+        session.headers.update({
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json',
+        })
+        return session
+
+    async def approval_list(self, payload):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # [설명] 실행(이벤트 루프)마다 대기열만 새로 만들고 세션(커넥션)은 그대로 재사용
+            self._loop, self._sessions = loop, asyncio.Queue()
+            for session in self._all_sessions:
+                self._sessions.put_nowait(session)
+        session = await self._sessions.get()
+        try:
+            return await asyncio.to_thread(self._post, session, payload)
+        finally:
+            self._sessions.put_nowait(session)
+
+    def _post(self, session, payload):
+        response = session.post(self.url, data=json.dumps(payload), timeout=self.timeout)
+        response.raise_for_status()
+        body = parse_response(response.text)
+        result = body.get('result') or {}
+        if result.get('code') != SUCCESS_CODE:
+            raise CodefError(f"{result.get('code')} {result.get('message', '')}".strip())
+        data = body.get('data') or []
+        return [data] if isinstance(data, dict) else data  # [설명] 결과가 한 건이면 객체로 옴
+
+    def close(self):
+        for session in self._all_sessions:
+            session.close()
+
+
+def approval_payload(state, start_date, end_date):
+    payload = {
+        'connectedId': state.connected_id,
+        'organization': state.organization,
+        'startDate': start_date.strftime('%Y%m%d'),
+        'endDate': end_date.strftime('%Y%m%d'),
+        'inquiryType': '1',  # [설명] 전체 카드 조회
+    }
+    card_number = ''.join(filter(str.isdigit, state.user_card.card_number or ''))
+    if card_number:
+        payload.update({'inquiryType': '0', 'cardNo': card_number})  # [설명] 카드 번호가 있으면 해당 카드만 조회
+    return payload
+
+
+def approval_hash(user_card_id, approval):
+    raw = f"codef\x1f{user_card_id}\x1f{approval.get('resApprovalDate')}\x1f{approval.get('resApprovalNo')}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _to_int(value):
+    return int(str(value or 0).replace(',', '') or 0)
+
+
+def map_approval(approval):
+    # [설명] 승인내역 한 건 → {spent_at, amount, merchant_name, status}, 거절 건은 None
+    # [설명] resCancelYN: 0 정상 / 1 취소 / 2 부분취소 / 3 거절
+    cancel = str(approval.get('resCancelYN') or '0')
+    if cancel == '3':
+        return None
+    try:
+        spent_at = datetime.strptime(
+            approval['resApprovalDate'] + (approval.get('resApprovalTime') or '').ljust(6, '0')[:6], '%Y%m%d%H%M%S'
+        ).replace(tzinfo=CODEF_TIME_ZONE)
+        amount = _to_int(approval.get('resUsedAmount'))
+    except (KeyError, TypeError, ValueError):
+        raise RowError('승인일시 또는 금액 형식이 올바르지 않습니다.')
+    if cancel == '2':
+        amount -= _to_int(approval.get('resCancelAmount'))
+    merchant_name = (approval.get('resMemberStoreName') or '').strip()[:100]
+    if not merchant_name:
+        raise RowError('가맹점명이 없습니다.')
+    return {
+        'spent_at': spent_at, 'amount': amount, 'merchant_name': merchant_name,
+        'status': 'CANCELLED' if cancel == '1' else 'PAID',
+    }
+
+
+def store_approvals(state, approvals, end_date, categories):
+    # [설명] 카드 한 장의 승인내역을 하나의 트랜잭션으로 저장하고 커서를 옮김
+    stats = {'fetched': len(approvals), 'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+    user_card = state.user_card
+    with transaction.atomic():
+        mapped = {}
+        for approval in approvals:
+            try:
+                values = map_approval(approval)
+            except RowError:
+                values = None
+            if values is None:
+                stats['skipped'] += 1
+                continue
+            mapped[approval_hash(user_card.user_card_id, approval)] = values
+
+        existing = {expense.import_hash: expense for expense in Expense.objects.filter(import_hash__in=list(mapped))}
+        new = []
+        for key, values in mapped.items():
+            expense = existing.get(key)
+            if expense is None:
+                new.append(Expense(
+                    user_id=user_card.user_id, user_card_id=user_card.user_card_id,
+                    import_hash=key, **values,
+                ))
+            elif expense.deleted_at is None and (expense.status, expense.amount) != (values['status'], values['amount']):
+                # [설명] 취소/부분취소 — save() 시그널이 혜택 원장·통계·큐브를 갱신
+                expense.status, expense.amount = values['status'], values['amount']
+                expense.save(update_fields=['status', 'amount', 'updated_at'])
+                stats['updated'] += 1
+            else:
+                stats['unchanged'] += 1
+
+        categories.assign(new)  # [설명] 가맹점명으로 카테고리 일괄 분류
+        record_expenses(new)  # [설명] benefit_received 계산 + 원장·통계·큐브 반영 (INSERT 전에 호출)
+        Expense.objects.bulk_create(new)
+        stats['inserted'] = len(new)
+
+        state.cursor_date = end_date  # [설명] 다음 조회는 이 날짜부터 (당일 늦은 승인까지 다시 받아 멱등 저장)
+        state.last_synced_at = timezone.now()
+        state.last_error = None
+        state.save(update_fields=['cursor_date', 'last_synced_at', 'last_error', 'updated_at'])
+    return stats
+
+
+def record_sync_failure(state, message):
+    state.last_error = message[:255]
+    state.save(update_fields=['last_error', 'updated_at'])
+
+
+async def sync_states(states, client, today):
+    # [설명] 여러 카드를 동시에 동기화 (동시 요청 수는 client 세션 풀로 제한)
+    categories = CategoryResolver()
+
+    async def sync_one(state):
+        start_date = state.cursor_date or today - timedelta(days=INITIAL_LOOKBACK_DAYS)
+        try:
+            approvals = await client.approval_list(approval_payload(state, start_date, today))
+        except (requests.RequestException, CodefError, ValueError) as e:
+            await sync_to_async(record_sync_failure)(state, str(e))
+            return {'failed_cards': 1}
+        try:
+            return {**await sync_to_async(store_approvals)(state, approvals, today, categories), 'synced_cards': 1}
+        except DatabaseError as e:
+            # [설명] 저장 실패(무결성 오류 등)는 이 카드만 롤백하고 실패로 기록 — 커서는 그대로라 다음 동기화에서 다시 가져옴
+            await sync_to_async(record_sync_failure)(state, f'저장 실패: {e}')
+            return {'failed_cards': 1}
+
+    totals = {'cards': len(states), 'synced_cards': 0, 'failed_cards': 0,
+              'fetched': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+    # [설명] 예상하지 못한 오류가 나도 나머지 카드는 끝까지 동기화하고 실패 카드로 집계
+    for result in await asyncio.gather(*(sync_one(state) for state in states), return_exceptions=True):
+        if isinstance(result, Exception):
+            result = {'failed_cards': 1}
+        for key, value in result.items():
+            totals[key] += value
+    return totals
+
+
+def sync_card_approvals(user_id=None, client=None, today=None):
+    # [설명] 동기화 대상 카드 전체(또는 한 사용자) 동기화 → 집계 dict
+    states = CardSyncState.objects.filter(is_active=True, user_card__deleted_at__isnull=True).select_related('user_card')
+    if user_id is not None:
+        states = states.filter(user_card__user_id=user_id)
+    states = list(states.order_by('sync_id'))
+    today = today or timezone.localtime(timezone.now(), CODEF_TIME_ZONE).date()
+
+    own_client = client is None
+    client = client or CodefClient()
+    try:
+        return async_to_sync(sync_states)(states, client, today)
+    finally:
+        if own_client:
+            client.close()
@@ -0,0 +1,127 @@
+import csv
+import importlib.util
+import io
+
+from django.utils import timezone
+
+from .listing import expense_queryset, iter_expense_chunks
+
+# 지출 내역 내보내기 (CSV / Parquet 스트리밍)
+# [설명] 기간 내 지출을 카테고리명·카드명과 함께 키셋 청크 단위로 읽어, 청크마다 바로 내보냅니다. (쿼리셋 전체를 메모리에 올리지 않음)
+# [설명] CSV는 청크마다 텍스트를 흘려보내고, Parquet은 PARQUET_ROW_GROUP_SIZE행마다 row group 하나를 써서 흘려보냅니다.
+# [설명] 내보내기 API(ExportExpensesView)와 export_expenses 명령이 함께 사용합니다.
+
+CHUNK_SIZE = 2000  # [설명] 쿼리 한 번에 읽는 행 수
+PARQUET_ROW_GROUP_SIZE = 20000  # [설명] Parquet row group 하나의 행 수 (쓰기 전까지 메모리에 모아두는 양)
+
+EXPORT_FIELDS = ('expense_id', 'spent_at', 'merchant_name', 'amount', 'benefit_received', 'status',
+                 'category__category_name', 'user_card__card__card_name')
+EXPORT_COLUMNS = ('expense_id', 'spent_at', 'merchant_name', 'amount', 'benefit_received', 'status',
+                  'category_name', 'card_name')
+EXPORT_FORMATS = {
+    # [설명] 형식 → (Content-Type, 파일 확장자)
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class ExportError(Exception):
+    # [설명] 내보내기를 시작할 수 없는 경우 (필요한 패키지 없음 등)
+    pass
+
+
+def check_format(fmt):
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError('파일 형식은 csv 또는 parquet이어야 합니다.')
+    if fmt == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        raise ExportError('Parquet 내보내기에는 pyarrow 패키지가 필요합니다.')
+
+
+def export_queryset(user_id, start, end):
+    return expense_queryset(user_id, start, end, EXPORT_FIELDS)
+
+
+def _values(row):
+    return [row[field] for field in EXPORT_FIELDS]
+
+
+def iter_csv(queryset, chunk_size=CHUNK_SIZE):
+    # [설명] UTF-8 BOM + 헤더, 이후 청크마다 CSV 텍스트(bytes) 반환 — 결제 시각은 settings.TIME_ZONE 기준 ISO 8601
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')  # [설명] 엑셀에서 한글이 깨지지 않도록 BOM 포함
+    for rows in iter_expense_chunks(queryset, chunk_size=chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            values = _values(row)
+            values[1] = timezone.localtime(values[1]).isoformat()
+            writer.writerow(values)
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    # [설명] Parquet 작성기가 쓴 바이트를 모아뒀다가 drain()으로 꺼내는 쓰기 전용 스트림 (순차 쓰기만 사용)
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet(queryset, chunk_size=CHUNK_SIZE, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    # [설명] row group 단위로 Parquet 바이트 반환 (푸터는 마지막 청크에 포함)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('expense_id', pa.int64()),
+        ('spent_at', pa.timestamp('us', tz='UTC')),
+        ('merchant_name', pa.string()),
+        ('amount', pa.int64()),
+        ('benefit_received', pa.int64()),
+        ('status', pa.string()),
+        ('category_name', pa.string()),
+        ('card_name', pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    columns = [[] for _ in EXPORT_FIELDS]
+
+    def write_row_group():
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+        for values in columns:
+            values.clear()
+
+    for rows in iter_expense_chunks(queryset, chunk_size=chunk_size):
+        for row in rows:
+            for values, field in zip(columns, EXPORT_FIELDS):
+                values.append(row[field])
+        if len(columns[0]) >= row_group_size:
+            write_row_group()
+            yield sink.drain()
+    if columns[0]:
+        write_row_group()
+    writer.close()
+    yield sink.drain()
+
+
+def iter_export(queryset, fmt):
+    check_format(fmt)
+    return iter_parquet(queryset) if fmt == 'parquet' else iter_csv(queryset)
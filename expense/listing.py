@@ -0,0 +1,130 @@
+import base64
+import json
+from datetime import date, datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Expense
+from .rollups import month_bounds
+
+# 지출 내역 키셋(커서) 페이지네이션 / JSON Lines 스트리밍
+# [설명] (spent_at, expense_id) 내림차순으로 정렬하고, 다음 페이지는 OFFSET 대신 "마지막 행보다 이전" 조건으로 조회합니다.
+# [설명] 몇 페이지를 넘기든 (user, spent_at, expense_id) 인덱스 범위만 읽고, 응답당 메모리는 페이지 크기로 고정됩니다.
+# [설명] 스트리밍도 같은 키셋 조건으로 청크를 이어 읽습니다. (MySQL 드라이버는 결과 전체를 클라이언트에 받아두므로
+# [설명] 쿼리 하나를 .iterator()로 훑는 것만으로는 메모리가 일정하지 않음)
+# [설명] ASGI(uvicorn)에서는 동기 이터레이터를 Django가 list()로 전부 모은 뒤 보내므로, streaming_body()로 청크마다 스레드에서 읽는 async 이터레이터로 바꿔 넘깁니다.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 1000  # [설명] 스트리밍 시 쿼리 한 번에 읽는 행 수
+
+EXPENSE_FIELDS = ('expense_id', 'merchant_name', 'amount', 'spent_at', 'status',
+                  'category__category_name', 'user_card__card__card_name')
+
+
+def encode_cursor(spent_at, expense_id):
+    raw = f'{spent_at.isoformat()}|{expense_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    # [설명] 잘못된 커서면 ValueError
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        spent_at, expense_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(spent_at), int(expense_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f'잘못된 커서입니다: {e}')
+
+
+def parse_range(params):
+    # [설명] month(YYYY-MM) 또는 start~end(YYYY-MM-DD, 종료일 포함, 기본 오늘) → [시작, 끝) aware datetime, 잘못되면 ValueError
+    if params.get('month'):
+        year, month = map(int, params['month'].split('-'))
+        return month_bounds(year, month)  # [설명] spent_at 인덱스를 타도록 범위 조건 사용
+    if not params.get('start'):
+        raise ValueError('조회 월(month) 또는 시작일(start)이 필요합니다.')
+    start_day = date.fromisoformat(params['start'])
+    end_day = date.fromisoformat(params['end']) if params.get('end') else timezone.localdate()
+    if start_day > end_day:
+        raise ValueError('시작일이 종료일보다 늦을 수 없습니다.')
+    return (timezone.make_aware(datetime.combine(start_day, time.min)),
+            timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min)))
+
+
+def expense_queryset(user_id, start, end, fields=EXPENSE_FIELDS):
+    # [설명] [start, end) 기간의 지출 (최신순), 값만 조회 (모델 인스턴스 생성 없음)
+    return Expense.objects.filter(
+        user_id=user_id, spent_at__gte=start, spent_at__lt=end, deleted_at__isnull=True
+    ).order_by('-spent_at', '-expense_id').values(*fields)
+
+
+def before_cursor(queryset, cursor):
+    if not cursor:
+        return queryset
+    spent_at, expense_id = decode_cursor(cursor)
+    return queryset.filter(Q(spent_at__lt=spent_at) | Q(spent_at=spent_at, expense_id__lt=expense_id))
+
+
+def serialize_expense(row):
+    return {
+        "expense_id": row['expense_id'],
+        "merchant_name": row['merchant_name'],
+        "amount": row['amount'],
+        "spent_at": row['spent_at'].strftime("%Y-%m-%dT%H:%M:%S"),
+        "status": row['status'],
+        "category_name": row['category__category_name'] or "미분류",
+        "card_name": row['user_card__card__card_name'] or "기타",
+    }
+
+
+def fetch_page(queryset, limit, cursor=None):
+    # [설명] (직렬화된 지출 목록, 다음 커서 또는 None) — limit + 1건을 읽어 다음 페이지 여부 판단
+    rows = list(before_cursor(queryset, cursor)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['spent_at'], rows[-1]['expense_id'])
+    return [serialize_expense(row) for row in rows], next_cursor
+
+
+def iter_expense_chunks(queryset, cursor=None, chunk_size=STREAM_CHUNK_SIZE):
+    # [설명] 키셋 조건으로 chunk_size건씩 이어 읽어 행 목록을 차례로 반환 (메모리에는 한 청크만 유지)
+    while True:
+        rows = list(before_cursor(queryset, cursor)[:chunk_size].iterator())
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        cursor = encode_cursor(rows[-1]['spent_at'], rows[-1]['expense_id'])
+
+
+def iter_json_lines(queryset, cursor=None, chunk_size=STREAM_CHUNK_SIZE):
+    # [설명] 지출 한 건 = JSON 한 줄, 청크마다 한 번에 반환
+    for rows in iter_expense_chunks(queryset, cursor, chunk_size):
+        yield ''.join(json.dumps(serialize_expense(row), ensure_ascii=False) + '\n' for row in rows)
+
+
+async def aiter_chunks(chunks):
+    # [설명] 동기 청크 이터레이터를 한 청크씩 스레드에서 진행하는 async 이터레이터 (DB 조회는 청크마다 sync_to_async)
+    iterator = iter(chunks)
+    done = object()
+    try:
+        while True:
+            chunk = await sync_to_async(next)(iterator, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close)()  # [설명] 연결이 끊겨 중간에 멈춘 경우에도 생성기 정리
+
+
+def streaming_body(request, chunks):
+    # [설명] StreamingHttpResponse 본문 — ASGI 요청이면 async 이터레이터, WSGI면 동기 이터레이터 그대로
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return aiter_chunks(chunks)
+    return chunks
@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from expense.subscriptions import DEFAULT_USER_CHUNK, detect_subscriptions
+
+
+class Command(BaseCommand):
+    help = '지출 내역에서 정기 결제(같은 가맹점·비슷한 금액·약 한 달 간격)를 감지해 구독 정보를 생성/갱신합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', help='감지할 사용자 ID (여러 번 지정 가능, 생략하면 전체)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_USER_CHUNK, help='한 번에 처리하는 사용자 수')
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        result = detect_subscriptions(user_ids=options['user'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ 정기 결제 감지 완료 ({time.perf_counter() - started_at:.2f}s): 사용자 {result['users']}명 / "
+            f"지출 {result['expenses']}건 → 감지 {result['detected']}건 (생성 {result['created']}건, 갱신 {result['updated']}건) / "
+            f"구독취소 {result['cancelled']}건"
+        ))
@@ -0,0 +1,40 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from expense.export import EXPORT_FORMATS, ExportError, export_queryset, iter_export
+from expense.listing import parse_range
+
+
+class Command(BaseCommand):
+    help = '사용자의 지출 내역을 카테고리명·카드명과 함께 CSV / Parquet 파일로 내보냅니다. (청크 단위 스트리밍)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, required=True, help='내보낼 사용자 ID')
+        parser.add_argument('--month', help='대상 월 (YYYY-MM)')
+        parser.add_argument('--start', help='시작일 (YYYY-MM-DD, --month 대신 사용)')
+        parser.add_argument('--end', help='종료일 (YYYY-MM-DD, 포함, 기본 오늘)')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', help='파일 형식')
+        parser.add_argument('--output', default='-', help='저장할 파일 경로 (생략하면 표준 출력)')
+
+    def handle(self, *args, **options):
+        try:
+            start, end = parse_range({key: options[key] for key in ('month', 'start', 'end')})
+            chunks = iter_export(export_queryset(options['user'], start, end), options['format'])
+        except (ValueError, ExportError) as e:
+            raise CommandError(str(e))
+
+        started_at = time.perf_counter()
+        written = 0
+        out = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+
+        if options['output'] != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ 내보내기 완료 ({time.perf_counter() - started_at:.2f}s): {options['output']} ({written:,} bytes)"
+            ))
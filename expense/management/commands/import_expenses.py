@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from expense.importer import DEFAULT_BATCH_SIZE, ExpenseImporter, FileFormatError, detect_format, iter_rows, text_stream
+
+
+class Command(BaseCommand):
+    help = 'CSV / JSON Lines 지출 파일을 스트리밍으로 읽어 일괄 저장합니다. (자연키 해시로 중복 건너뜀)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='가져올 파일 경로')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='파일 형식 (생략하면 확장자로 판단)')
+        parser.add_argument('--user', type=int, help='모든 행을 이 사용자의 지출로 저장 (생략하면 user_id 컬럼 사용)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='배치(트랜잭션)당 행 수')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        importer = ExpenseImporter(user_id=options['user'], batch_size=options['batch_size'])
+        started_at = time.perf_counter()
+
+        try:
+            with open(options['path'], 'rb') as f:
+                result = importer.run(iter_rows(text_stream(f), fmt))
+        except OSError as e:
+            raise CommandError(f'파일을 열 수 없습니다: {e}')
+        except FileFormatError as e:
+            raise CommandError(f"가져오기 중단 ({e}) — 그 앞까지 저장 {importer.result()['inserted']}건")
+
+        elapsed = time.perf_counter() - started_at
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"{error['line']}행: {error['reason']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"완료 ({elapsed:.2f}s, {result['read'] / elapsed if elapsed else 0:,.0f}행/s): 읽은 행 {result['read']}건 / "
+            f"저장 {result['inserted']}건 / 중복 {result['duplicates']}건 / 실패 {result['failed']}건"
+        ))
@@ -0,0 +1,89 @@
+from itertools import groupby
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from cards.benefit_engine import get_benefit_matrix
+from expense.benefit_usage import allocate_benefits, month_key, usage_cache_key
+from expense.bulk import bulk_upsert
+from expense.models import CardBenefitUsage, Expense
+from expense.rollups import month_bounds
+
+
+class Command(BaseCommand):
+    help = ('지출 내역을 결제 순서대로 다시 훑어 혜택 원장(CardBenefitUsage)과 지출별 받은 혜택(benefit_received)을 다시 만듭니다. '
+            '(배포 시 기존 지출 적재 --all 1회 필수, 카드 혜택 변경 후 재실행)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', action='append', help='재계산할 월 (YYYY-MM, 여러 번 지정 가능), 생략하면 이번 달')
+        parser.add_argument('--all', action='store_true', help='지출이 있는 모든 월 재계산 (기존 지출로 원장 최초 적재)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_update / upsert 배치 크기')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            months = sorted({month_key(dt) for dt in Expense.objects.datetimes('spent_at', 'month')})
+        else:
+            months = options['month'] or [timezone.localtime().strftime('%Y-%m')]
+        matrix = get_benefit_matrix()
+
+        for target_month in months:
+            keys, expenses = self.rebuild_month(matrix, target_month, options['batch_size'])
+            # [설명] 사용자별 월 지출·받은 혜택 통계와 분포도 새 원장 기준으로 다시 만듦
+            call_command('rebuild_monthly_stats', month=target_month, stdout=self.stdout)
+            self.stdout.write(f'{target_month}: 원장 변경 {keys}건 / 지출 혜택 변경 {expenses}건')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ 혜택 원장 재계산 완료: {len(months)}개월'))
+
+    def rebuild_month(self, matrix, target_month, batch_size):
+        # [설명] 한 달 재계산 — (user_card, category)마다 그 달 지출을 결제 순서로 배분 (apply_usage_changes와 같은 방식)
+        start, end = month_bounds(*map(int, target_month.split('-')))
+        with transaction.atomic():
+            # [설명] 그 달 원장 행을 잠가 재계산 중 들어오는 지출 기록과 겹치지 않게 함
+            ledger = {
+                (user_card_id, category_id): (user_id, spent, benefit)
+                for user_card_id, category_id, user_id, spent, benefit in
+                CardBenefitUsage.objects.select_for_update().filter(target_month=target_month).values_list(
+                    'user_card_id', 'category_id', 'user_id', 'spent_amount', 'benefit_amount')
+            }
+            expenses = Expense.objects.filter(
+                spent_at__gte=start, spent_at__lt=end, status='PAID', deleted_at__isnull=True,
+                user_card__isnull=False, category__isnull=False,
+            ).select_related('user_card').order_by('user_card_id', 'category_id', 'spent_at', 'expense_id').only(
+                'expense_id', 'user_id', 'user_card_id', 'category_id', 'amount', 'spent_at', 'benefit_received',
+                'user_card__card_id')
+
+            rows, changed, users = [], [], set()
+            changed_count = 0
+            for (user_card_id, category_id), group in groupby(expenses.iterator(chunk_size=2000),
+                                                              key=lambda e: (e.user_card_id, e.category_id)):
+                group = list(group)
+                before = [expense.benefit_received for expense in group]
+                spent, benefit = allocate_benefits(matrix, group[0].user_card.card_id, category_id, group)
+                changed.extend(expense for expense, value in zip(group, before) if expense.benefit_received != value)
+                user_id = group[0].user_id
+                if ledger.pop((user_card_id, category_id), None) != (user_id, spent, benefit):
+                    rows.append(CardBenefitUsage(user_id=user_id, user_card_id=user_card_id, category_id=category_id,
+                                                 target_month=target_month, spent_amount=spent, benefit_amount=benefit))
+                    users.add(user_id)
+                if len(changed) >= batch_size:
+                    Expense.objects.bulk_update(changed, ['benefit_received'], batch_size=batch_size)
+                    users.update(expense.user_id for expense in changed)
+                    changed_count += len(changed)
+                    changed = []
+            Expense.objects.bulk_update(changed, ['benefit_received'], batch_size=batch_size)
+            users.update(expense.user_id for expense in changed)
+            changed_count += len(changed)
+
+            # [설명] 더 이상 지출이 없는 원장 행(전부 취소/삭제)은 0으로
+            for (user_card_id, category_id), (user_id, spent, benefit) in ledger.items():
+                if spent or benefit:
+                    rows.append(CardBenefitUsage(user_id=user_id, user_card_id=user_card_id, category_id=category_id,
+                                                 target_month=target_month, spent_amount=0, benefit_amount=0))
+                    users.add(user_id)
+            bulk_upsert(CardBenefitUsage, rows, ['user_card', 'category', 'target_month'],
+                        ['spent_amount', 'benefit_amount', 'updated_at'], batch_size=batch_size)
+
+        for user_id in users:
+            cache.delete(usage_cache_key(user_id, target_month))
+        return len(rows), changed_count
@@ -0,0 +1,51 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from expense.models import Expense, ExpenseDailyRollup, ExpenseHourlyRollup
+from expense.rollups import local_day_hour
+
+
+class Command(BaseCommand):
+    help = '지출 내역으로 일별/시간대별 지출 큐브를 다시 만듭니다. (초기 적재·정합성 복구용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='특정 사용자만 재계산 (user_id)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create 배치 크기')
+
+    def handle(self, *args, **options):
+        user_id = options['user']
+        batch_size = options['batch_size']
+
+        # [설명] 결제 완료·미삭제 지출을 한 번만 스트리밍하며 큐브 키별로 누적
+        daily = defaultdict(lambda: [0, 0])
+        hourly = defaultdict(lambda: [0, 0])
+        expenses = Expense.objects.filter(deleted_at__isnull=True, status='PAID')
+        if user_id:
+            expenses = expenses.filter(user_id=user_id)
+        for uid, category_id, spent_at, amount in expenses.values_list(
+                'user_id', 'category_id', 'spent_at', 'amount').iterator(chunk_size=5000):
+            day, hour = local_day_hour(spent_at)
+            daily[(uid, day, category_id)][0] += amount
+            daily[(uid, day, category_id)][1] += 1
+            hourly[(uid, day, hour)][0] += amount
+            hourly[(uid, day, hour)][1] += 1
+
+        daily_rows = ExpenseDailyRollup.objects.all()
+        hourly_rows = ExpenseHourlyRollup.objects.all()
+        if user_id:
+            daily_rows = daily_rows.filter(user_id=user_id)
+            hourly_rows = hourly_rows.filter(user_id=user_id)
+
+        with transaction.atomic():
+            daily_rows.delete()
+            hourly_rows.delete()
+            ExpenseDailyRollup.objects.bulk_create([
+                ExpenseDailyRollup(user_id=uid, day=day, category_id=category_id, amount=amount, count=count)
+                for (uid, day, category_id), (amount, count) in daily.items()
+            ], batch_size=batch_size)
+            ExpenseHourlyRollup.objects.bulk_create([
+                ExpenseHourlyRollup(user_id=uid, day=day, hour=hour, amount=amount, count=count)
+                for (uid, day, hour), (amount, count) in hourly.items()
+            ], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ 지출 큐브 재계산 완료: 일별 {len(daily)}행 / 시간대별 {len(hourly)}행'))
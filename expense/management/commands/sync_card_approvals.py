@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from expense.codef_sync import CodefClient, sync_card_approvals
+
+
+class Command(BaseCommand):
+    help = 'CODEF 카드 승인내역을 동기화 커서부터 가져와 지출로 저장합니다. (여러 카드 동시 조회, 중복 저장 없음)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='이 사용자의 카드만 동기화 (생략하면 전체)')
+        parser.add_argument('--concurrency', type=int, help='동시에 조회하는 카드 수 (기본: settings.CODEF_SYNC_CONCURRENCY)')
+
+    def handle(self, *args, **options):
+        client = CodefClient(concurrency=options['concurrency'])
+        started_at = time.perf_counter()
+        try:
+            result = sync_card_approvals(user_id=options['user'], client=client)
+        finally:
+            client.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ 카드 승인내역 동기화 완료 ({time.perf_counter() - started_at:.2f}s): "
+            f"카드 {result['synced_cards']}/{result['cards']}장 (실패 {result['failed_cards']}장) / "
+            f"승인 {result['fetched']}건 → 저장 {result['inserted']}건, 취소 반영 {result['updated']}건, "
+            f"변경 없음 {result['unchanged']}건, 건너뜀 {result['skipped']}건"
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0001_initial'),
+        ('expense', '0003_subscription_user_alter_expense_user'),
+        ('users', '0007_alter_user_gender'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardBenefitUsage',
+            fields=[
+                ('usage_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('target_month', models.CharField(max_length=7)),
+                ('spent_amount', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(db_column='category_id', on_delete=django.db.models.deletion.CASCADE, to='category.category')),
+                ('user', models.ForeignKey(db_column='user_id', on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('user_card', models.ForeignKey(db_column='user_card_id', on_delete=django.db.models.deletion.CASCADE, to='users.usercard')),
+            ],
+            options={
+                'db_table': 'card_benefit_usages',
+                'indexes': [models.Index(fields=['user', 'target_month'], name='idx_usage_user_month')],
+                'constraints': [models.UniqueConstraint(fields=('user_card', 'category', 'target_month'), name='uniq_card_benefit_usage')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense', '0005_expense_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cardbenefitusage',
+            name='benefit_amount',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
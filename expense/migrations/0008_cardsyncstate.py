@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 02:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense', '0007_expense_import_hash'),
+        ('users', '0009_cohortcategorystat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardSyncState',
+            fields=[
+                ('sync_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('connected_id', models.CharField(max_length=100)),
+                ('organization', models.CharField(max_length=4)),
+                ('cursor_date', models.DateField(blank=True, null=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.CharField(blank=True, max_length=255, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user_card', models.OneToOneField(db_column='user_card_id', on_delete=django.db.models.deletion.CASCADE, related_name='sync_state', to='users.usercard')),
+            ],
+            options={
+                'db_table': 'card_sync_states',
+            },
+        ),
+    ]
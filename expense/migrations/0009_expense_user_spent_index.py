@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 02:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0002_merchantcategory'),
+        ('expense', '0008_cardsyncstate'),
+        ('users', '0009_cohortcategorystat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'spent_at', 'expense_id'], name='idx_expense_user_spent'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-18 03:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0002_merchantcategory'),
+        ('expense', '0009_expense_user_spent_index'),
+        ('users', '0009_cohortcategorystat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='merchant_key',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('user', 'merchant_key'), name='uniq_subscription_merchant'),
+        ),
+    ]
@@ -32,9 +32,14 @@ class Expense(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)  # [설명] 레코드 생성 시각
     updated_at = models.DateTimeField(auto_now=True)  # [설명] 레코드 수정 시각
     deleted_at = models.DateTimeField(null=True, blank=True)  # [설명] 소프트 삭제용
+    import_hash = models.CharField(max_length=64, null=True, blank=True, unique=True)  # [설명] 일괄 가져오기 중복 방지용 자연키 해시 (expense.importer)
 
     class Meta:
         db_table = 'expenses'  # [설명] 실제 DB 테이블명
+        indexes = [
+            # [설명] 사용자 지출 목록 키셋 페이지네이션 ((spent_at, expense_id) 순서로 범위 조회)
+            models.Index(fields=['user', 'spent_at', 'expense_id'], name='idx_expense_user_spent'),
+        ]
 
     def __str__(self):
         # [설명] admin 등에서 표시될 문자열
@@ -67,10 +72,112 @@ class Subscription(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)  # [설명] 레코드 생성 시각
     updated_at = models.DateTimeField(auto_now=True)  # [설명] 레코드 수정 시각
     deleted_at = models.DateTimeField(null=True, blank=True)  # [설명] 소프트 삭제용
+    merchant_key = models.CharField(max_length=100, null=True, blank=True)  # [설명] 정기 결제 감지로 연결된 정규화 가맹점명 (expense.subscriptions)
 
     class Meta:
         db_table = 'subscriptions'  # [설명] 실제 DB 테이블명
+        constraints = [
+            # [설명] 사용자당 가맹점 하나에 구독 하나 (직접 입력한 구독은 merchant_key가 NULL)
+            models.UniqueConstraint(fields=['user', 'merchant_key'], name='uniq_subscription_merchant'),
+        ]
 
     def __str__(self):
         # [설명] admin 등에서 표시될 문자열
-        return f'Subscription({self.subs_id}, {self.service_name}, {self.status})'
\ No newline at end of file
+        return f'Subscription({self.subs_id}, {self.service_name}, {self.status})'
+
+# 카드 혜택 원장 (보유 카드 × 카테고리(혜택) × 월)
+class CardBenefitUsage(models.Model):
+    # [설명] 지출이 기록될 때마다 증분 갱신되는 월별 카드·카테고리 사용 금액과 받은 혜택 (혜택 한도 잔여량·달성률·ROI 계산용)
+    # [설명] 카드 혜택은 (카드, 카테고리)마다 하나이므로 이 키가 곧 (보유 카드, 혜택, 월)입니다.
+    usage_id = models.BigAutoField(primary_key=True)  # [설명] PK
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, db_column='user_id')  # [설명] 사용자 (월별 일괄 조회용)
+    user_card = models.ForeignKey('users.UserCard', on_delete=models.CASCADE, db_column='user_card_id')  # [설명] 결제 카드
+    category = models.ForeignKey('category.Category', on_delete=models.CASCADE, db_column='category_id')  # [설명] 지출 카테고리
+    target_month = models.CharField(max_length=7)  # [설명] 대상 월 (YYYY-MM)
+    spent_amount = models.BigIntegerField(default=0)  # [설명] 해당 월 누적 결제 금액 (취소/삭제 제외)
+    benefit_amount = models.BigIntegerField(default=0)  # [설명] 해당 월 사용한 혜택 한도 = min(누적 결제 × 혜택율, 월 한도)
+    created_at = models.DateTimeField(auto_now_add=True)  # [설명] 레코드 생성 시각
+    updated_at = models.DateTimeField(auto_now=True)  # [설명] 레코드 수정 시각
+
+    class Meta:
+        db_table = 'card_benefit_usages'  # [설명] 실제 DB 테이블명
+        constraints = [
+            models.UniqueConstraint(fields=['user_card', 'category', 'target_month'], name='uniq_card_benefit_usage'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'target_month'], name='idx_usage_user_month'),  # [설명] 사용자 월별 조회
+        ]
+
+    def __str__(self):
+        # [설명] admin 등에서 표시될 문자열
+        return f'CardBenefitUsage({self.user_card_id}, {self.category_id}, {self.target_month}, {self.spent_amount})'
+
+
+# 일별 지출 큐브 (사용자 × 일 × 카테고리)
+class ExpenseDailyRollup(models.Model):
+    # [설명] 지출이 기록될 때마다 증분 갱신되는 일별 카테고리 지출 합계/건수 (기간 조회·월별 추이용)
+    rollup_id = models.BigAutoField(primary_key=True)  # [설명] PK
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, db_column='user_id')  # [설명] 사용자
+    day = models.DateField()  # [설명] 결제일 (settings.TIME_ZONE 기준)
+    category = models.ForeignKey('category.Category', on_delete=models.CASCADE, db_column='category_id')  # [설명] 지출 카테고리
+    amount = models.BigIntegerField(default=0)  # [설명] 결제 금액 합계 (취소/삭제 제외)
+    count = models.IntegerField(default=0)  # [설명] 결제 건수
+
+    class Meta:
+        db_table = 'expense_daily_rollups'  # [설명] 실제 DB 테이블명
+        constraints = [
+            # [설명] (user, day) 앞부분으로 기간 조회 인덱스 역할도 함
+            models.UniqueConstraint(fields=['user', 'day', 'category'], name='uniq_expense_daily_rollup'),
+        ]
+
+    def __str__(self):
+        # [설명] admin 등에서 표시될 문자열
+        return f'ExpenseDailyRollup({self.user_id}, {self.day}, {self.category_id}, {self.amount})'
+
+
+# 시간대별 지출 큐브 (사용자 × 일 × 시)
+class ExpenseHourlyRollup(models.Model):
+    # [설명] 요일/시간대 히트맵용 — 일별 큐브와 같은 경로로 증분 갱신
+    rollup_id = models.BigAutoField(primary_key=True)  # [설명] PK
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, db_column='user_id')  # [설명] 사용자
+    day = models.DateField()  # [설명] 결제일 (settings.TIME_ZONE 기준)
+    hour = models.PositiveSmallIntegerField()  # [설명] 결제 시각의 시 (0~23)
+    amount = models.BigIntegerField(default=0)  # [설명] 결제 금액 합계 (취소/삭제 제외)
+    count = models.IntegerField(default=0)  # [설명] 결제 건수
+
+    class Meta:
+        db_table = 'expense_hourly_rollups'  # [설명] 실제 DB 테이블명
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day', 'hour'], name='uniq_expense_hourly_rollup'),
+        ]
+
+    def __str__(self):
+        # [설명] admin 등에서 표시될 문자열
+        return f'ExpenseHourlyRollup({self.user_id}, {self.day}, {self.hour}, {self.amount})'
+
+
+# 카드 승인내역 동기화 상태 (CODEF approval-list)
+class CardSyncState(models.Model):
+    # [설명] 보유 카드마다 CODEF 연결 정보와 동기화 커서(마지막으로 가져온 승인일)를 보관 (expense.codef_sync)
+    sync_id = models.BigAutoField(primary_key=True)  # [설명] PK
+    user_card = models.OneToOneField(  # [설명] 동기화 대상 보유 카드
+        'users.UserCard',
+        on_delete=models.CASCADE,
+        db_column='user_card_id',
+        related_name='sync_state',
+    )
+    connected_id = models.CharField(max_length=100)  # [설명] CODEF 계정 연결 ID (connectedId)
+    organization = models.CharField(max_length=4)  # [설명] CODEF 카드사 기관코드 (예: 0301)
+    cursor_date = models.DateField(null=True, blank=True)  # [설명] 마지막으로 동기화한 승인일 (다음 조회의 startDate)
+    last_synced_at = models.DateTimeField(null=True, blank=True)  # [설명] 마지막 동기화 성공 시각
+    last_error = models.CharField(max_length=255, null=True, blank=True)  # [설명] 마지막 동기화 실패 사유 (성공 시 비움)
+    is_active = models.BooleanField(default=True)  # [설명] 동기화 대상 여부
+    created_at = models.DateTimeField(auto_now_add=True)  # [설명] 레코드 생성 시각
+    updated_at = models.DateTimeField(auto_now=True)  # [설명] 레코드 수정 시각
+
+    class Meta:
+        db_table = 'card_sync_states'  # [설명] 실제 DB 테이블명
+
+    def __str__(self):
+        # [설명] admin 등에서 표시될 문자열
+        return f'CardSyncState({self.user_card_id}, {self.organization}, {self.cursor_date})'
@@ -0,0 +1,163 @@
+from collections import defaultdict
+from datetime import date, datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import ExtractIsoWeekDay, TruncMonth
+from django.utils import timezone
+
+from .bulk import bulk_upsert
+from .models import ExpenseDailyRollup, ExpenseHourlyRollup
+
+# 지출 큐브 (일별 카테고리 / 일별 시간대) 증분 갱신 및 조회
+# [설명] Expense 원본을 훑지 않고 (user, day) 인덱스 범위만 읽어 임의 기간 합계, 월별 추이, 요일×시간 히트맵을 계산합니다.
+# [설명] 갱신은 카드 혜택 사용 현황과 같은 경로(expense.benefit_usage.record_expense_changes)에서 함께 이루어집니다.
+
+BULK_UPSERT_THRESHOLD = 20  # [설명] 이보다 키가 많으면 잠금 조회 1회 + upsert 문으로 갱신 (혜택 원장도 같은 기준)
+
+
+def local_day_hour(dt):
+    # [설명] 결제 시각 → (결제일, 시) (settings.TIME_ZONE 기준)
+    local = timezone.localtime(dt)
+    return local.date(), local.hour
+
+
+def month_bounds(year, month):
+    # [설명] 해당 월의 [시작, 다음 달 시작) aware datetime — spent_at 인덱스 범위 조회용
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    return start, end
+
+
+def expense_rollup_keys(expense):
+    # [설명] 지출 한 건이 큐브에 기여하는 (일별 키, 시간대 키, 금액) — 취소/소프트 삭제된 지출은 기여하지 않음
+    if expense.deleted_at is not None or expense.status != 'PAID':
+        return None
+    day, hour = local_day_hour(expense.spent_at)
+    return (expense.user_id, day, expense.category_id), (expense.user_id, day, hour), expense.amount
+
+
+def _upsert(model, lookup, amount, count):
+    updated = model.objects.filter(**lookup).update(amount=F('amount') + amount, count=F('count') + count)
+    if not updated:
+        try:
+            with transaction.atomic():
+                model.objects.create(amount=amount, count=count, **lookup)
+        except IntegrityError:
+            # [설명] 동시에 다른 요청이 먼저 행을 만든 경우 증분 갱신으로 재시도
+            model.objects.filter(**lookup).update(amount=F('amount') + amount, count=F('count') + count)
+
+
+def _bulk_upsert(model, key_fields, deltas):
+    # [설명] 키가 많을 때 (일괄 가져오기 등): 기존 행 값을 한 번에 잠가 읽고, 최종 값을 upsert 문 하나로 기록
+    deltas = {key: value for key, value in deltas.items() if value[0] or value[1]}
+    if not deltas:
+        return
+    days = [key[1] for key in deltas]
+    with transaction.atomic():
+        existing = {
+            tuple(row[:3]): row[3:]
+            for row in model.objects.select_for_update().filter(
+                user_id__in={key[0] for key in deltas}, day__gte=min(days), day__lte=max(days)
+            ).values_list(*key_fields, 'amount', 'count')
+        }
+        rows = []
+        for key, (amount, count) in deltas.items():
+            old_amount, old_count = existing.get(key, (0, 0))
+            rows.append(model(amount=old_amount + amount, count=old_count + count, **dict(zip(key_fields, key))))
+        bulk_upsert(model, rows, [field.removesuffix('_id') for field in key_fields], ['amount', 'count'])
+
+
+def apply_rollup_deltas(daily, hourly):
+    # [설명] {(user_id, day, category_id): [금액, 건수]}, {(user_id, day, hour): [금액, 건수]} 반영
+    # [설명] 키가 적으면 키마다 F 표현식 증분 갱신, 많으면 bulk 경로 사용
+    if len(daily) + len(hourly) > BULK_UPSERT_THRESHOLD:
+        _bulk_upsert(ExpenseDailyRollup, ('user_id', 'day', 'category_id'), daily)
+        _bulk_upsert(ExpenseHourlyRollup, ('user_id', 'day', 'hour'), hourly)
+        return
+    for (user_id, day, category_id), (amount, count) in daily.items():
+        if amount or count:
+            _upsert(ExpenseDailyRollup, {'user_id': user_id, 'day': day, 'category_id': category_id}, amount, count)
+    for (user_id, day, hour), (amount, count) in hourly.items():
+        if amount or count:
+            _upsert(ExpenseHourlyRollup, {'user_id': user_id, 'day': day, 'hour': hour}, amount, count)
+
+
+def collect_rollup_deltas(expenses, sign, daily, hourly):
+    # [설명] 지출 목록의 기여분을 daily/hourly 델타 dict에 누적
+    for expense in expenses:
+        keys = expense_rollup_keys(expense)
+        if keys:
+            daily_key, hourly_key, amount = keys
+            daily[daily_key][0] += sign * amount
+            daily[daily_key][1] += sign
+            hourly[hourly_key][0] += sign * amount
+            hourly[hourly_key][1] += sign
+
+
+def new_rollup_deltas():
+    return defaultdict(lambda: [0, 0]), defaultdict(lambda: [0, 0])
+
+
+# ----- 조회 API -----
+
+def range_summary(user_id, start, end):
+    # [설명] [start, end] 기간(날짜, 양끝 포함)의 카테고리별 지출 합계/건수
+    rows = (
+        ExpenseDailyRollup.objects.filter(user_id=user_id, day__gte=start, day__lte=end)
+        .values('category_id', 'category__category_name')
+        .annotate(amount=Sum('amount'), count=Sum('count'))
+        .order_by('-amount')
+    )
+    categories = [{
+        "category_id": row['category_id'],
+        "category_name": row['category__category_name'],
+        "amount": row['amount'],
+        "count": row['count'],
+    } for row in rows if row['count']]
+    return {
+        "total_amount": sum(c['amount'] for c in categories),
+        "total_count": sum(c['count'] for c in categories),
+        "categories": categories,
+    }
+
+
+def monthly_trend(user_id, end_month, months=12):
+    # [설명] end_month(date, 해당 월 1일)까지 최근 months개월 월별 합계 — 빈 달은 0으로 채움
+    month_starts = []
+    year, month = end_month.year, end_month.month
+    for _ in range(months):
+        month_starts.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    month_starts.reverse()
+
+    next_month = date(end_month.year + end_month.month // 12, end_month.month % 12 + 1, 1)
+    rows = (
+        ExpenseDailyRollup.objects.filter(user_id=user_id, day__gte=month_starts[0], day__lt=next_month)
+        .annotate(month=TruncMonth('day'))
+        .values('month')
+        .annotate(amount=Sum('amount'), count=Sum('count'))
+    )
+    totals = {row['month']: (row['amount'], row['count']) for row in rows}
+    return [{
+        "month": start.strftime('%Y-%m'),
+        "amount": totals.get(start, (0, 0))[0],
+        "count": totals.get(start, (0, 0))[1],
+    } for start in month_starts]
+
+
+def weekday_hour_heatmap(user_id, start, end):
+    # [설명] [start, end] 기간의 요일(월=0 ~ 일=6) × 시(0~23) 지출 합계 / 건수 7×24 행렬
+    amounts = [[0] * 24 for _ in range(7)]
+    counts = [[0] * 24 for _ in range(7)]
+    rows = (
+        ExpenseHourlyRollup.objects.filter(user_id=user_id, day__gte=start, day__lte=end)
+        .annotate(weekday=ExtractIsoWeekDay('day'))
+        .values('weekday', 'hour')
+        .annotate(amount=Sum('amount'), count=Sum('count'))
+    )
+    for row in rows:
+        amounts[row['weekday'] - 1][row['hour']] = row['amount']
+        counts[row['weekday'] - 1][row['hour']] = row['count']
+    return {"amounts": amounts, "counts": counts}
+
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .benefit_usage import record_expense_changes
+from .models import Expense
+
+
+# 지출 수정 전 상태 보관 (수정 시 이전 기여분을 빼기 위함)
+@receiver(pre_save, sender=Expense)
+def remember_previous_expense(sender, instance, **kwargs):
+    instance._previous_expense = Expense.objects.filter(pk=instance.pk).first() if instance.pk else None
+
+
+# 지출 저장 시 카드 혜택 사용 현황·지출 큐브 증분 갱신
+@receiver(post_save, sender=Expense)
+def update_usage_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_expense', None)
+    record_expense_changes(removed=[previous] if previous else [], added=[instance])
+
+
+# 지출 삭제 시 기여분 차감
+@receiver(post_delete, sender=Expense)
+def update_usage_on_delete(sender, instance, **kwargs):
+    record_expense_changes(removed=[instance])
@@ -0,0 +1,175 @@
+import calendar
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from category.classifier import normalize_merchant
+
+from .models import Expense, Subscription
+
+# 정기 결제(구독) 감지
+# [설명] 사용자 묶음(chunk)마다 최근 LOOKBACK_DAYS 지출을 한 번에 읽어 numpy 배열로 바꾼 뒤,
+# [설명] (사용자, 정규화 가맹점명) 그룹별로 "약 한 달 간격 + 비슷한 금액" 결제가 이어지는지 벡터 연산으로 판정합니다.
+# [설명] 감지된 정기 결제는 Subscription(merchant_key)로 생성/갱신하고 다음 결제 예정일을 예측합니다.
+# [설명] 사용자가 직접 입력한 구독은 서비스명이 같은 가맹점이면 그 구독을 갱신하고, 사용자가 삭제한 구독은 다시 만들지 않습니다.
+# [설명] detect_subscriptions 명령과 스케줄러(crawling/main.py)가 호출합니다.
+
+LOOKBACK_DAYS = 400  # [설명] 감지에 사용하는 지출 기간
+MIN_OCCURRENCES = 3  # [설명] 최소 결제 횟수
+MIN_INTERVAL_DAYS, MAX_INTERVAL_DAYS = 25, 35  # [설명] "한 달 간격"으로 보는 결제 간격
+AMOUNT_TOLERANCE = 0.1  # [설명] 직전 결제 대비 금액 변동 허용 비율
+IRREGULAR_RATIO = 0.25  # [설명] 간격/금액 조건을 벗어나도 되는 결제 간격 비율 (4번에 1번꼴 — 가격 인상·결제일 변경 허용)
+STALE_DAYS = 45  # [설명] 마지막 결제가 이보다 오래되면 정기 결제로 보지 않음
+CANCEL_GRACE_DAYS = 10  # [설명] 감지된 구독의 예정일이 이만큼 지나도 결제가 없으면 구독취소 처리
+DEFAULT_USER_CHUNK = 1000  # [설명] 한 번에 처리하는 사용자 수
+
+
+def add_month(day, anchor_day):
+    # [설명] 다음 달 같은 날 (말일을 넘으면 말일)
+    year, month = (day.year + 1, 1) if day.month == 12 else (day.year, day.month + 1)
+    return date(year, month, min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def predict_next_billing(last_day, today):
+    # [설명] 마지막 결제일의 다음 달 같은 날, 이미 지났으면 오늘 이후가 될 때까지 한 달씩
+    next_day = add_month(last_day, last_day.day)
+    while next_day < today:
+        next_day = add_month(next_day, last_day.day)
+    return next_day
+
+
+def find_recurring(rows, today):
+    # [설명] rows: [(user_id, merchant_name, amount, spent_at, user_card_id, category_id)]
+    # [설명] → [{user_id, merchant_key, service_name, monthly_fee, last_day, user_card_id, category_id}]
+    if not rows:
+        return []
+    user_ids, merchant_names, amounts, spent_ats, user_card_ids, category_ids = zip(*rows)
+
+    # [설명] 가맹점명 정규화는 서로 다른 이름마다 한 번만
+    key_codes, codes_by_name, keys = [], {}, []
+    for name in merchant_names:
+        code = codes_by_name.get(name)
+        if code is None:
+            key = normalize_merchant(name)
+            code = codes_by_name[name] = len(keys) if key else -1
+            if key:
+                keys.append(key)
+        key_codes.append(code)
+
+    n = len(rows)
+    key_codes = np.fromiter(key_codes, np.int64, n)
+    offset = timezone.localtime().utcoffset().total_seconds()  # [설명] settings.TIME_ZONE 기준 날짜
+    days = np.floor((np.fromiter((dt.timestamp() for dt in spent_ats), np.float64, n) + offset) / 86400).astype(np.int64)
+    amounts = np.fromiter(amounts, np.int64, n)
+    groups = np.fromiter(user_ids, np.int64, n) * (len(keys) + 1) + key_codes
+
+    valid = np.flatnonzero(key_codes >= 0)
+    order = valid[np.lexsort((days[valid], groups[valid]))]
+    g, d, a = groups[order], days[order], amounts[order]
+    if not len(g):
+        return []
+
+    same = np.r_[False, g[1:] == g[:-1]]
+    starts = np.flatnonzero(~same)
+    counts = np.diff(np.r_[starts, len(g)])
+    ends = starts + counts - 1
+
+    # [설명] 직전 결제와 "한 달 간격 + 비슷한 금액"이면 정기 결제 간격 1회
+    gaps = np.r_[0, np.diff(d)]
+    previous = np.r_[0, a[:-1]]
+    step = same & (gaps >= MIN_INTERVAL_DAYS) & (gaps <= MAX_INTERVAL_DAYS) \
+        & (np.abs(a - previous) <= AMOUNT_TOLERANCE * np.abs(previous))
+    regular = np.add.reduceat(step.astype(np.int64), starts)
+    intervals = counts - 1
+
+    detected = (counts >= MIN_OCCURRENCES) \
+        & (regular >= intervals - np.floor(intervals * IRREGULAR_RATIO)) \
+        & (today.toordinal() - (d[ends] + date(1970, 1, 1).toordinal()) <= STALE_DAYS)
+
+    results = []
+    for end in ends[detected]:
+        row = order[end]  # [설명] 그룹의 마지막 결제
+        results.append({
+            'user_id': user_ids[row],
+            'merchant_key': keys[key_codes[row]],
+            'service_name': merchant_names[row][:100],
+            'monthly_fee': int(amounts[row]),
+            'last_day': date.fromordinal(int(days[row]) + date(1970, 1, 1).toordinal()),
+            'user_card_id': user_card_ids[row],
+            'category_id': category_ids[row],
+        })
+    return results
+
+
+def apply_detections(user_ids, detections, today):
+    # [설명] 감지 결과 → Subscription 생성/갱신 → (생성 수, 갱신 수)
+    existing, manual = {}, {}
+    for sub in Subscription.objects.filter(user_id__in=user_ids):
+        if sub.merchant_key:
+            existing[(sub.user_id, sub.merchant_key)] = sub
+        else:
+            # [설명] 같은 서비스명이 여럿이면 삭제되지 않은 구독 우선
+            key = (sub.user_id, normalize_merchant(sub.service_name))
+            if key not in manual or manual[key].deleted_at is not None:
+                manual[key] = sub
+
+    to_create, to_update = [], []
+    now = timezone.now()
+    for found in detections:
+        key = (found['user_id'], found['merchant_key'])
+        sub = existing.get(key) or manual.get(key)
+        if sub is not None and sub.deleted_at is not None:
+            continue  # [설명] 사용자가 삭제한 구독은 다시 만들지 않음
+        if sub is None:
+            sub = Subscription(user_id=found['user_id'], service_name=found['service_name'], merchant_key=found['merchant_key'])
+            to_create.append(sub)
+        else:
+            sub.merchant_key = found['merchant_key']
+            sub.updated_at = now
+            to_update.append(sub)
+        sub.monthly_fee = found['monthly_fee']
+        sub.next_billing = predict_next_billing(found['last_day'], today)
+        sub.user_card_id = found['user_card_id']
+        sub.category_id = found['category_id']
+        sub.status = 'ACTIVE'
+
+    with transaction.atomic():
+        Subscription.objects.bulk_create(to_create, batch_size=1000)
+        Subscription.objects.bulk_update(
+            to_update, ['merchant_key', 'monthly_fee', 'next_billing', 'user_card_id', 'category_id', 'status', 'updated_at'],
+            batch_size=1000)
+    return len(to_create), len(to_update)
+
+
+def detect_subscriptions(user_ids=None, chunk_size=DEFAULT_USER_CHUNK, today=None):
+    # [설명] 전체(또는 지정한) 사용자의 정기 결제 감지 → 집계 dict
+    today = today or timezone.localdate()
+    since = timezone.make_aware(datetime.combine(today - timedelta(days=LOOKBACK_DAYS), time.min))
+    expenses = Expense.objects.filter(status='PAID', deleted_at__isnull=True, spent_at__gte=since)
+    all_users = user_ids is None
+    if all_users:
+        user_ids = expenses.values_list('user_id', flat=True).distinct().order_by('user_id')
+    user_ids = list(user_ids)
+
+    stats = {'users': len(user_ids), 'expenses': 0, 'detected': 0, 'created': 0, 'updated': 0, 'cancelled': 0}
+    for i in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[i:i + chunk_size]
+        rows = list(expenses.filter(user_id__in=chunk).values_list(
+            'user_id', 'merchant_name', 'amount', 'spent_at', 'user_card_id', 'category_id'
+        ).order_by().iterator(chunk_size=10000))
+        detections = find_recurring(rows, today)
+        created, updated = apply_detections(chunk, detections, today)
+        stats['expenses'] += len(rows)
+        stats['detected'] += len(detections)
+        stats['created'] += created
+        stats['updated'] += updated
+
+    # [설명] 감지된 구독 중 예정일이 지나도록 결제가 없는 구독 → 구독취소 (감지된 구독은 위에서 예정일이 오늘 이후로 갱신됨)
+    stale = Subscription.objects.filter(merchant_key__isnull=False, status='ACTIVE', deleted_at__isnull=True,
+                                        next_billing__lt=today - timedelta(days=CANCEL_GRACE_DAYS))
+    if not all_users:
+        stale = stale.filter(user_id__in=user_ids)
+    stats['cancelled'] = stale.update(status='CANCELED', updated_at=timezone.now())
+    return stats
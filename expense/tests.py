@@ -1,3 +1,719 @@
 from django.test import TestCase
 
 # Create your tests here.
+
+# 월별 지출 통계(MonthlyStat) 증분 갱신 기반 소비 패턴 분석 테스트
+import random
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from cards import benefit_engine
+from cards.models import Card, CardBenefit
+from category import classifier
+from category.models import Category
+from users.models import MonthlySpendSketch, MonthlyStat, User, UserCard
+from users.cohorts import rebuild_cohort_stats
+from users.monthly_stats import SKETCH_SHARDS, get_month_cohort, rebuild_month, sketch_shard
+from users.quantile_sketch import QuantileSketch, RELATIVE_ACCURACY
+from .models import Expense
+from .views import ConsumptionPatternAnalysisView
+
+
+class ExpenseFixtureMixin:
+    # [설명] 지출 테스트 공통 픽스처: 사용자 1명 + 카테고리 + 카드(+ 카드 혜택) + 보유 카드
+    # [설명] setUpTestData로 클래스당 한 번만 만들고 테스트마다 트랜잭션 롤백으로 되돌림 (클래스 속성으로 필요한 값만 바꿔 사용)
+    category_name = '식비'
+    card_name = '테스트 카드'
+    card_number = None
+    benefit = None  # [설명] (혜택율, 월 한도) — 지정하면 카드 혜택도 생성
+
+    @classmethod
+    def setUpTestData(cls):
+        reset_expense_caches()
+        cls.user = User.objects.create(email=f'{cls.__name__.lower()}@example.com', name='테스터', password='pw')
+        cls.category = Category.objects.create(category_name=cls.category_name)
+        cls.card = Card.objects.create(card_name=cls.card_name, company='신한카드')
+        if cls.benefit:
+            benefit_rate, benefit_limit = cls.benefit
+            CardBenefit.objects.create(card=cls.card, category=cls.category, benefit_rate=benefit_rate, benefit_limit=benefit_limit)
+        cls.user_card = UserCard.objects.create(user=cls.user, card=cls.card, card_number=cls.card_number)
+
+    def setUp(self):
+        reset_expense_caches()
+
+
+def reset_expense_caches():
+    # [설명] 테스트마다 카테고리·카드 ID가 달라지므로 혜택 행렬·가맹점 분류기·캐시(보유 카드/사용 현황)를 비움
+    benefit_engine._matrix = None
+    classifier._classifier = None
+    cache.clear()
+
+
+class ConsumptionPatternAnalysisViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(category_name='식비')
+        card = Card.objects.create(card_name='테스트 카드', company='신한카드')
+        self.spent_at = timezone.now()
+        self.month = timezone.localtime(self.spent_at).strftime('%Y-%m')
+        self.users = []
+        for i, amount in enumerate([10000, 20000, 40000]):
+            user = User.objects.create(email=f'stat{i}@example.com', name=f'사용자{i}', password='pw',
+                                       age_group='20대' if i < 2 else '30대', gender=True)
+            user_card = UserCard.objects.create(user=user, card=card)
+            Expense.objects.create(user=user, category=self.category, user_card=user_card,
+                                   amount=amount, merchant_name='가맹점', spent_at=self.spent_at)
+            self.users.append(user)
+
+    def analyze(self, user, **params):
+        request = APIRequestFactory().get('/api/v1/expense/analysis/', {'month': self.month, **params})
+        force_authenticate(request, user=user)
+        return ConsumptionPatternAnalysisView.as_view()(request).data['result']
+
+    def test_percentile_and_group_average_from_monthly_stats(self):
+        comparison = self.analyze(self.users[1])['comparison']
+        self.assertEqual(comparison['my_total_spent'], 20000)
+        self.assertEqual(comparison['group_avg_spent'], 23333)
+        self.assertEqual(comparison['percentile'], 33)  # [설명] 3명 중 1명이 나보다 적게 씀
+
+        # [설명] 소프트 삭제하면 통계와 분포에서 빠짐
+        expense = Expense.objects.get(user=self.users[0])
+        expense.deleted_at = timezone.now()
+        expense.save()
+        self.assertEqual(MonthlyStat.objects.get(user=self.users[0], target_month=self.month).total_spent, 0)
+        shards = MonthlySpendSketch.objects.filter(target_month=self.month).aggregate(
+            user_count=Sum('user_count'), total_spent=Sum('total_spent'))
+        self.assertEqual((shards['user_count'], shards['total_spent']), (2, 60000))
+        self.assertEqual(self.analyze(self.users[1])['comparison']['percentile'], 0)
+
+    def test_sketch_is_sharded_by_user_and_merged_on_read(self):
+        # [설명] 사용자마다 자기 샤드 행에만 기록됨
+        rows = {row.shard: row for row in MonthlySpendSketch.objects.filter(target_month=self.month)}
+        for user, amount in zip(self.users, [10000, 20000, 40000]):
+            row = rows[sketch_shard(user.user_id)]
+            self.assertEqual((row.user_count, row.total_spent), (1, amount))
+
+        # [설명] 재계산 결과도 같은 샤드 분배·같은 병합 결과
+        cohort = get_month_cohort(self.month)
+        rebuild_month(self.month, {user.user_id: (amount, 0) for user, amount in zip(self.users, [10000, 20000, 40000])})
+        self.assertEqual(MonthlySpendSketch.objects.filter(target_month=self.month).count(), SKETCH_SHARDS)
+        rebuilt = get_month_cohort(self.month)
+        self.assertEqual(rebuilt[:2], (3, 70000))
+        self.assertEqual(rebuilt[2].to_dict(), cohort[2].to_dict())
+
+    def test_cohort_comparison_reads_precomputed_stats(self):
+        self.assertEqual(rebuild_cohort_stats(self.month), 6)  # [설명] 식비 × (all, age 2개, gender 1개, both 2개)
+
+        cohort = self.analyze(self.users[1], cohort='age')['cohort_comparison']
+        self.assertEqual(cohort['cohort_key'], 'age:20대')
+        food = cohort['categories'][0]
+        self.assertEqual((food['my_spent'], food['cohort_avg_spent'], food['cohort_user_count']), (20000, 15000, 2))
+        self.assertEqual(food['percentile'], 50)
+        self.assertAlmostEqual(food['cohort_median_spent'], 10000, delta=100)  # [설명] 스케치 오차 1% 이내
+
+
+class QuantileSketchTest(SimpleTestCase):
+    def test_error_bound_and_merge(self):
+        rng = random.Random(7)
+        values = [rng.randint(1, 5_000_000) for _ in range(5000)]
+        left, right = QuantileSketch(), QuantileSketch()
+        for i, value in enumerate(values):
+            (left if i % 2 else right).add(value)
+        left.merge(right)
+        self.assertEqual(left.count, len(values))
+
+        values.sort()
+        for q in (0.1, 0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(left.quantile(q) - exact), exact * RELATIVE_ACCURACY * 1.01)
+
+        # [설명] 값 제거 후 다시 더하면 원래 분포와 같아야 함
+        left.remove(values[0])
+        left.add(values[0])
+        self.assertEqual(left.rank_below(values[-1] * (1 + 3 * RELATIVE_ACCURACY)), len(values))
+
+
+# 일별 지출 큐브 기반 기간별 지출 분석 테스트
+from datetime import datetime
+from .views import SpendingAnalyticsView
+
+
+class SpendingAnalyticsViewTest(ExpenseFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cafe = Category.objects.create(category_name='카페/디저트')
+        for category, amount, spent_at in [
+            (cls.category, 12000, datetime(2026, 3, 2, 12)),  # [설명] 월요일 12시
+            (cls.category, 8000, datetime(2026, 3, 2, 12, 30)),
+            (cls.cafe, 5000, datetime(2026, 3, 7, 15)),  # [설명] 토요일 15시
+            (cls.cafe, 4000, datetime(2026, 1, 10, 9)),
+        ]:
+            Expense.objects.create(user=cls.user, category=category, user_card=cls.user_card, amount=amount,
+                                   merchant_name='가맹점', spent_at=timezone.make_aware(spent_at))
+
+    def fetch(self, **params):
+        request = APIRequestFactory().get('/api/v1/expense/analytics/', params)
+        force_authenticate(request, user=self.user)
+        return SpendingAnalyticsView.as_view()(request).data['result']
+
+    def test_summary_trend_and_heatmap_follow_writes(self):
+        summary = self.fetch(start='2026-03-01', end='2026-03-31')
+        self.assertEqual((summary['total_amount'], summary['total_count']), (25000, 3))
+        self.assertEqual(summary['categories'][0]['category_name'], '식비')
+
+        # [설명] 소프트 삭제·금액 수정이 큐브에 반영되어야 함
+        expense = Expense.objects.get(amount=8000)
+        expense.deleted_at = timezone.now()
+        expense.save()
+        expense = Expense.objects.get(amount=5000)
+        expense.amount = 6000
+        expense.save()
+
+        trend = self.fetch(type='trend', end='2026-03-15', months=3)['months']
+        self.assertEqual([(m['month'], m['amount']) for m in trend],
+                         [('2026-01', 4000), ('2026-02', 0), ('2026-03', 18000)])
+
+        heatmap = self.fetch(type='heatmap', start='2026-03-01', end='2026-03-31')
+        self.assertEqual(heatmap['amounts'][0][12], 12000)
+        self.assertEqual(heatmap['counts'][0][12], 1)
+        self.assertEqual(heatmap['amounts'][5][15], 6000)
+
+
+# 혜택 원장 (Expense.benefit_received / 월 한도 소진) 테스트
+import io
+from django.core.management import call_command
+from .models import CardBenefitUsage
+
+
+class BenefitLedgerTest(ExpenseFixtureMixin, TestCase):
+    benefit = (10, 5000)
+
+    def setUp(self):
+        super().setUp()
+        self.spent_at = timezone.now()
+        self.month = timezone.localtime(self.spent_at).strftime('%Y-%m')
+
+    def spend(self, amount):
+        return Expense.objects.create(user=self.user, category=self.category, user_card=self.user_card, amount=amount,
+                                      merchant_name='식당', spent_at=self.spent_at)
+
+    def test_benefit_received_follows_monthly_cap(self):
+        first, second = self.spend(30000), self.spend(30000)
+        self.assertEqual(Expense.objects.get(pk=first.pk).benefit_received, 3000)
+        self.assertEqual(Expense.objects.get(pk=second.pk).benefit_received, 2000)  # [설명] 남은 한도만큼만
+
+        usage = CardBenefitUsage.objects.get(user_card=self.user_card, category=self.category, target_month=self.month)
+        self.assertEqual((usage.spent_amount, usage.benefit_amount), (60000, 5000))
+
+        # [설명] 취소하면 혜택 0원, 원장은 한도 아래로 돌아감
+        first.status = 'CANCELLED'
+        first.save()
+        self.assertEqual(Expense.objects.get(pk=first.pk).benefit_received, 0)
+        self.assertEqual(Expense.objects.get(pk=second.pk).benefit_received, 3000)  # [설명] 한도가 풀린 만큼 다시 배분
+        self.assertEqual(MonthlyStat.objects.get(user=self.user, target_month=self.month).total_benefit, 3000)
+
+        request = APIRequestFactory().get('/api/v1/expense/analysis/', {'month': self.month})
+        force_authenticate(request, user=self.user)
+        status = ConsumptionPatternAnalysisView.as_view()(request).data['result']['benefit_status']
+        self.assertEqual((status['total_benefit_received'], status['max_benefit_limit']), (3000, 5000))
+        self.assertEqual(status['achievement_rate'], 60.0)
+
+    def test_edit_and_delete_reallocate_month_benefits(self):
+        expenses = [self.spend(20000), self.spend(20000), self.spend(20000)]  # [설명] 2000 + 2000 + 1000 (한도 5000)
+
+        def received():
+            return [Expense.objects.get(pk=e.pk).benefit_received for e in expenses if Expense.objects.filter(pk=e.pk).exists()]
+
+        def ledger():
+            return CardBenefitUsage.objects.get(user_card=self.user_card, category=self.category, target_month=self.month).benefit_amount
+
+        self.assertEqual(received(), [2000, 2000, 1000])
+        expenses[0].amount = 5000  # [설명] 첫 결제 금액 수정 → 뒤 결제들이 남은 한도를 다시 나눠 받음
+        expenses[0].save()
+        self.assertEqual(received(), [500, 2000, 2000])
+        self.assertEqual(sum(received()), ledger())
+
+        expenses[1].delete()
+        self.assertEqual(received(), [500, 2000])
+        self.assertEqual(sum(received()), ledger())
+
+    def test_rebuild_backfills_ledger_from_existing_expenses(self):
+        expenses = [self.spend(30000), self.spend(30000)]
+        # [설명] 원장 도입 전 데이터: 원장 행도 지출별 혜택도 없음
+        CardBenefitUsage.objects.all().delete()
+        Expense.objects.update(benefit_received=0)
+        MonthlyStat.objects.update(total_benefit=0)
+
+        call_command('rebuild_benefit_ledger', all=True, stdout=io.StringIO())
+        self.assertEqual([Expense.objects.get(pk=e.pk).benefit_received for e in expenses], [3000, 2000])
+        usage = CardBenefitUsage.objects.get(user_card=self.user_card, category=self.category, target_month=self.month)
+        self.assertEqual((usage.spent_amount, usage.benefit_amount), (60000, 5000))
+        self.assertEqual(MonthlyStat.objects.get(user=self.user, target_month=self.month).total_benefit, 5000)
+
+    def test_rebuild_reallocates_after_benefit_change(self):
+        expenses = [self.spend(30000), self.spend(30000)]  # [설명] 3000 + 2000 (한도 5000)
+        CardBenefit.objects.update(benefit_rate=5, benefit_limit=2000)
+        benefit_engine._matrix = None
+
+        call_command('rebuild_benefit_ledger', month=[self.month], stdout=io.StringIO())
+        self.assertEqual([Expense.objects.get(pk=e.pk).benefit_received for e in expenses], [1500, 500])
+        usage = CardBenefitUsage.objects.get(user_card=self.user_card, category=self.category, target_month=self.month)
+        self.assertEqual(usage.benefit_amount, 2000)
+        self.assertEqual(MonthlyStat.objects.get(user=self.user, target_month=self.month).total_benefit, 2000)
+
+
+# 지출 일괄 가져오기 테스트
+from django.core.files.uploadedfile import SimpleUploadedFile
+from .models import ExpenseDailyRollup
+from .views import ImportExpensesView
+
+
+class ImportExpensesViewTest(ExpenseFixtureMixin, TestCase):
+    card_name = '가져오기 카드'
+    card_number = '1234-5678-9012-3456'
+    benefit = (10, 5000)
+
+    def upload(self, name, content, encoding='utf-8'):
+        return self.post(name, content.encode(encoding)).data['result']
+
+    def post(self, name, data):
+        request = APIRequestFactory().post('/api/v1/expense/expenses/import/',
+                                           {'file': SimpleUploadedFile(name, data)}, format='multipart')
+        force_authenticate(request, user=self.user)
+        return ImportExpensesView.as_view()(request)
+
+    def test_unreadable_file_stops_with_line_and_committed_count(self):
+        header = 'merchant_name,amount,spent_at,card,category\n'
+        good = '김밥 식당,30000,2026-03-02T12:00:00,3456,식비\n'
+        # [설명] 2번째 데이터 줄만 CP949 → 3번째 줄에서 중단, 그 앞 1건은 저장
+        response = self.post('expenses.csv', (header + good).encode('utf-8') + '한식당,1000,2026-03-03T12:00:00,3456,식비\n'.encode('cp949'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['line'], 3)
+        self.assertEqual(response.data['result']['inserted'], 1)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 1)
+
+        # [설명] 따옴표 없는 필드 안의 CR 등 깨진 CSV (csv.Error)
+        response = self.post('broken.csv', (header + '식\r당,1000,2026-03-03T12:00:00,3456,식비\n').encode('utf-8'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['line'], 2)
+        self.assertEqual(response.data['result']['inserted'], 0)
+
+    def test_csv_and_jsonl_import_with_dedup(self):
+        csv_content = ('merchant_name,amount,spent_at,card,category\n'
+                       '김밥 식당,30000,2026-03-02T12:00:00,3456,\n'
+                       '한식당,"40,000",2026-03-03 19:00:00,가져오기 카드,식비\n'
+                       '한식당,40000,2026-03-03 19:00:00,가져오기 카드,식비\n'  # [설명] 파일 안 중복
+                       '없는카드,1000,2026-03-03 19:00:00,9999,식비\n')
+        result = self.upload('expenses.csv', csv_content)
+        self.assertEqual((result['read'], result['inserted'], result['duplicates'], result['failed']), (4, 2, 1, 1))
+        self.assertEqual(result['errors'][0]['line'], 5)
+
+        # [설명] 같은 결제를 JSON Lines로 다시 올리면 (시간대 표기가 달라도) 중복으로 건너뜀
+        jsonl = '{"merchant": "김밥 식당", "amount": 30000, "time": "2026-03-02T21:00:00+09:00", "card": "%d"}\n' % self.user_card.pk
+        result = self.upload('expenses.jsonl', jsonl)
+        self.assertEqual((result['inserted'], result['duplicates']), (0, 1))
+
+        # [설명] bulk_create 경로도 혜택 원장·큐브가 반영되어야 함
+        self.assertEqual(sorted(Expense.objects.values_list('benefit_received', flat=True)), [2000, 3000])
+        self.assertEqual(ExpenseDailyRollup.objects.filter(user=self.user).count(), 2)
+
+
+# CODEF 승인내역 동기화 테스트 (녹화된 응답을 돌려주는 로컬 스텁 서버 사용)
+import json
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote_plus
+from unittest import mock
+from django.db import IntegrityError
+from . import codef_sync
+from .codef_sync import CodefClient, sync_card_approvals
+from .models import CardSyncState
+
+
+class _CodefStubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.received.append(payload)
+        body = self.server.responses[payload['cardNo']]
+        encoded = quote_plus(json.dumps(body, ensure_ascii=False)).encode('utf-8')  # [설명] CODEF처럼 URL 인코딩된 본문
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, *args):
+        pass
+
+
+def _approval(no, day, time_, amount, store, cancel='0'):
+    return {'resApprovalNo': no, 'resApprovalDate': day, 'resApprovalTime': time_, 'resUsedAmount': str(amount),
+            'resMemberStoreName': store, 'resCancelYN': cancel, 'resCancelAmount': '0'}
+
+
+class CodefSyncTest(ExpenseFixtureMixin, TestCase):
+    card_name = '동기화 카드'
+    benefit = (10, None)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cards = []
+        for i, number in enumerate(['1111-2222-3333-0001', '1111-2222-3333-0002', '1111-2222-3333-0003']):
+            user = User.objects.create(email=f'sync{i}@example.com', name='동기화', password='pw')
+            user_card = UserCard.objects.create(user=user, card=cls.card, card_number=number)
+            CardSyncState.objects.create(user_card=user_card, connected_id=f'conn-{i}', organization='0301')
+            cls.cards.append(user_card)
+
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _CodefStubHandler)
+        self.server.received = []
+        self.server.responses = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = CodefClient(host=f'http://127.0.0.1:{self.server.server_port}', access_token='t', concurrency=2)
+
+        ok = {'result': {'code': 'CF-00000', 'message': '성공'}}
+        self.server.responses = {
+            '1111222233330001': {**ok, 'data': [
+                _approval('A1', '20260301', '123000', 10000, '한식 식당'),
+                _approval('A2', '20260302', '090000', 5000, '분식 식당', cancel='3'),  # [설명] 거절 건은 건너뜀
+            ]},
+            '1111222233330002': {**ok, 'data': _approval('B1', '20260303', '190000', 8000, '식당')},  # [설명] 한 건이면 객체
+            '1111222233330003': {'result': {'code': 'CF-12345', 'message': '연결 오류'}, 'data': []},
+        }
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_incremental_idempotent_sync(self):
+        result = sync_card_approvals(client=self.client, today=date(2026, 3, 10))
+        self.assertEqual((result['synced_cards'], result['failed_cards']), (2, 1))
+        self.assertEqual((result['fetched'], result['inserted'], result['skipped']), (3, 2, 1))
+        self.assertEqual({p['startDate'] for p in self.server.received}, {'20251210'})  # [설명] 처음엔 90일 전부터
+
+        expense = Expense.objects.get(user_card=self.cards[0])
+        self.assertEqual((expense.amount, expense.benefit_received, expense.category_id), (10000, 1000, self.category.category_id))
+        self.assertEqual(CardSyncState.objects.get(user_card=self.cards[0]).cursor_date, date(2026, 3, 10))
+        self.assertIn('CF-12345', CardSyncState.objects.get(user_card=self.cards[2]).last_error)
+
+        # [설명] 다시 동기화: 커서부터 조회, 취소된 승인만 반영되고 중복 저장 없음
+        self.server.received.clear()
+        self.server.responses['1111222233330001']['data'][0]['resCancelYN'] = '1'
+        result = sync_card_approvals(client=self.client, today=date(2026, 3, 11))
+        self.assertEqual((result['inserted'], result['updated'], result['unchanged']), (0, 1, 1))
+        self.assertEqual({p['startDate'] for p in self.server.received if p['cardNo'] != '1111222233330003'}, {'20260310'})
+        self.assertEqual(Expense.objects.count(), 2)
+        self.assertEqual(Expense.objects.get(user_card=self.cards[0]).status, 'CANCELLED')
+        self.assertEqual(CardBenefitUsage.objects.get(user_card=self.cards[0]).spent_amount, 0)
+
+    def test_store_failure_is_recorded_per_card(self):
+        store_approvals = codef_sync.store_approvals
+
+        def failing_store(state, *args):
+            if state.user_card_id == self.cards[0].user_card_id:
+                raise IntegrityError('중복 키')
+            if state.user_card_id == self.cards[1].user_card_id:
+                raise RuntimeError('예상하지 못한 오류')
+            return store_approvals(state, *args)
+
+        self.server.responses['1111222233330003'] = self.server.responses['1111222233330002']
+        with mock.patch.object(codef_sync, 'store_approvals', failing_store):
+            result = sync_card_approvals(client=self.client, today=date(2026, 3, 10))
+
+        # [설명] 두 카드가 실패해도 나머지 카드는 저장되고 집계도 남음
+        self.assertEqual((result['synced_cards'], result['failed_cards'], result['inserted']), (1, 2, 1))
+        failed = CardSyncState.objects.get(user_card=self.cards[0])
+        self.assertIn('중복 키', failed.last_error)
+        self.assertIsNone(failed.cursor_date)  # [설명] 커서는 그대로 → 다음 동기화에서 다시 가져옴
+        self.assertEqual(Expense.objects.filter(user_card=self.cards[2]).count(), 1)
+
+
+# 지출 내역 키셋 페이지네이션 / 스트리밍 테스트
+import asyncio
+from datetime import timezone as dt_timezone
+from functools import partial
+from urllib.parse import urlencode
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from rest_framework_simplejwt.tokens import AccessToken
+from .views import ShowExpense
+
+
+def asgi_get(user, path, params, on_body=lambda: None):
+    # [설명] ASGI 핸들러로 GET 요청 → (상태 코드, 헤더, [(본문 조각, 조각 전송 시점의 on_body() 값)])
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': urlencode(params).encode(),
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {AccessToken.for_user(user)}'.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def run():
+        received = asyncio.Event()
+
+        async def receive():
+            if received.is_set():
+                await asyncio.Event().wait()  # [설명] 연결이 끊기지 않은 상태 유지
+            received.set()
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append((message, on_body()))
+
+        await ASGIHandler()(scope, receive, send)
+
+    async_to_sync(run)()
+    start = messages[0][0]
+    bodies = [(message.get('body', b''), value) for message, value in messages[1:]]
+    return start['status'], dict(start['headers']), bodies
+
+
+class ShowExpensePaginationTest(ExpenseFixtureMixin, TestCase):
+    card_name = '목록 카드'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        same_time = datetime(2026, 3, 15, 12, 0, tzinfo=dt_timezone.utc)
+        for i in range(7):
+            # [설명] 같은 시각의 지출이 여러 건이어도 expense_id로 순서가 정해져야 함
+            spent_at = same_time if i < 3 else datetime(2026, 3, i + 1, 9, 0, tzinfo=dt_timezone.utc)
+            Expense.objects.create(user=cls.user, user_card=cls.user_card, category=cls.category, amount=1000 * (i + 1),
+                                   merchant_name=f'가맹점{i}', spent_at=spent_at, status='CANCELLED' if i == 6 else 'PAID')
+        Expense.objects.create(user=cls.user, user_card=cls.user_card, category=cls.category, amount=99999,
+                               merchant_name='다른 달', spent_at=datetime(2026, 4, 1, 9, 0, tzinfo=dt_timezone.utc))
+
+    def _get(self, **params):
+        request = APIRequestFactory().get('/api/v1/expense/expenses/', params)
+        force_authenticate(request, user=self.user)
+        return ShowExpense.as_view()(request)
+
+    def test_keyset_pages_cover_month_without_overlap(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            response = self._get(month='2026-03', limit=3, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            result = response.data['result']
+            if pages == 0:
+                self.assertEqual(result['total_spent'], sum(1000 * (i + 1) for i in range(6)))  # [설명] 취소 제외
+            else:
+                self.assertNotIn('total_spent', result)
+            seen += [(e['spent_at'], e['expense_id']) for e in result['expense_list']]
+            pages += 1
+            cursor = result['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_stream_json_lines_and_date_range(self):
+        response = self._get(start='2026-03-01', end='2026-04-01', stream='true')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(lines[0]['merchant_name'], '다른 달')
+
+        from . import listing
+        chunked = list(listing.iter_json_lines(listing.expense_queryset(
+            self.user.user_id, datetime(2026, 3, 1, tzinfo=dt_timezone.utc), datetime(2026, 5, 1, tzinfo=dt_timezone.utc)
+        ), chunk_size=2))
+        self.assertEqual(len(chunked), 4)  # [설명] 청크마다 한 번씩 반환
+        self.assertEqual([json.loads(line) for line in ''.join(chunked).splitlines()], lines)
+
+    def test_stream_is_sent_chunk_by_chunk_under_asgi(self):
+        # [설명] 배포 환경(uvicorn)과 같은 ASGI 핸들러로 요청 — 첫 청크가 전송될 때 아직 다음 청크를 읽지 않았어야 함
+        from . import listing
+        chunk_queries = []
+        before_cursor = listing.before_cursor
+
+        def counting_before_cursor(queryset, cursor):
+            chunk_queries.append(cursor)
+            return before_cursor(queryset, cursor)
+
+        with mock.patch.object(listing, 'before_cursor', counting_before_cursor), \
+                mock.patch('expense.views.iter_json_lines', partial(listing.iter_json_lines, chunk_size=2)):
+            status, headers, bodies = asgi_get(self.user, '/api/v1/expense/expenses/',
+                                               {'start': '2026-03-01', 'end': '2026-04-01', 'stream': 'true'},
+                                               on_body=lambda: len(chunk_queries))
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'Content-Type'], b'application/x-ndjson')
+        self.assertEqual([queries for body, queries in bodies if body][:2], [1, 2])  # [설명] 청크를 읽는 대로 전송
+        lines = b''.join(body for body, _ in bodies).decode().splitlines()
+        self.assertEqual(len(lines), 8)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self._get(month='2026-03', cursor='!!').status_code, 400)
+        self.assertEqual(self._get(month='2026-03', limit=0).status_code, 400)
+        self.assertEqual(self._get().status_code, 400)
+
+
+# 지출 내역 내보내기 테스트
+import csv
+import importlib.util
+import io
+import os
+import tempfile
+from unittest import skipIf, skipUnless
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from . import export
+from .views import ExportExpensesView
+
+
+class ExportExpensesTest(ExpenseFixtureMixin, TestCase):
+    card_name = '내보내기 카드'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for day in range(1, 6):
+            Expense.objects.create(user=cls.user, user_card=cls.user_card, category=cls.category, amount=1000 * day,
+                                   merchant_name=f'식당,{day}호점', spent_at=datetime(2026, 3, day, 12, 0, tzinfo=dt_timezone.utc))
+
+    def test_csv_endpoint_streams_joined_rows(self):
+        request = APIRequestFactory().get('/api/v1/expense/expenses/export/', {'start': '2026-03-02', 'end': '2026-03-04'})
+        force_authenticate(request, user=self.user)
+        response = ExportExpensesView.as_view()(request)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="expenses_20260302_20260304.csv"')
+
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(body.startswith('\ufeff'))
+        rows = list(csv.DictReader(io.StringIO(body[1:])))
+        self.assertEqual([row['merchant_name'] for row in rows], ['식당,4호점', '식당,3호점', '식당,2호점'])
+        self.assertEqual((rows[0]['category_name'], rows[0]['card_name'], rows[0]['amount']), ('식비', '내보내기 카드', '4000'))
+
+    def export_api(self, **params):
+        # [설명] URL 라우팅·DRF 형식 협상까지 거치도록 실제 경로로 요청
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        return client.get('/api/v1/expense/expenses/export/', {'month': '2026-03', **params})
+
+    def test_csv_file_format_param(self):
+        response = self.export_api(file_format='csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        body = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(body)))), 5)
+
+        response = self.export_api(file_format='xlsx')
+        self.assertEqual(response.status_code, 400)
+
+    def test_csv_export_streams_under_asgi(self):
+        # [설명] ASGI 핸들러로 요청 — 청크를 만드는 대로 전송되어야 함 (전체를 모은 뒤 보내지 않음)
+        produced = []
+
+        def counting_export(queryset, fmt):
+            for chunk in export.iter_csv(queryset, chunk_size=2):
+                produced.append(chunk)
+                yield chunk
+
+        with mock.patch('expense.views.iter_export', counting_export):
+            status, headers, bodies = asgi_get(self.user, '/api/v1/expense/expenses/export/',
+                                               {'month': '2026-03', 'file_format': 'csv'}, on_body=lambda: len(produced))
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'Content-Type'], b'text/csv; charset=utf-8')
+        self.assertEqual([count for body, count in bodies if body], [1, 2, 3, 4])  # [설명] 헤더 + 청크 3개
+        rows = list(csv.DictReader(io.StringIO(b''.join(body for body, _ in bodies).decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 5)
+
+    @skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow가 설치되어 있지 않음')
+    def test_parquet_file_format_param(self):
+        import pyarrow.parquet as pq
+        response = self.export_api(file_format='parquet')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="expenses_20260301_20260331.parquet"')
+        table = pq.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.num_rows, 5)
+
+    @skipIf(importlib.util.find_spec('pyarrow'), 'pyarrow가 설치되어 있음')
+    def test_parquet_without_pyarrow(self):
+        response = self.export_api(file_format='parquet')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pyarrow', response.json()['message'])
+
+    def test_command_writes_file_in_chunks(self):
+        queryset = export.export_queryset(self.user.user_id, *self._march())
+        self.assertEqual(len(list(export.iter_csv(queryset, chunk_size=2))), 1 + 3)  # [설명] 헤더 + 청크 3개
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'out.csv')
+            call_command('export_expenses', user=self.user.user_id, month='2026-03', output=path, stdout=io.StringIO())
+            with open(path, encoding='utf-8-sig') as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 5)
+
+    @staticmethod
+    def _march():
+        return datetime(2026, 3, 1, tzinfo=dt_timezone.utc), datetime(2026, 4, 1, tzinfo=dt_timezone.utc)
+
+    @skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow가 설치되어 있지 않음')
+    def test_parquet_round_trip(self):
+        import pyarrow.parquet as pq
+        queryset = export.export_queryset(self.user.user_id, *self._march())
+        data = b''.join(export.iter_parquet(queryset, chunk_size=2, row_group_size=2))
+        table = pq.read_table(io.BytesIO(data))
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.column('amount').to_pylist(), [5000, 4000, 3000, 2000, 1000])
+
+
+# 정기 결제(구독) 감지 테스트
+from .models import Subscription
+from datetime import date, timedelta
+from .subscriptions import detect_subscriptions, predict_next_billing
+
+
+class SubscriptionDetectionTest(ExpenseFixtureMixin, TestCase):
+    category_name = '디지털구독'
+    card_name = '구독 카드'
+
+    def setUp(self):
+        super().setUp()
+        self.today = date(2026, 6, 20)
+
+    def _charge(self, merchant_name, amount, day):
+        Expense.objects.create(user=self.user, user_card=self.user_card, category=self.category, amount=amount,
+                               merchant_name=merchant_name, spent_at=datetime(day.year, day.month, day.day, 3, tzinfo=dt_timezone.utc))
+
+    def test_detects_monthly_charges_and_keeps_user_choices(self):
+        for month, amount in [(2, 13500), (3, 13500), (4, 17000), (5, 17000), (6, 17000)]:
+            self._charge('NETFLIX.COM', amount, date(2026, month, 5))  # [설명] 가격 인상 1회는 허용
+        for day in range(1, 60, 7):
+            self._charge('동네 카페', 4500, date(2026, 4, 1) + timedelta(days=day))  # [설명] 매주 결제 → 구독 아님
+        for month in (1, 2, 3):
+            self._charge('헬스장', 50000, date(2026, month, 10))  # [설명] 3개월 전에 끊김 → 구독 아님
+        for month in (4, 5, 6):
+            self._charge('(주)멜론', 10900, date(2026, month, 15))
+            self._charge('왓챠', 7900, date(2026, month, 1))
+        Subscription.objects.create(user=self.user, user_card=self.user_card, category=self.category,
+                                    service_name='멜론', monthly_fee=9900, next_billing=date(2026, 1, 1))
+        Subscription.objects.create(user=self.user, user_card=self.user_card, category=self.category, service_name='왓챠',
+                                    monthly_fee=7900, next_billing=date(2026, 1, 1), deleted_at=timezone.now(), status='CANCELED')
+
+        stats = detect_subscriptions(today=self.today)
+        self.assertEqual((stats['detected'], stats['created'], stats['updated']), (3, 1, 1))
+
+        netflix = Subscription.objects.get(merchant_key='NETFLIXCOM')
+        self.assertEqual((netflix.service_name, netflix.monthly_fee, netflix.next_billing), ('NETFLIX.COM', 17000, date(2026, 7, 5)))
+        melon = Subscription.objects.get(service_name='멜론')
+        self.assertEqual((melon.merchant_key, melon.monthly_fee, melon.next_billing), ('멜론', 10900, date(2026, 7, 15)))
+        self.assertFalse(Subscription.objects.filter(service_name='왓챠', deleted_at__isnull=True).exists())
+
+        # [설명] 다시 실행해도 중복 생성 없음, 결제가 끊기면 예정일이 지난 뒤 구독취소
+        self.assertEqual(detect_subscriptions(today=self.today)['created'], 0)
+        stats = detect_subscriptions(today=date(2026, 8, 1))
+        self.assertEqual(stats['cancelled'], 2)
+        self.assertEqual(Subscription.objects.get(merchant_key='NETFLIXCOM').status, 'CANCELED')
+
+    def test_predict_next_billing_clamps_month_end(self):
+        self.assertEqual(predict_next_billing(date(2026, 1, 31), date(2026, 2, 1)), date(2026, 2, 28))
+        self.assertEqual(predict_next_billing(date(2026, 1, 31), date(2026, 3, 1)), date(2026, 3, 31))
+        self.assertEqual(predict_next_billing(date(2025, 12, 5), date(2025, 12, 6)), date(2026, 1, 5))
@@ -4,6 +4,10 @@ from .views import (
     DeleteSubscription,  # [설명] 구독 삭제 뷰
     ShowSubscription,  # [설명] 구독 목록 조회 뷰
     ShowExpense,  # [설명] 월간 지출 내역 조회 뷰
+    SpendingAnalyticsView,  # [설명] 기간별 지출 분석 뷰
+    ImportExpensesView,  # [설명] 지출 일괄 가져오기 뷰
+    CardSyncView,  # [설명] 카드 승인내역 동기화 뷰
+    ExportExpensesView,  # [설명] 지출 내역 내보내기 뷰
 )
 
 urlpatterns = [
@@ -13,6 +17,12 @@ urlpatterns = [
     
     # 지출 내역 조회 (예: /api/expenses/?month=2026-01)
     path('expenses/', ShowExpense.as_view(), name='show-expense'),  # [설명] 월간 지출 내역 조회
+    path('expenses/import/', ImportExpensesView.as_view(), name='import-expenses'),  # [설명] CSV / JSON Lines 지출 일괄 가져오기
+    path('expenses/export/', ExportExpensesView.as_view(), name='export-expenses'),  # [설명] CSV / Parquet 지출 내역 내보내기
+    path('expenses/sync/', CardSyncView.as_view(), name='card-sync'),  # [설명] CODEF 카드 승인내역 동기화 연결 / 상태 조회
+
+    # 기간별 지출 분석 (예: /api/analytics/?type=trend&months=12)
+    path('analytics/', SpendingAnalyticsView.as_view(), name='spending-analytics'),  # [설명] 기간 합계 / 월별 추이 / 요일·시간 히트맵
     
     # 구독 목록 조회 및 삭제
     path('subscriptions/', ShowSubscription.as_view(), name='show-subscription'),  # [설명] 구독 목록 조회
@@ -1,12 +1,25 @@
+from collections import defaultdict
+from datetime import date, timedelta
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from django.db.models import Sum, Avg
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from .models import Expense, Subscription
+from .models import CardSyncState, Expense, Subscription
 from cards.models import CardBenefit, Card
 from users.models import UserCard
+from users.monthly_stats import get_month_cohort, get_user_month_stat
+from cards.benefit_engine import get_benefit_matrix, get_owned_card_ids
+from users.cohorts import cohort_key, get_cohort_stats
+from users.quantile_sketch import QuantileSketch
+from .benefit_usage import get_monthly_usage
+from .rollups import month_bounds, monthly_trend, range_summary, weekday_hour_heatmap
+from .listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, expense_queryset, fetch_page, iter_json_lines, parse_range, streaming_body
+from .export import EXPORT_FORMATS, ExportError, check_format, export_queryset, iter_export
+from .importer import ExpenseImporter, FileFormatError, detect_format, iter_rows, text_stream
+from .codef_sync import sync_card_approvals
+from rest_framework.parsers import MultiPartParser
+from django.http import StreamingHttpResponse
 from category.models import Category
 
 # 1. 공통 Base 클래스 (인증 및 에러 응답 통일)
@@ -31,9 +44,13 @@ class BaseAuthView(APIView):
 class ConsumptionPatternAnalysisView(BaseAuthView):
     @extend_schema(
         summary="소비 패턴 분석",
-        description="특정 월의 지출을 그룹 평균과 비교하고 혜택 달성률 및 백분위를 분석합니다.",
+        description="특정 월의 지출을 그룹 평균과 비교하고 혜택 달성률 및 백분위를 분석합니다. "
+                    "cohort를 지정하면 같은 연령대/성별 사용자와 카테고리별로 비교한 결과(cohort_comparison)를 함께 반환합니다. "
+                    "(코호트 통계는 매일 밤 집계)",
         parameters=[
-            OpenApiParameter(name='month', description='조회 대상 월 (YYYY-MM)', required=True, type=str)
+            OpenApiParameter(name='month', description='조회 대상 월 (YYYY-MM)', required=True, type=str),
+            OpenApiParameter(name='cohort', description='비교 코호트 (age: 같은 연령대, gender: 같은 성별, both: 둘 다)',
+                             required=False, type=str, enum=['age', 'gender', 'both']),
         ],
         tags=['Expense']
     )
@@ -44,56 +61,39 @@ class ConsumptionPatternAnalysisView(BaseAuthView):
         if not target_month:
             return Response({"message": "필수 파라미터(month)가 누락되었습니다."}, status=400)
 
+        cohort_mode = request.query_params.get('cohort')
+        cohort = None
+        if cohort_mode:
+            if cohort_mode not in ('age', 'gender', 'both'):
+                return Response({"message": "cohort는 age, gender, both 중 하나여야 합니다."}, status=400)
+            cohort = cohort_key(cohort_mode, user.age_group, user.gender)
+            if cohort is None:
+                return Response({"message": "코호트 비교에 필요한 연령대/성별 정보가 없습니다."}, status=400)
+
         try:
             year, month = map(int, target_month.split('-'))
+            target_month = f'{year:04d}-{month:02d}'
             
             # 1. 내 지출 데이터 조회
-            my_expenses = Expense.objects.filter(
-                user=user, 
-                spent_at__year=year, 
-                spent_at__month=month,
-                deleted_at__isnull=True
-            )
-            
-            my_total_spent = my_expenses.aggregate(Sum('amount'))['amount__sum'] or 0
+            # [설명] 내 월 지출·받은 혜택은 MonthlyStat 한 행, 그룹 분포는 월별 스케치 샤드 행을 병합해 읽음 (지출 기록 시 증분 갱신)
+            my_total_spent, total_benefit_received = get_user_month_stat(user.user_id, target_month)
 
             # 2. 그룹(전체 유저) 평균 및 백분위 계산
-            # 모든 유저의 해당 월 총 지출 리스트를 가져옴
-            all_user_totals = Expense.objects.filter(
-                spent_at__year=year, 
-                spent_at__month=month, 
-                deleted_at__isnull=True
-            ).values('user').annotate(user_total=Sum('amount')).order_by('user_total')
+            total_users, group_total_spent, sketch = get_month_cohort(target_month)
+            group_avg_spent = (group_total_spent / total_users if total_users else 0) or 1
 
-            total_users = all_user_totals.count()
-            group_avg_spent = all_user_totals.aggregate(Avg('user_total'))['user_total__avg'] or 1
-            
-            # 내 위치(백분위) 계산
-            my_rank = 0
-            for index, entry in enumerate(all_user_totals):
-                if entry['user_total'] >= my_total_spent:
-                    my_rank = index
-                    break
-            
-            # 백분위 (0~100, 낮을수록 적게 씀)
-            percentile = round((my_rank / total_users) * 100) if total_users > 0 else 0
+            # 백분위 (0~100, 낮을수록 적게 씀) — 나보다 적게 쓴 사용자 비율
+            # [설명] 스케치 오차 범위: 내 지출과 ±1% 이내로 차이 나는 사용자만큼만 어긋날 수 있음
+            percentile = round((sketch.rank_below(my_total_spent) / total_users) * 100) if total_users > 0 else 0
             diff_percent = round(((my_total_spent - group_avg_spent) / group_avg_spent) * 100, 1)
 
-            # 3. 실시간 혜택 달성률 계산 (게이지바용)
-            total_benefit_received = 0
-            user_benefits = CardBenefit.objects.filter(card__usercard__user=user)
-            
-            for benefit in user_benefits:
-                cat_expense = my_expenses.filter(category=benefit.category).aggregate(Sum('amount'))['amount__sum'] or 0
-                if cat_expense > 0:
-                    raw_benefit = cat_expense * (float(benefit.benefit_rate) / 100)
-                    total_benefit_received += min(raw_benefit, benefit.benefit_limit or raw_benefit)
-
-            max_limit = user_benefits.aggregate(Sum('benefit_limit'))['benefit_limit__sum'] or 1
+            # 3. 혜택 달성률 계산 (게이지바용)
+            # [설명] 받은 혜택은 혜택 원장(카드·혜택별 월 한도 적용) 합계, 최대 한도는 보유 카드 월 한도 합계 (메모리 행렬)
+            max_limit = int(get_benefit_matrix().monthly_benefit_cap(get_owned_card_ids(user.user_id))) or 1
             achievement_rate = round((total_benefit_received / max_limit) * 100, 1)
 
             # 4. JSON 응답 (사용자 요구 형식 반영)
-            return Response({
+            result = {
                 "message": "소비 패턴 분석 데이터 조회 성공",
                 "result": {
                     "user_id": user.user_id,
@@ -109,11 +109,37 @@ class ConsumptionPatternAnalysisView(BaseAuthView):
                         "achievement_rate": min(achievement_rate, 100.0) # 100% 초과 방지
                     }
                 }
-            }, status=200)
+            }
+            if cohort:
+                result["result"]["cohort_comparison"] = self.cohort_comparison(user.user_id, target_month, cohort_mode, cohort)
+            return Response(result, status=200)
 
         except Exception as e:
             return Response({"message": str(e)}, status=500)
 
+    def cohort_comparison(self, user_id, target_month, cohort_mode, cohort):
+        # [설명] 내 카테고리별 지출(캐시된 사용 현황) vs 코호트 통계(야간 집계 테이블 1회 조회)
+        my_spent = defaultdict(int)
+        for (_, category_id), spent in get_monthly_usage(user_id, target_month).items():
+            my_spent[category_id] += spent
+
+        categories = []
+        for category_id, category_name, user_count, total_spent, median_spent, sketch in get_cohort_stats(target_month, cohort):
+            mine = my_spent.get(category_id, 0)
+            rank = QuantileSketch.from_dict(sketch).rank_below(mine)
+            categories.append({
+                "category_id": category_id,
+                "category_name": category_name,
+                "my_spent": mine,
+                "cohort_avg_spent": round(total_spent / user_count) if user_count else 0,
+                "cohort_median_spent": median_spent,
+                "percentile": round(rank / user_count * 100) if user_count else 0,
+                "cohort_user_count": user_count,
+            })
+        categories.sort(key=lambda c: c["my_spent"], reverse=True)
+
+        return {"cohort": cohort_mode, "cohort_key": cohort, "categories": categories}
+
 # 3. 구독 정보 삭제 (소프트 삭제)
 class DeleteSubscription(BaseAuthView):
     @extend_schema(
@@ -139,40 +165,47 @@ class DeleteSubscription(BaseAuthView):
 # 4. 소비 내역 조회
 class ShowExpense(BaseAuthView):
     @extend_schema(
-        summary="월간 소비 내역 조회",
-        description="특정 월의 전체 소비 내역 리스트를 조회합니다.",
+        summary="소비 내역 조회",
+        description="특정 월(month) 또는 기간(start~end)의 소비 내역을 최신순으로 조회합니다. "
+                    "응답의 next_cursor를 cursor로 넘기면 다음 페이지를 조회하며, total_spent(결제 취소 제외)는 첫 페이지에만 포함됩니다. "
+                    "stream=true면 기간 전체를 JSON Lines(application/x-ndjson)로 스트리밍합니다.",
         parameters=[
-            OpenApiParameter(name='month', description='조회 대상 월 (YYYY-MM)', required=True, type=str)
+            OpenApiParameter(name='month', description='조회 대상 월 (YYYY-MM)', required=False, type=str),
+            OpenApiParameter(name='start', description='시작일 (YYYY-MM-DD, month 대신 사용)', required=False, type=str),
+            OpenApiParameter(name='end', description='종료일 (YYYY-MM-DD, 포함, 기본 오늘)', required=False, type=str),
+            OpenApiParameter(name='limit', description=f'페이지 크기 (1~{MAX_PAGE_SIZE}, 기본 {DEFAULT_PAGE_SIZE})', required=False, type=int),
+            OpenApiParameter(name='cursor', description='이전 응답의 next_cursor', required=False, type=str),
+            OpenApiParameter(name='stream', description='true면 JSON Lines 스트리밍', required=False, type=bool),
         ],
         tags=['Expense']
     )
     def get(self, request):
-        target_month = request.query_params.get('month')
-        if not target_month:
-            return Response({"message": "조회 월(month)이 필요합니다."}, status=400)
-
+        params = request.query_params
         try:
-            year, month = map(int, target_month.split('-'))
-            expenses = Expense.objects.filter(
-                user=request.user, spent_at__year=year, spent_at__month=month, deleted_at__isnull=True
-            ).select_related('category', 'user_card__card')
-
-            total_spent = expenses.aggregate(total=Sum('amount'))['total'] or 0
-            expense_list = [{
-                "expense_id": e.expense_id,
-                "merchant_name": e.merchant_name,
-                "amount": e.amount,
-                "spent_at": e.spent_at.strftime("%Y-%m-%dT%H:%M:%S"),
-                "category_name": e.category.category_name if e.category else "미분류",
-                "card_name": e.user_card.card.card_name if e.user_card else "기타"
-            } for e in expenses]
+            start, end = parse_range(params)
+            limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+            cursor = params.get('cursor')
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError as e:
+            return Response({"message": f"조회 조건이 올바르지 않습니다: {e}"}, status=400)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return Response({"message": f"limit은 1~{MAX_PAGE_SIZE} 사이여야 합니다."}, status=400)
+        expenses = expense_queryset(request.user.user_id, start, end)
 
-            return Response({
-                "message": "월간 지출 내역 조회 성공",
-                "result": {"total_spent": total_spent, "expense_list": expense_list}
-            }, status=200)
-        except Exception as e:
-            return Response({"message": str(e)}, status=400)
+        if params.get('stream', '').lower() in ('1', 'true'):
+            # [설명] 기간 전체를 청크 단위 키셋 조회로 흘려보냄 (응답 크기와 관계없이 메모리 일정)
+            return StreamingHttpResponse(streaming_body(request, iter_json_lines(expenses, cursor)),
+                                         content_type='application/x-ndjson')
+
+        expense_list, next_cursor = fetch_page(expenses, limit, cursor)
+        result = {"expense_list": expense_list, "next_cursor": next_cursor, "has_more": next_cursor is not None}
+        if not cursor:
+            # [설명] 합계는 일별 지출 큐브에서 (지출 전체를 다시 합산하지 않음)
+            result["total_spent"] = range_summary(
+                request.user.user_id, timezone.localtime(start).date(), timezone.localtime(end).date() - timedelta(days=1)
+            )['total_amount']
+        return Response({"message": "지출 내역 조회 성공", "result": result}, status=200)
 
 
 # 5. 구독 내역 조회 (보안 및 데이터 보완 버전)
@@ -207,4 +240,176 @@ class ShowSubscription(BaseAuthView):
                 "result": sub_list
             }, status=200)
         except Exception as e:
-            return Response({"message": str(e)}, status=400)
\ No newline at end of file
+            return Response({"message": str(e)}, status=400)
+
+
+# 6. 기간별 지출 분석 (일별 지출 큐브 기반)
+class SpendingAnalyticsView(BaseAuthView):
+    @extend_schema(
+        summary="기간별 지출 분석",
+        description="일별 지출 큐브로 임의 기간의 카테고리별 합계(summary), 최근 N개월 추이(trend), "
+                    "요일×시간대 히트맵(heatmap)을 조회합니다.",
+        parameters=[
+            OpenApiParameter(name='type', description='조회 유형 (기본 summary)', required=False, type=str,
+                             enum=['summary', 'trend', 'heatmap']),
+            OpenApiParameter(name='start', description='시작일 (YYYY-MM-DD, 기본 이번 달 1일)', required=False, type=str),
+            OpenApiParameter(name='end', description='종료일 (YYYY-MM-DD, 포함, 기본 오늘) — trend는 종료일이 속한 월까지', required=False, type=str),
+            OpenApiParameter(name='months', description='trend 개월 수 (1~36, 기본 12)', required=False, type=int),
+        ],
+        tags=['Expense']
+    )
+    def get(self, request):
+        analytics_type = request.query_params.get('type', 'summary')
+        if analytics_type not in ('summary', 'trend', 'heatmap'):
+            return Response({"message": "type은 summary, trend, heatmap 중 하나여야 합니다."}, status=400)
+
+        try:
+            today = timezone.localdate()
+            end = date.fromisoformat(request.query_params['end']) if request.query_params.get('end') else today
+            start = date.fromisoformat(request.query_params['start']) if request.query_params.get('start') else end.replace(day=1)
+            months = int(request.query_params.get('months', 12))
+        except ValueError:
+            return Response({"message": "날짜는 YYYY-MM-DD, months는 숫자 형식이어야 합니다."}, status=400)
+        if start > end:
+            return Response({"message": "시작일이 종료일보다 늦을 수 없습니다."}, status=400)
+        if not 1 <= months <= 36:
+            return Response({"message": "months는 1~36 사이여야 합니다."}, status=400)
+
+        user_id = request.user.user_id
+        if analytics_type == 'trend':
+            result = {"months": monthly_trend(user_id, end.replace(day=1), months)}
+        elif analytics_type == 'heatmap':
+            result = {"start": start.isoformat(), "end": end.isoformat(), **weekday_hour_heatmap(user_id, start, end)}
+        else:
+            result = {"start": start.isoformat(), "end": end.isoformat(), **range_summary(user_id, start, end)}
+
+        return Response({"message": "기간별 지출 분석 조회 성공", "result": result}, status=200)
+
+
+# 7. 지출 일괄 가져오기 (파일 업로드)
+class ImportExpensesView(BaseAuthView):
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(
+        summary="지출 일괄 가져오기",
+        description="CSV 또는 JSON Lines 파일의 결제 내역(merchant_name, amount, spent_at, card, category)을 내 지출로 저장합니다. "
+                    "파일은 한 줄씩 읽어 배치 단위로 저장하며, 이미 저장된 결제(사용자·카드·시각·금액·가맹점이 같은 행)는 건너뜁니다. "
+                    "card는 보유 카드 ID, 카드 번호(뒤 4자리 가능) 또는 카드명입니다. "
+                    "UTF-8이 아니거나(CP949 등) CSV 형식이 깨진 파일은 400으로 중단하며 오류 줄 번호와 그 앞까지 저장된 건수를 함께 반환합니다.",
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"},
+                    "format": {"type": "string", "enum": ["csv", "jsonl"]},
+                },
+                "required": ["file"],
+            }
+        },
+        tags=['Expense']
+    )
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"message": "업로드할 파일(file)이 필요합니다."}, status=400)
+        fmt = request.data.get('format') or detect_format(upload.name)
+        if fmt not in ('csv', 'jsonl'):
+            return Response({"message": "format은 csv 또는 jsonl이어야 합니다."}, status=400)
+
+        # [설명] 업로드 파일(큰 파일은 임시 파일)을 그대로 스트리밍 — 전체를 메모리에 올리지 않음
+        importer = ExpenseImporter(user_id=request.user.user_id)
+        try:
+            result = importer.run(iter_rows(text_stream(upload.file), fmt))
+        except FileFormatError as e:
+            # [설명] 인코딩/CSV 형식 오류: 오류 줄 번호와 그 앞까지 저장된 건수(result.inserted)를 함께 반환 (다시 올리면 중복은 건너뜀)
+            return Response({"message": "지출 가져오기 중단", "line": e.line_no, "reason": e.reason,
+                             "result": importer.result()}, status=400)
+        return Response({"message": "지출 가져오기 완료", "result": result}, status=200)
+
+
+# 카드 승인내역 동기화 (CODEF) 연결 등록 / 상태 조회
+class CardSyncView(BaseAuthView):
+
+    @extend_schema(
+        summary="카드 승인내역 동기화 상태 조회",
+        description="CODEF 승인내역 동기화에 연결된 내 카드와 마지막 동기화 정보를 조회합니다.",
+        tags=['Expense']
+    )
+    def get(self, request):
+        states = CardSyncState.objects.filter(user_card__user=request.user).order_by('sync_id')
+        return Response({"message": "동기화 상태 조회 성공", "data": [{
+            "user_card_id": state.user_card_id,
+            "organization": state.organization,
+            "is_active": state.is_active,
+            "cursor_date": state.cursor_date,
+            "last_synced_at": state.last_synced_at,
+            "last_error": state.last_error,
+        } for state in states]}, status=200)
+
+    @extend_schema(
+        summary="카드 승인내역 동기화 연결",
+        description="보유 카드에 CODEF 연결 정보(connected_id, organization)를 등록하고 바로 승인내역을 동기화합니다. "
+                    "이후에는 스케줄러가 마지막 동기화 날짜부터 주기적으로 가져옵니다.",
+        request={
+            "application/json": {
+                "type": "object",
+                "properties": {
+                    "user_card_id": {"type": "integer"},
+                    "connected_id": {"type": "string"},
+                    "organization": {"type": "string", "example": "0301"},
+                },
+                "required": ["user_card_id", "connected_id", "organization"],
+            }
+        },
+        tags=['Expense']
+    )
+    def post(self, request):
+        connected_id = request.data.get('connected_id')
+        organization = str(request.data.get('organization') or '')
+        if not connected_id or len(organization) != 4:
+            return Response({"message": "connected_id와 4자리 organization이 필요합니다."}, status=400)
+        user_card = UserCard.objects.filter(
+            user_card_id=request.data.get('user_card_id'), user=request.user, deleted_at__isnull=True
+        ).first()
+        if user_card is None:
+            return Response({"message": "보유 카드를 찾을 수 없습니다."}, status=404)
+
+        CardSyncState.objects.update_or_create(user_card=user_card, defaults={
+            'connected_id': connected_id, 'organization': organization, 'is_active': True,
+        })
+        result = sync_card_approvals(user_id=request.user.user_id)
+        return Response({"message": "카드 승인내역 동기화 완료", "result": result}, status=200)
+
+
+# 지출 내역 내보내기 (CSV / Parquet)
+class ExportExpensesView(BaseAuthView):
+
+    @extend_schema(
+        summary="지출 내역 내보내기",
+        description="특정 월(month) 또는 기간(start~end)의 지출 내역을 카테고리명·카드명과 함께 파일로 내려받습니다. "
+                    "CSV는 읽는 대로 스트리밍하고, Parquet은 row group 단위로 스트리밍합니다.",
+        parameters=[
+            OpenApiParameter(name='month', description='대상 월 (YYYY-MM)', required=False, type=str),
+            OpenApiParameter(name='start', description='시작일 (YYYY-MM-DD, month 대신 사용)', required=False, type=str),
+            OpenApiParameter(name='end', description='종료일 (YYYY-MM-DD, 포함, 기본 오늘)', required=False, type=str),
+            # [설명] 'format'은 DRF URL 형식 지정(URL_FORMAT_OVERRIDE)에 예약된 이름이라 file_format 사용
+            OpenApiParameter(name='file_format', description='파일 형식 (기본 csv)', required=False, type=str, enum=list(EXPORT_FORMATS)),
+        ],
+        tags=['Expense']
+    )
+    def get(self, request):
+        fmt = request.query_params.get('file_format', 'csv')
+        try:
+            start, end = parse_range(request.query_params)
+            check_format(fmt)
+        except (ValueError, ExportError) as e:
+            return Response({"message": f"내보내기 조건이 올바르지 않습니다: {e}"}, status=400)
+
+        content_type, extension = EXPORT_FORMATS[fmt]
+        # [설명] ASGI(uvicorn)에서는 청크마다 스레드에서 읽는 async 이터레이터로 전송 (전체를 메모리에 모으지 않음)
+        response = StreamingHttpResponse(
+            streaming_body(request, iter_export(export_queryset(request.user.user_id, start, end), fmt)),
+            content_type=content_type)
+        filename = f"expenses_{timezone.localtime(start):%Y%m%d}_{timezone.localtime(end) - timedelta(days=1):%Y%m%d}.{extension}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
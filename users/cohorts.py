@@ -0,0 +1,75 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+
+from expense.models import CardBenefitUsage
+
+from .models import CohortCategoryStat
+from .quantile_sketch import QuantileSketch
+
+# 인구통계 코호트(연령대/성별) 카테고리별 지출 집계
+# [설명] 카드 혜택 사용 현황(CardBenefitUsage — 이미 (카드, 카테고리, 월) 단위로 합산된 원장)을
+# [설명] 사용자·카테고리별로 합친 뒤 코호트마다 사용자 수·합계·분위수 스케치를 만들어 CohortCategoryStat에 저장합니다.
+# [설명] 매일 밤 rebuild_cohort_stats 명령으로 재생성되며, 조회는 (월, 코호트) 인덱스 1회 읽기입니다.
+
+COHORT_MODES = ('all', 'age', 'gender', 'both')
+
+
+def cohort_key(mode, age_group, gender):
+    # [설명] 코호트 키 — 필요한 인구통계 정보가 없으면 None
+    if mode == 'all':
+        return 'all'
+    if mode in ('age', 'both') and not age_group:
+        return None
+    if mode in ('gender', 'both') and gender is None:
+        return None
+    if mode == 'age':
+        return f'age:{age_group}'
+    if mode == 'gender':
+        return f'gender:{int(gender)}'
+    return f'age:{age_group}|gender:{int(gender)}'
+
+
+def rebuild_cohort_stats(target_month):
+    # [설명] 한 달치 코호트 통계를 처음부터 다시 만듦 — 생성된 행 수 반환
+    usages = (
+        CardBenefitUsage.objects.filter(target_month=target_month)
+        .values_list('user_id', 'user__age_group', 'user__gender', 'category_id')
+        .annotate(total=Sum('spent_amount'))
+    )
+
+    # [설명] (코호트, 카테고리) → [사용자 수, 합계, 스케치] — 사용자별 값을 목록으로 들고 있지 않음
+    stats = defaultdict(lambda: [0, 0, QuantileSketch()])
+    for _, age_group, gender, category_id, total in usages.iterator(chunk_size=5000):
+        if not total or total <= 0:
+            continue
+        for mode in COHORT_MODES:
+            key = cohort_key(mode, age_group, gender)
+            if key is None:
+                continue
+            entry = stats[(key, category_id)]
+            entry[0] += 1
+            entry[1] += total
+            entry[2].add(total)
+
+    rows = [
+        CohortCategoryStat(
+            target_month=target_month, cohort=key, category_id=category_id,
+            user_count=user_count, total_spent=total_spent,
+            median_spent=round(sketch.quantile(0.5)), sketch=sketch.to_dict(),
+        )
+        for (key, category_id), (user_count, total_spent, sketch) in stats.items()
+    ]
+    with transaction.atomic():
+        CohortCategoryStat.objects.filter(target_month=target_month).delete()
+        CohortCategoryStat.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def get_cohort_stats(target_month, key):
+    # [설명] 카테고리별 코호트 통계 — (월, 코호트) 유니크 인덱스 앞부분으로 1회 조회
+    return list(
+        CohortCategoryStat.objects.filter(target_month=target_month, cohort=key).values_list(
+            'category_id', 'category__category_name', 'user_count', 'total_spent', 'median_spent', 'sketch')
+    )
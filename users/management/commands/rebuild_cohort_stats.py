@@ -0,0 +1,24 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from users.cohorts import rebuild_cohort_stats
+
+
+class Command(BaseCommand):
+    help = '연령대/성별 코호트의 카테고리별 월 지출 통계를 다시 집계합니다. (매일 밤 실행)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', action='append', help='재집계할 월 (YYYY-MM, 여러 번 지정 가능), 생략하면 이번 달과 지난달')
+
+    def handle(self, *args, **options):
+        months = options['month']
+        if not months:
+            # [설명] 지난달은 월말 늦게 들어온 지출·취소를 반영하기 위해 함께 재집계
+            this_month = timezone.localtime().replace(day=1)
+            months = [(this_month - timedelta(days=1)).strftime('%Y-%m'), this_month.strftime('%Y-%m')]
+
+        for target_month in months:
+            count = rebuild_cohort_stats(target_month)
+            self.stdout.write(f'{target_month}: 코호트·카테고리 통계 {count}건')
+
+        self.stdout.write(self.style.SUCCESS('✅ 코호트 통계 재집계 완료'))
@@ -0,0 +1,41 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from expense.benefit_usage import month_key
+from expense.rollups import month_bounds
+from expense.models import CardBenefitUsage, Expense
+from users.monthly_stats import rebuild_month
+
+
+class Command(BaseCommand):
+    help = '지출 내역으로 사용자별 월 지출 통계(MonthlyStat)와 월별 분포 스케치를 다시 만듭니다. (초기 적재·정합성 복구용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='특정 월만 재계산 (YYYY-MM), 생략하면 전체 월')
+
+    def handle(self, *args, **options):
+        target = options['month']
+
+        # [설명] 결제 완료·미삭제 지출을 한 번만 스트리밍하며 (월 → 사용자 → [지출 합계, 혜택 합계]) 누적
+        totals = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+        expenses = Expense.objects.filter(deleted_at__isnull=True, status='PAID').values_list('user_id', 'spent_at', 'amount')
+        if target:
+            month_start, month_end = month_bounds(*map(int, target.split('-')))
+            expenses = expenses.filter(spent_at__gte=month_start, spent_at__lt=month_end)
+        for user_id, spent_at, amount in expenses.iterator(chunk_size=5000):
+            target_month = month_key(spent_at)
+            totals[target_month][user_id][0] += amount
+
+        # [설명] 받은 혜택은 카드 혜택 원장(월 한도 적용 완료) 합계를 사용
+        benefits = CardBenefitUsage.objects.all()
+        if target:
+            benefits = benefits.filter(target_month=target)
+        for target_month, user_id, total in benefits.values_list('target_month', 'user_id').annotate(total=Sum('benefit_amount')):
+            totals[target_month][user_id][1] += total or 0
+
+        months = [target] if target else sorted(totals)
+        for target_month in months:
+            rebuild_month(target_month, {user_id: tuple(values) for user_id, values in totals.get(target_month, {}).items()})
+            self.stdout.write(f'{target_month}: 사용자 {len(totals.get(target_month, {}))}명')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ 월별 지출 통계 {len(months)}개월 재계산 완료'))
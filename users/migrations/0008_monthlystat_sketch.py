@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_alter_user_gender'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySpendSketch',
+            fields=[
+                ('sketch_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('target_month', models.CharField(max_length=45, unique=True)),
+                ('user_count', models.IntegerField(default=0)),
+                ('total_spent', models.BigIntegerField(default=0)),
+                ('sketch', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'monthly_spend_sketches',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='monthlystat',
+            index=models.Index(fields=['target_month'], name='idx_monthly_stat_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlystat',
+            constraint=models.UniqueConstraint(fields=('user', 'target_month'), name='uniq_monthly_stat_user_month'),
+        ),
+    ]
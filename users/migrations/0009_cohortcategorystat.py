@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0001_initial'),
+        ('users', '0008_monthlystat_sketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortCategoryStat',
+            fields=[
+                ('stat_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('target_month', models.CharField(max_length=45)),
+                ('cohort', models.CharField(max_length=45)),
+                ('user_count', models.IntegerField(default=0)),
+                ('total_spent', models.BigIntegerField(default=0)),
+                ('median_spent', models.BigIntegerField(default=0)),
+                ('sketch', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(db_column='category_id', on_delete=django.db.models.deletion.CASCADE, to='category.category')),
+            ],
+            options={
+                'db_table': 'cohort_category_stats',
+                'constraints': [models.UniqueConstraint(fields=('target_month', 'cohort', 'category'), name='uniq_cohort_category_stat')],
+            },
+        ),
+    ]
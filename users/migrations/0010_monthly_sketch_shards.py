@@ -0,0 +1,72 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+from users.quantile_sketch import QuantileSketch
+
+SKETCH_SHARDS = 16  # [설명] 이 마이그레이션 시점의 users.monthly_stats.SKETCH_SHARDS
+
+
+def split_sketches(apps, schema_editor):
+    # [설명] 월별 스케치 행 하나를 MonthlyStat 기준 샤드 행으로 다시 나눔 (user_id % SKETCH_SHARDS)
+    MonthlySpendSketch = apps.get_model('users', 'MonthlySpendSketch')
+    MonthlyStat = apps.get_model('users', 'MonthlyStat')
+    months = list(MonthlySpendSketch.objects.values_list('target_month', flat=True).distinct())
+    for target_month in months:
+        sketches = defaultdict(QuantileSketch)
+        spent = defaultdict(int)
+        stats = MonthlyStat.objects.filter(target_month=target_month, total_spent__gt=0).values_list('user_id', 'total_spent')
+        for user_id, total in stats.iterator(chunk_size=5000):
+            sketches[user_id % SKETCH_SHARDS].add(total)
+            spent[user_id % SKETCH_SHARDS] += total
+        MonthlySpendSketch.objects.filter(target_month=target_month).delete()
+        MonthlySpendSketch.objects.bulk_create([
+            MonthlySpendSketch(target_month=target_month, shard=shard, user_count=sketches[shard].count,
+                               total_spent=spent[shard], sketch=sketches[shard].to_dict())
+            for shard in range(SKETCH_SHARDS)
+        ])
+
+
+def merge_sketches(apps, schema_editor):
+    # [설명] 되돌릴 때는 샤드 행을 월별 행 하나로 병합
+    MonthlySpendSketch = apps.get_model('users', 'MonthlySpendSketch')
+    months = list(MonthlySpendSketch.objects.values_list('target_month', flat=True).distinct())
+    for target_month in months:
+        rows = list(MonthlySpendSketch.objects.filter(target_month=target_month).order_by('shard'))
+        sketch = QuantileSketch()
+        for row in rows:
+            sketch.merge(QuantileSketch.from_dict(row.sketch))
+        first = rows[0]
+        first.shard = 0
+        first.user_count = sum(row.user_count for row in rows)
+        first.total_spent = sum(row.total_spent for row in rows)
+        first.sketch = sketch.to_dict()
+        first.save()
+        MonthlySpendSketch.objects.filter(target_month=target_month).exclude(pk=first.pk).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_cohortcategorystat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlyspendsketch',
+            name='shard',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='monthlyspendsketch',
+            name='target_month',
+            field=models.CharField(max_length=45),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyspendsketch',
+            constraint=models.UniqueConstraint(fields=('target_month', 'shard'), name='uniq_monthly_spend_sketch_shard'),
+        ),
+        migrations.RunPython(split_sketches, merge_sketches),
+    ]
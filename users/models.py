@@ -65,4 +65,52 @@ class MonthlyStat(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        db_table = 'monthly_stats'
\ No newline at end of file
+        db_table = 'monthly_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'target_month'], name='uniq_monthly_stat_user_month'),
+        ]
+        indexes = [
+            models.Index(fields=['target_month'], name='idx_monthly_stat_month'),
+        ]
+
+# 월별 전체 사용자 지출 분포 (분위수 스케치)
+# [설명] 사용자별 월 지출(MonthlyStat.total_spent)이 바뀔 때마다 증분 갱신되며,
+# [설명] 그룹 평균(total_spent / user_count)과 백분위를 행 하나만 읽어서 계산할 수 있게 합니다.
+class MonthlySpendSketch(models.Model):
+    # [설명] 월마다 샤드 행 여러 개(shard = user_id % users.monthly_stats.SKETCH_SHARDS)에 부분 분포를 나눠 저장하고, 조회할 때 병합
+    sketch_id = models.BigAutoField(primary_key=True)
+    target_month = models.CharField(max_length=45)
+    shard = models.SmallIntegerField(default=0)
+    user_count = models.IntegerField(default=0)  # [설명] 해당 월 지출이 있는 (샤드) 사용자 수
+    total_spent = models.BigIntegerField(default=0)  # [설명] 해당 월 (샤드) 사용자 지출 합계
+    sketch = models.JSONField(default=dict)  # [설명] users.quantile_sketch.QuantileSketch.to_dict()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'monthly_spend_sketches'
+        constraints = [
+            models.UniqueConstraint(fields=['target_month', 'shard'], name='uniq_monthly_spend_sketch_shard'),
+        ]
+
+# 인구통계 코호트별 카테고리 지출 분포 (야간 집계)
+# [설명] (월, 코호트, 카테고리) 단위로 사용자 수·지출 합계·중앙값·분위수 스케치를 저장합니다.
+# [설명] 코호트 키는 users.cohorts.cohort_key() 참고 ('all', 'age:20대', 'gender:1', 'age:20대|gender:1')
+class CohortCategoryStat(models.Model):
+    stat_id = models.BigAutoField(primary_key=True)
+    target_month = models.CharField(max_length=45)
+    cohort = models.CharField(max_length=45)
+    category = models.ForeignKey('category.Category', on_delete=models.CASCADE, db_column='category_id')
+    user_count = models.IntegerField(default=0)  # [설명] 해당 카테고리 지출이 있는 코호트 사용자 수
+    total_spent = models.BigIntegerField(default=0)
+    median_spent = models.BigIntegerField(default=0)  # [설명] 스케치 기준 중앙값 (상대 오차 1% 이내)
+    sketch = models.JSONField(default=dict)  # [설명] users.quantile_sketch.QuantileSketch.to_dict()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'cohort_category_stats'
+        constraints = [
+            # [설명] (월, 코호트) 조회가 이 인덱스의 앞부분을 그대로 사용
+            models.UniqueConstraint(fields=['target_month', 'cohort', 'category'], name='uniq_cohort_category_stat'),
+        ]
\ No newline at end of file
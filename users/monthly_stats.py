@@ -0,0 +1,156 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import MonthlySpendSketch, MonthlyStat
+from .quantile_sketch import QuantileSketch
+
+# 월별 사용자 지출 통계 증분 갱신
+# [설명] 지출이 기록될 때마다 MonthlyStat(사용자별 월 지출)과 MonthlySpendSketch(월별 전체 분포)를 함께 갱신해서
+# [설명] 소비 패턴 분석의 그룹 평균·백분위를 전체 사용자 집계 없이 바로 계산할 수 있게 합니다.
+# [설명] 카드 혜택 원장(expense.benefit_usage.apply_usage_changes)에서 호출되며, 받은 혜택 합계(total_benefit)도 함께 갱신합니다.
+# [설명] 월별 분포는 SKETCH_SHARDS개 샤드 행(user_id % SKETCH_SHARDS)에 나눠 저장하므로 지출 기록은 자기 샤드 행만 잠급니다.
+# [설명] (월 하나에 행 하나였을 때는 전체 사용자의 지출 기록이 그 행 잠금에 줄을 섰음) 조회 시에는 샤드 스케치를 병합합니다.
+# [설명] 같은 사용자는 항상 같은 샤드이므로 사용자별 MonthlyStat 갱신도 샤드 잠금으로 직렬화됩니다.
+# [설명] SKETCH_SHARDS를 바꾸면 rebuild_monthly_stats 명령으로 샤드를 다시 나눠야 합니다.
+
+COHORT_CACHE_TIMEOUT = 60 * 5  # [설명] 월별 분포 캐시 (통계 갱신 시 무효화)
+SKETCH_SHARDS = 16
+
+
+def cohort_cache_key(target_month):
+    return f'users:monthly_cohort:{target_month}'
+
+
+def sketch_shard(user_id):
+    return user_id % SKETCH_SHARDS
+
+
+def _lock_sketch(target_month, shard):
+    # [설명] 월별 스케치 샤드 행을 잠금 (같은 샤드 사용자의 통계 갱신을 직렬화), 없으면 생성
+    try:
+        with transaction.atomic():
+            row, _ = MonthlySpendSketch.objects.select_for_update().get_or_create(target_month=target_month, shard=shard)
+    except IntegrityError:
+        # [설명] 동시에 다른 요청이 먼저 행을 만든 경우
+        row = MonthlySpendSketch.objects.select_for_update().get(target_month=target_month, shard=shard)
+    return row
+
+
+def apply_monthly_spend_deltas(deltas):
+    # [설명] {(user_id, 'YYYY-MM'): (지출 증감액, 혜택 증감액)} 반영 — (월, 샤드)별로 스케치 샤드 행을 잠근 뒤 사용자 통계와 분포를 함께 갱신
+    by_shard = defaultdict(dict)
+    for (user_id, target_month), (amount, benefit) in deltas.items():
+        if amount or benefit:
+            by_shard[target_month, sketch_shard(user_id)][user_id] = (amount, benefit)
+
+    for target_month, shard in sorted(by_shard):  # [설명] 잠금 순서를 고정해 워커 간 교착 방지
+        user_deltas = by_shard[target_month, shard]
+        with transaction.atomic():
+            row = _lock_sketch(target_month, shard)
+            sketch = QuantileSketch.from_dict(row.sketch)
+            stats = {
+                stat.user_id: stat
+                for stat in MonthlyStat.objects.filter(user_id__in=list(user_deltas), target_month=target_month)
+            }
+
+            now = timezone.now()
+            to_create, to_update = [], []
+            for user_id, (amount, benefit) in user_deltas.items():
+                stat = stats.get(user_id)
+                old = stat.total_spent if stat else 0
+                new = old + amount
+
+                # [설명] 월 지출이 있는 사용자만 분포에 포함 (이전 값 제거 → 새 값 추가)
+                if old > 0:
+                    sketch.remove(old)
+                    row.user_count -= 1
+                    row.total_spent -= old
+                if new > 0:
+                    sketch.add(new)
+                    row.user_count += 1
+                    row.total_spent += new
+
+                if stat is None:
+                    to_create.append(MonthlyStat(user_id=user_id, target_month=target_month,
+                                                 total_spent=new, total_benefit=benefit))
+                else:
+                    stat.total_spent = new
+                    stat.total_benefit += benefit
+                    stat.updated_at = now
+                    to_update.append(stat)
+
+            MonthlyStat.objects.bulk_create(to_create)
+            MonthlyStat.objects.bulk_update(to_update, ['total_spent', 'total_benefit', 'updated_at'])
+            row.sketch = sketch.to_dict()
+            row.save(update_fields=['user_count', 'total_spent', 'sketch', 'updated_at'])
+
+        cache.delete(cohort_cache_key(target_month))
+
+
+def get_month_cohort(target_month):
+    # [설명] (사용자 수, 지출 합계, QuantileSketch) — 캐시 미스일 때만 샤드 행 1회 조회 후 병합
+    key = cohort_cache_key(target_month)
+    cohort = cache.get(key)
+    if cohort is None:
+        user_count, total_spent, sketch = 0, 0, QuantileSketch()
+        for count, spent, data in MonthlySpendSketch.objects.filter(target_month=target_month).values_list(
+                'user_count', 'total_spent', 'sketch'):
+            user_count += count
+            total_spent += spent
+            sketch.merge(QuantileSketch.from_dict(data))
+        cohort = (user_count, total_spent, sketch)
+        cache.set(key, cohort, COHORT_CACHE_TIMEOUT)
+    return cohort
+
+
+def get_user_month_stat(user_id, target_month):
+    # [설명] (월 지출 합계, 받은 혜택 합계) — (user, month) 유니크 인덱스 1회 조회
+    return MonthlyStat.objects.filter(user_id=user_id, target_month=target_month).values_list(
+        'total_spent', 'total_benefit').first() or (0, 0)
+
+
+def rebuild_month(target_month, user_totals):
+    # [설명] 월 통계를 처음부터 다시 만듦 (rebuild_monthly_stats 명령에서 사용) — user_totals: {user_id: (월 지출, 받은 혜택)}
+    sketches = [QuantileSketch() for _ in range(SKETCH_SHARDS)]
+    shard_spent = [0] * SKETCH_SHARDS
+    for user_id, (total, _) in user_totals.items():
+        if total > 0:
+            sketches[sketch_shard(user_id)].add(total)
+            shard_spent[sketch_shard(user_id)] += total
+
+    with transaction.atomic():
+        rows = [_lock_sketch(target_month, shard) for shard in range(SKETCH_SHARDS)]
+        # [설명] 샤드 수를 줄인 뒤 남은 예전 샤드 행 정리
+        MonthlySpendSketch.objects.filter(target_month=target_month, shard__gte=SKETCH_SHARDS).delete()
+        MonthlyStat.objects.filter(target_month=target_month).exclude(user_id__in=list(user_totals)).update(
+            total_spent=0, total_benefit=0, updated_at=timezone.now())
+        existing = {
+            stat.user_id: stat
+            for stat in MonthlyStat.objects.filter(target_month=target_month, user_id__in=list(user_totals))
+        }
+        now = timezone.now()
+        to_create, to_update = [], []
+        for user_id, (total, benefit) in user_totals.items():
+            stat = existing.get(user_id)
+            if stat is None:
+                to_create.append(MonthlyStat(user_id=user_id, target_month=target_month,
+                                             total_spent=total, total_benefit=benefit))
+            elif (stat.total_spent, stat.total_benefit) != (total, benefit):
+                stat.total_spent = total
+                stat.total_benefit = benefit
+                stat.updated_at = now
+                to_update.append(stat)
+        MonthlyStat.objects.bulk_create(to_create, batch_size=1000)
+        MonthlyStat.objects.bulk_update(to_update, ['total_spent', 'total_benefit', 'updated_at'], batch_size=1000)
+
+        for row, sketch, spent in zip(rows, sketches, shard_spent):
+            row.user_count = sketch.count
+            row.total_spent = spent
+            row.sketch = sketch.to_dict()
+            row.updated_at = now
+        MonthlySpendSketch.objects.bulk_update(rows, ['user_count', 'total_spent', 'sketch', 'updated_at'])
+
+    cache.delete(cohort_cache_key(target_month))
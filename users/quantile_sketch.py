@@ -0,0 +1,75 @@
+import math
+
+# 로그 버킷 분위수 스케치 (DDSketch 방식)
+# [설명] 값을 상대 오차 RELATIVE_ACCURACY 이내의 로그 구간(버킷)에 세어 두는 방식입니다.
+# [설명] - 추가/삭제가 모두 가능해서 사용자의 월 지출이 바뀌면 이전 값을 빼고 새 값을 더할 수 있고,
+# [설명] - 버킷별 개수를 더하기만 하면 병합(merge)됩니다.
+# [설명] 오차 범위: quantile()이 돌려주는 값은 실제 분위수 값의 ±1% 이내이고,
+# [설명] rank_below()는 내 값과 ±1% 이내로 차이 나는(같은 버킷의) 사용자 수만큼만 어긋날 수 있습니다.
+# [설명] 버킷 수는 값의 범위에만 의존하므로(1원~100억원이면 최대 약 1,150개) 사용자 수와 무관하게 조회 비용이 일정합니다.
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+
+def bucket_key(value):
+    # [설명] 양수 값 → 버킷 번호 (GAMMA^(k-1) < value <= GAMMA^k)
+    return math.ceil(math.log(value) / LOG_GAMMA)
+
+
+class QuantileSketch:
+    def __init__(self, buckets=None, zero_count=0):
+        self.buckets = {int(k): v for k, v in (buckets or {}).items() if v}  # [설명] 버킷 번호 → 개수 (JSON 저장 시 키는 문자열)
+        self.zero_count = zero_count  # [설명] 0 이하 값 개수
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.buckets.values())
+
+    def add(self, value, n=1):
+        if value <= 0:
+            self.zero_count += n
+            return
+        key = bucket_key(value)
+        self.buckets[key] = self.buckets.get(key, 0) + n
+        if self.buckets[key] <= 0:
+            del self.buckets[key]
+
+    def remove(self, value, n=1):
+        self.add(value, -n)
+
+    def merge(self, other):
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.buckets = {k: v for k, v in self.buckets.items() if v}
+
+    def rank_below(self, value):
+        # [설명] value 보다 작은 값의 개수 (같은 버킷에 속한 값은 세지 않음)
+        if value <= 0:
+            return 0
+        key = bucket_key(value)
+        return self.zero_count + sum(n for k, n in self.buckets.items() if k < key)
+
+    def quantile(self, q):
+        # [설명] q(0~1) 분위수 근사값 (버킷 대표값 = 구간의 상대 오차 중앙)
+        total = self.count
+        if total == 0:
+            return None
+        target = q * (total - 1)
+        seen = self.zero_count
+        if target < seen:
+            return 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if target < seen:
+                return 2 * GAMMA ** key / (GAMMA + 1)
+        return 2 * GAMMA ** max(self.buckets) / (GAMMA + 1)
+
+    def to_dict(self):
+        return {'buckets': {str(k): v for k, v in self.buckets.items()}, 'zero_count': self.zero_count}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('buckets'), data.get('zero_count', 0))